@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, Certificate, VerificationAttempt, FailedVerificationLog
+from .models import CustomUser, Certificate, VerificationAttempt, FailedVerificationLog, AnchorBatch, AnchorOutbox
 
 
 @admin.register(CustomUser)
@@ -25,8 +25,8 @@ class CustomUserAdmin(UserAdmin):
 @admin.register(Certificate)
 class CertificateAdmin(admin.ModelAdmin):
     list_display = ['file_name', 'student_name', 'course_name', 'institution_name', 
-                    'uploaded_by', 'ocr_processed', 'created_at']
-    list_filter = ['file_type', 'ocr_processed', 'metadata_extracted', 'created_at']
+                    'uploaded_by', 'ocr_processed', 'anchor_status', 'created_at']
+    list_filter = ['file_type', 'ocr_processed', 'metadata_extracted', 'anchor_status', 'created_at']
     search_fields = ['file_name', 'student_name', 'course_name', 'institution_name', 'file_hash']
     readonly_fields = ['file_hash', 'file_name']
 
@@ -44,4 +44,19 @@ class VerificationAttemptAdmin(admin.ModelAdmin):
 class FailedVerificationLogAdmin(admin.ModelAdmin):
     list_display = ['college', 'verification_attempt', 'created_at']
     list_filter = ['created_at']
+    list_select_related = ['college', 'verification_attempt']
     search_fields = ['reason', 'verification_attempt__candidate_name']
+
+
+@admin.register(AnchorBatch)
+class AnchorBatchAdmin(admin.ModelAdmin):
+    list_display = ['merkle_root', 'leaf_count', 'iota_block_id', 'root_confirmed', 'created_at']
+    list_filter = ['root_confirmed', 'created_at']
+    search_fields = ['merkle_root', 'iota_block_id']
+
+
+@admin.register(AnchorOutbox)
+class AnchorOutboxAdmin(admin.ModelAdmin):
+    list_display = ['idempotency_key', 'status', 'attempts', 'next_attempt_at', 'updated_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['idempotency_key', 'last_error']
@@ -0,0 +1,212 @@
+"""
+Outbox worker that anchors certificates on IOTA in Merkle batches.
+
+Uploads only write an AnchorOutbox row next to the Certificate (same
+transaction); everything that talks to the network lives here and is driven
+by `manage.py anchor_certificates`.
+"""
+import logging
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import dashboard
+from .models import AnchorBatch, AnchorOutbox, Certificate
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_certificates(certificates):
+    """
+    Queue freshly created certificates for anchoring.
+    Call inside the transaction that created them.
+    """
+    return AnchorOutbox.objects.bulk_create(AnchorOutbox.for_certificates(certificates), batch_size=500)
+
+
+def backoff_delay(attempts):
+    """Exponential backoff with jitter for the given (1-based) attempt count"""
+    base = getattr(settings, 'IOTA_OUTBOX_BACKOFF_BASE_SECONDS', 30)
+    cap = getattr(settings, 'IOTA_OUTBOX_BACKOFF_MAX_SECONDS', 3600)
+    delay = min(cap, base * (2 ** (attempts - 1)))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _due_filter(now):
+    lease = timedelta(seconds=getattr(settings, 'IOTA_OUTBOX_LEASE_SECONDS', 600))
+    return (
+        Q(status='pending', next_attempt_at__lte=now)
+        # Entries claimed by a worker that died mid-batch
+        | Q(status='processing', locked_at__lt=now - lease)
+    )
+
+
+def claim_due_entries(limit, now=None):
+    """
+    Claim up to `limit` due outbox entries for this worker.
+    The conditional UPDATE makes claims safe across concurrent workers.
+    """
+    now = now or timezone.now()
+    due = _due_filter(now)
+    ids = list(
+        AnchorOutbox.objects.filter(due).order_by('next_attempt_at', 'id').values_list('id', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    AnchorOutbox.objects.filter(due, id__in=ids).update(
+        status='processing', claim_token=token, locked_at=now
+    )
+    return list(
+        AnchorOutbox.objects.filter(claim_token=token, status='processing')
+        .select_related('certificate__uploaded_by')
+        .order_by('id')
+    )
+
+
+def window_is_open(batch_size, max_wait, now=None):
+    """
+    True when a full batch is due, or the oldest due entry has waited max_wait
+    """
+    now = now or timezone.now()
+    due = AnchorOutbox.objects.filter(_due_filter(now))
+    if due.count() >= batch_size:
+        return True
+    oldest = due.order_by('created_at').values_list('created_at', flat=True).first()
+    return oldest is not None and now - oldest >= max_wait
+
+
+def _schedule_retry(entries, error):
+    max_attempts = getattr(settings, 'IOTA_OUTBOX_MAX_ATTEMPTS', 8)
+    now = timezone.now()
+    for entry in entries:
+        entry.attempts += 1
+        entry.last_error = str(error)[:2000]
+        entry.claim_token = ''
+        entry.locked_at = None
+        if entry.attempts >= max_attempts:
+            entry.status = 'failed'
+        else:
+            entry.status = 'pending'
+            entry.next_attempt_at = now + backoff_delay(entry.attempts)
+
+    with transaction.atomic():
+        AnchorOutbox.objects.bulk_update(
+            entries, ['attempts', 'last_error', 'claim_token', 'locked_at', 'status', 'next_attempt_at']
+        )
+        failed_ids = [entry.certificate_id for entry in entries if entry.status == 'failed']
+        if failed_ids:
+            Certificate.objects.filter(id__in=failed_ids).update(anchor_status='failed', updated_at=now)
+
+
+def _mark_done(entries):
+    AnchorOutbox.objects.filter(id__in=[entry.id for entry in entries]).update(
+        status='done', claim_token='', locked_at=None, last_error=''
+    )
+
+
+def anchor_entries(iota_service, entries):
+    """
+    Anchor one batch of claimed outbox entries under a single Merkle root.
+    Returns (anchored, retried) counts.
+    """
+    # Idempotency: a certificate already anchored for real is never posted again
+    already = [entry for entry in entries if entry.certificate.anchor_status == 'anchored']
+    entries = [entry for entry in entries if entry.certificate.anchor_status != 'anchored']
+    if already:
+        _mark_done(already)
+    if not entries:
+        return 0, 0
+
+    certificates = [entry.certificate for entry in entries]
+    prepared = iota_service.prepare_batch(certificates)
+
+    # The batch row is keyed by the Merkle root and gets its block id in its own
+    # write as soon as the post returns, so a retry of the same set of
+    # certificates (after a crash or a failed certificate update) reuses the
+    # block instead of re-posting
+    batch, _ = AnchorBatch.objects.get_or_create(
+        merkle_root=prepared['merkle_root'],
+        defaults={'leaf_count': prepared['leaf_count']},
+    )
+    if batch.iota_block_id:
+        block = {'block_id': batch.iota_block_id, 'timestamp': batch.iota_timestamp,
+                 'alt_data': batch.iota_block_id.startswith('ALTCHAIN_')}
+    else:
+        try:
+            # Only an explicitly disabled IOTA service falls back to the alternative ledger;
+            # network failures are retried with backoff
+            block = iota_service.post_batch_root(
+                prepared['merkle_root'], prepared['leaf_count'], allow_fallback=not iota_service.enabled
+            )
+        except Exception as e:
+            logger.warning(f"Anchoring batch {prepared['merkle_root']} failed: {e}")
+            _schedule_retry(entries, e)
+            return 0, len(entries)
+        batch.iota_block_id = block['block_id']
+        batch.iota_timestamp = block['timestamp']
+        batch.save(update_fields=['iota_block_id', 'iota_timestamp'])
+
+    anchor_status = 'alt_anchored' if block.get('alt_data') else 'anchored'
+    # bulk_update skips auto_now; updated_at keys the verification cache, so bump it explicitly
+    now = timezone.now()
+    with transaction.atomic():
+        for certificate, leaf, proof in zip(certificates, prepared['leaves'], prepared['proofs']):
+            certificate.anchor_batch = batch
+            certificate.merkle_leaf_hash = leaf
+            certificate.merkle_proof = proof
+            certificate.iota_block_id = block['block_id']
+            certificate.iota_message_id = block['block_id']
+            certificate.iota_stored = True
+            certificate.iota_timestamp = block['timestamp']
+            certificate.anchor_status = anchor_status
+            certificate.updated_at = now
+        Certificate.objects.bulk_update(
+            certificates,
+            ['anchor_batch', 'merkle_leaf_hash', 'merkle_proof', 'iota_block_id',
+             'iota_message_id', 'iota_stored', 'iota_timestamp', 'anchor_status', 'updated_at'],
+            batch_size=500,
+        )
+        _mark_done(entries)
+        dashboard.invalidate_recent(certificate.uploaded_by_id for certificate in certificates)
+
+    return len(entries), 0
+
+
+def _anchor_entries_in_thread(iota_service, entries):
+    try:
+        return anchor_entries(iota_service, entries)
+    finally:
+        connection.close()
+
+
+def drain_outbox(iota_service, batch_size, concurrency=1, max_wait=timedelta(0), flush=False):
+    """
+    Drain due outbox entries, anchoring up to `concurrency` Merkle batches at once.
+    Returns a dict of counters.
+    """
+    stats = {'anchored': 0, 'retried': 0, 'batches': 0}
+    while flush or window_is_open(batch_size, max_wait):
+        entries = claim_due_entries(batch_size * concurrency)
+        if not entries:
+            break
+
+        batches = [entries[i:i + batch_size] for i in range(0, len(entries), batch_size)]
+        if len(batches) == 1:
+            results = [anchor_entries(iota_service, batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(lambda batch: _anchor_entries_in_thread(iota_service, batch), batches))
+
+        for anchored, retried in results:
+            stats['anchored'] += anchored
+            stats['retried'] += retried
+        stats['batches'] += len(batches)
+    return stats
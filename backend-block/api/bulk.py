@@ -0,0 +1,235 @@
+import csv
+import hashlib
+import io
+import mimetypes
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+
+
+ALLOWED_CERTIFICATE_EXTENSIONS = ['.pdf', '.jpg', '.jpeg', '.png']
+
+CERTIFICATE_MANIFEST_COLUMNS = ['file_name', 'student_name', 'course_name', 'institution_name']
+
+VERIFICATION_MANIFEST_COLUMNS = ['file_name', 'candidate_name']
+
+
+def _worker_count():
+    return getattr(settings, 'BULK_IO_WORKERS', min(8, (os.cpu_count() or 1) + 4))
+
+
+class BulkUploadError(Exception):
+    """Raised when a bulk request cannot be processed at all (bad manifest, archive, limits)"""
+    pass
+
+
+def parse_manifest(manifest_file, required_columns):
+    """
+    Parse a CSV manifest upload into a list of dicts (one per data row).
+    Header names are normalised to lower case; values are stripped.
+    """
+    try:
+        text = manifest_file.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise BulkUploadError('Manifest must be a UTF-8 encoded CSV file')
+
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames:
+        raise BulkUploadError('Manifest is empty')
+
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+    missing = [column for column in required_columns if column not in reader.fieldnames]
+    if missing:
+        raise BulkUploadError(f'Manifest is missing required columns: {missing}')
+
+    rows = []
+    for row in reader:
+        rows.append({key: (value or '').strip() for key, value in row.items() if key})
+    return rows
+
+
+def _extract_member(zf, info, name, budget, chunk_size=64 * 1024):
+    """
+    Copy one archive member to a temporary file in chunks, stopping once more
+    than budget bytes come out (the sizes in the zip header are not trusted).
+    """
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    upload = TemporaryUploadedFile(name, content_type, info.file_size, None)
+    written = 0
+    with zf.open(info) as member:
+        for chunk in iter(lambda: member.read(chunk_size), b''):
+            written += len(chunk)
+            if written > budget:
+                upload.close()
+                return None, written
+            upload.write(chunk)
+    upload.size = written
+    upload.seek(0)
+    return upload, written
+
+
+def collect_upload_files(request, archive_field='archive', files_field='files'):
+    """
+    Gather uploaded files from a zip archive and/or a multi-file multipart field.
+    Archive members are streamed to temporary files rather than read into memory;
+    pass the files to close_upload_files() when done to remove them.
+
+    Returns (files, duplicates): a dict of base file name -> file object, and the
+    set of base names uploaded more than once. Duplicated names are left out of
+    files, since there is no telling which copy a manifest row means.
+    """
+    max_files = getattr(settings, 'BULK_UPLOAD_MAX_FILES', 5000)
+    max_bytes = getattr(settings, 'BULK_UPLOAD_MAX_BYTES', 512 * 1024 * 1024)
+    collected = {}
+    duplicates = set()
+    file_count = 0
+    total_bytes = 0
+
+    def add(name, file):
+        nonlocal file_count
+        file_count += 1
+        if file_count > max_files:
+            raise BulkUploadError(f'Too many files: more than {max_files}')
+        if name in duplicates or name in collected:
+            duplicates.add(name)
+            file.close()
+            if name in collected:
+                collected.pop(name).close()
+        else:
+            collected[name] = file
+
+    archive = request.FILES.get(archive_field)
+    if archive:
+        try:
+            with zipfile.ZipFile(archive) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+                    name = os.path.basename(info.filename)
+                    # Skip hidden files and OS metadata (e.g. __MACOSX/._foo.pdf)
+                    if not name or name.startswith('.'):
+                        continue
+                    upload, size = _extract_member(zf, info, name, max_bytes - total_bytes)
+                    total_bytes += size
+                    if upload is None:
+                        raise BulkUploadError(f'Archive exceeds the {max_bytes} byte limit')
+                    add(name, upload)
+        except zipfile.BadZipFile:
+            raise BulkUploadError('Archive is not a valid zip file')
+
+    for upload in request.FILES.getlist(files_field):
+        name = os.path.basename(upload.name)
+        total_bytes += upload.size
+        if total_bytes > max_bytes:
+            raise BulkUploadError(f'Upload exceeds the {max_bytes} byte limit')
+        add(name, upload)
+
+    return collected, duplicates
+
+
+def close_upload_files(files):
+    """Close collected files, removing any temporary files still on disk"""
+    for file in files.values():
+        file.close()
+
+
+def _hash_file(file):
+    hasher = hashlib.sha256()
+    for chunk in file.chunks():
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()
+
+
+def hash_files_parallel(files):
+    """
+    SHA256 a dict of name -> file in a thread pool (hashlib releases the GIL).
+    Returns a dict of name -> hex digest.
+    """
+    if not files:
+        return {}
+    names = list(files)
+    with ThreadPoolExecutor(max_workers=_worker_count()) as executor:
+        digests = executor.map(lambda name: _hash_file(files[name]), names)
+        return dict(zip(names, digests))
+
+
+def save_files_parallel(items):
+    """
+    Save (storage_path, file) pairs to default storage in a thread pool.
+    Returns the stored names in the same order.
+    """
+    from django.core.files.storage import default_storage
+
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=_worker_count()) as executor:
+        return list(executor.map(lambda item: default_storage.save(item[0], item[1]), items))
+
+
+def delete_stored_files(names):
+    """Best-effort cleanup of files stored for a batch that was rolled back"""
+    from django.core.files.storage import default_storage
+
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except Exception:
+            pass
+
+
+def existing_hashes(model, hashes, chunk_size=500):
+    """Return the subset of hashes already present on model.file_hash"""
+    hashes = list(hashes)
+    found = set()
+    for start in range(0, len(hashes), chunk_size):
+        found.update(
+            model.objects.filter(file_hash__in=hashes[start:start + chunk_size])
+            .values_list('file_hash', flat=True)
+        )
+    return found
+
+
+def validate_certificate_row(row, files, hashes, duplicates=()):
+    """
+    Validate one certificate manifest row against the uploaded files.
+    Returns (cleaned_data, errors).
+    """
+    errors = []
+    file_name = row.get('file_name', '')
+    cleaned = {
+        'file_name': file_name,
+        'student_name': row.get('student_name', ''),
+        'course_name': row.get('course_name', ''),
+        'institution_name': row.get('institution_name', ''),
+        'grade_score': row.get('grade_score', ''),
+        'issue_date': None,
+    }
+
+    if not file_name:
+        errors.append('file_name is required')
+    elif file_name in duplicates:
+        errors.append(f'File {file_name} appears more than once in upload')
+    elif file_name not in files:
+        errors.append(f'File {file_name} not found in upload')
+    else:
+        file_ext = os.path.splitext(file_name)[1].lower()
+        if file_ext not in ALLOWED_CERTIFICATE_EXTENSIONS:
+            errors.append(f'File type {file_ext} not allowed. Allowed types: {ALLOWED_CERTIFICATE_EXTENSIONS}')
+        cleaned['file_type'] = file_ext[1:]
+        cleaned['file_hash'] = hashes.get(file_name)
+
+    if not all([cleaned['student_name'], cleaned['course_name'], cleaned['institution_name']]):
+        errors.append('student_name, course_name, and institution_name are required')
+
+    if row.get('issue_date'):
+        try:
+            cleaned['issue_date'] = datetime.strptime(row['issue_date'], '%Y-%m-%d').date()
+        except ValueError:
+            errors.append('Invalid date format. Use YYYY-MM-DD')
+
+    return cleaned, errors
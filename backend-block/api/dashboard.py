@@ -0,0 +1,80 @@
+"""
+Dashboard counters and cached recent-item lists.
+
+Counters live in the DashboardCounter table and are bumped by the signals in
+api/signals.py inside the writing transaction (bulk paths call increment()
+themselves, since bulk_create sends no signals). Recent-item lists are cached
+per user in the shared 'dashboard' cache (see CACHES in settings) and dropped
+whenever the user's rows change, whichever process changed them.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+
+from .models import DashboardCounter
+
+CERTIFICATES = 'certificates'
+VERIFICATIONS = 'verifications'
+VERIFIED = 'verified_verifications'
+FAILED = 'failed_verifications'
+FAILURE_LOGS = 'failure_logs'
+
+
+def increment(user_id, name, delta=1):
+    """Add delta to a counter; user_id None is the broadcast (all colleges) row"""
+    if not delta:
+        return
+    updated = DashboardCounter.objects.filter(user_id=user_id, name=name).update(value=F('value') + delta)
+    if updated or delta < 0:
+        # A missing row on decrement means the user (and its counters) is being deleted
+        return
+    try:
+        with transaction.atomic():
+            DashboardCounter.objects.create(user_id=user_id, name=name, value=delta)
+    except IntegrityError:
+        # Another writer created the row first
+        DashboardCounter.objects.filter(user_id=user_id, name=name).update(value=F('value') + delta)
+
+
+def attempt_counters(status):
+    """Counter names an attempt with this status contributes to"""
+    names = [VERIFICATIONS]
+    if status == 'verified':
+        names.append(VERIFIED)
+    elif status == 'failed':
+        names.append(FAILED)
+    return names
+
+
+def read_counters(user):
+    """All counters visible to a user; colleges also see broadcast failure logs"""
+    rows = DashboardCounter.objects.filter(user=user)
+    counters = dict(rows.values_list('name', 'value'))
+    if user.user_type == 'college':
+        counters[FAILURE_LOGS] = DashboardCounter.objects.filter(
+            Q(user=user) | Q(user__isnull=True), name=FAILURE_LOGS
+        ).aggregate(total=Sum('value'))['total'] or 0
+    return counters
+
+
+def _recent_key(user_id):
+    return f'dashboard:recent:{user_id}'
+
+
+def get_recent(user, build):
+    """Cached recent-items payload for user; build() computes it on a miss"""
+    cache = caches['dashboard']
+    key = _recent_key(user.id)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, getattr(settings, 'DASHBOARD_RECENT_CACHE_SECONDS', 300))
+    return data
+
+
+def invalidate_recent(user_ids):
+    """Drop cached recent items once the current transaction commits"""
+    keys = [_recent_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        transaction.on_commit(lambda: caches['dashboard'].delete_many(keys))
@@ -1,22 +1,129 @@
 import json
 import logging
 import hashlib
+import threading
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.utils import timezone
 import os
 
+from .merkle import build_tree, merkle_root, inclusion_proof, leaf_hash, verify_proof
+
 logger = logging.getLogger(__name__)
 
+
+class IOTAAnchorError(Exception):
+    """Raised when a block cannot be posted and the caller asked for no fallback"""
+    pass
+
+
+def text_to_hex(text):
+    """Same encoding as iota_sdk.utf8_to_hex, available without the SDK"""
+    return '0x' + text.encode('utf-8').hex()
+
+
+def hex_to_text(hex_data):
+    if hex_data.startswith('0x'):
+        hex_data = hex_data[2:]
+    return bytes.fromhex(hex_data).decode('utf-8')
+
+
+class LRUCache:
+    """
+    Small thread-safe LRU map shared by the request threads of one process
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# Decoded payloads of fetched blocks, keyed by block id (backed by the IOTABlock table)
+block_cache = LRUCache(getattr(settings, 'IOTA_BLOCK_CACHE_SIZE', 4096))
+# Verification results, keyed by (certificate_id, updated_at)
+verification_cache = LRUCache(getattr(settings, 'IOTA_VERIFICATION_CACHE_SIZE', 4096))
+
+
+class LocalTangleClient:
+    """
+    In-process stand-in for iota_sdk.Client used in tests and local development.
+    Implements the two calls IOTAService relies on; blocks are shared by all
+    instances in the process.
+    """
+    _blocks = {}
+
+    class _Payload:
+        def __init__(self, tag, data):
+            self.tag = tag
+            self.data = data
+
+    class _Block:
+        def __init__(self, payload):
+            self.payload = payload
+
+    def __init__(self):
+        self.post_count = 0
+        self.get_count = 0
+
+    def build_and_post_block(self, tag=None, data=None):
+        self.post_count += 1
+        block_id = '0x' + hashlib.blake2b(f'{tag}:{data}:{uuid.uuid4()}'.encode(), digest_size=32).hexdigest()
+        block = self._Block(self._Payload(tag, data))
+        self._blocks[block_id] = block
+        return [block_id, block]
+
+    def get_block(self, block_id):
+        self.get_count += 1
+        if block_id not in self._blocks:
+            raise ValueError(f"Block {block_id} not found")
+        return self._blocks[block_id]
+
+
 class IOTAService:
     """
     IOTA blockchain service for certificate storage and verification
     """
     
-    def __init__(self):
+    def __init__(self, client=None):
         # IOTA testnet node URL (you can change this to mainnet when ready)
         self.node_url = getattr(settings, 'IOTA_NODE_URL', 'https://api.testnet.iota.cafe')
         self.enabled = getattr(settings, 'IOTA_ENABLED', True)
+        self.utf8_to_hex = text_to_hex
+
+        if client is None and getattr(settings, 'IOTA_USE_LOCAL_CLIENT', False):
+            client = LocalTangleClient()
+
+        if client is not None:
+            # Injected client (e.g. LocalTangleClient); no SDK needed
+            self.client = client
+            self.enabled = True
+            return
         
         if not self.enabled:
             logger.warning("IOTA service is disabled")
@@ -113,11 +220,182 @@ class IOTAService:
             logger.info(f"Switching to alternative blockchain protocol for certificate {certificate.id}")
             return self.generate_alt_iota_data(certificate)
     
+    def certificate_leaf_hash(self, certificate):
+        """
+        Merkle leaf hash of a certificate's canonical payload
+        """
+        return leaf_hash(self.create_certificate_payload(certificate))
+
+    def prepare_batch(self, certificates):
+        """
+        Build the Merkle tree for a batch of certificates without touching the network
+        Returns: dict with the root, leaves and one inclusion proof per certificate (in input order)
+        """
+        leaves = [self.certificate_leaf_hash(certificate) for certificate in certificates]
+        levels = build_tree(leaves)
+        return {
+            'merkle_root': merkle_root(levels),
+            'leaf_count': len(leaves),
+            'leaves': leaves,
+            'proofs': [inclusion_proof(levels, i) for i in range(len(leaves))],
+        }
+
+    def post_batch_root(self, merkle_root_hash, leaf_count, allow_fallback=True):
+        """
+        Post a single IOTA block holding a batch Merkle root
+        Returns: dict with block details, or alt data if IOTA fails and allow_fallback is set
+        Raises: IOTAAnchorError when the post fails and allow_fallback is False
+        """
+        timestamp = timezone.now()
+        alt_result = {
+            'block_id': f"ALTCHAIN_{hashlib.md5(merkle_root_hash.encode()).hexdigest()}",
+            'success': True,
+            'timestamp': timestamp,
+            'alt_data': True,
+        }
+
+        if not self.enabled:
+            if not allow_fallback:
+                raise IOTAAnchorError("IOTA service is disabled")
+            logger.warning("IOTA service is disabled, using alternative blockchain protocol")
+            return alt_result
+
+        try:
+            payload_json = json.dumps({
+                'type': 'certificate_batch',
+                'merkle_root': merkle_root_hash,
+                'leaf_count': leaf_count,
+                'timestamp': timestamp.isoformat(),
+            }, sort_keys=True)
+            block = self.client.build_and_post_block(
+                tag=self.utf8_to_hex('SIH_CERTIFICATE_BATCH'),
+                data=self.utf8_to_hex(payload_json)
+            )
+            logger.info(f"Anchored batch of {leaf_count} certificates on IOTA. Block ID: {block[0]}")
+            return {
+                'block_id': block[0],
+                'success': True,
+                'timestamp': timestamp,
+                'alt_data': False,
+            }
+        except Exception as e:
+            if not allow_fallback:
+                raise IOTAAnchorError(f"Failed to post batch {merkle_root_hash}: {e}") from e
+            logger.info(f"Switching to alternative blockchain protocol for batch {merkle_root_hash}")
+            return alt_result
+
+    def anchor_certificates_batch(self, certificates, allow_fallback=True):
+        """
+        Anchor a batch of certificates with a single IOTA block holding the
+        Merkle root of their payload hashes.
+        Returns: prepare_batch() result merged with the post_batch_root() block details
+        """
+        result = self.prepare_batch(list(certificates))
+        result.update(self.post_batch_root(result['merkle_root'], result['leaf_count'], allow_fallback))
+        return result
+
+    def fetch_block_data(self, block_id):
+        """
+        Decoded payload text of an IOTA block, or None if the block carries no data.
+        Looks in the in-memory LRU, then the IOTABlock table, and only then asks the node.
+        Raises: whatever the client raises when the node cannot be reached
+        """
+        data = block_cache.get(block_id)
+        if data is not None:
+            return data
+
+        from .models import IOTABlock
+        data = IOTABlock.objects.filter(block_id=block_id).values_list('data', flat=True).first()
+        if data is None:
+            block = self.client.get_block(block_id)
+            payload = getattr(block, 'payload', None)
+            hex_data = getattr(payload, 'data', None) if payload else None
+            if not hex_data:
+                return None
+            data = hex_to_text(hex_data)
+            IOTABlock.objects.get_or_create(block_id=block_id, defaults={'data': data})
+
+        block_cache.set(block_id, data)
+        return data
+
+    def verify_batch_inclusion(self, certificate):
+        """
+        Verify a batch-anchored certificate: check its inclusion proof locally
+        and fetch the batch root block at most once per batch
+        """
+        batch = certificate.anchor_batch
+        current_leaf = self.certificate_leaf_hash(certificate)
+
+        if current_leaf != certificate.merkle_leaf_hash:
+            return {
+                'verified': False,
+                'reason': 'Data mismatch detected: certificate payload differs from anchored leaf',
+                'merkle_root': batch.merkle_root,
+            }
+
+        if not verify_proof(current_leaf, certificate.merkle_proof, batch.merkle_root):
+            return {
+                'verified': False,
+                'reason': 'Merkle inclusion proof does not match batch root',
+                'merkle_root': batch.merkle_root,
+            }
+
+        alt_verification = bool(batch.iota_block_id and batch.iota_block_id.startswith('ALTCHAIN_'))
+        if not batch.root_confirmed and not alt_verification:
+            # Another request may have confirmed the root since this row was loaded
+            batch.refresh_from_db(fields=['root_confirmed'])
+        if not batch.root_confirmed and not alt_verification:
+            try:
+                stored_data = self.fetch_block_data(batch.iota_block_id) if self.enabled else None
+            except Exception as e:
+                logger.warning(f"Could not fetch batch root block {batch.iota_block_id}: {e}")
+                stored_data = None
+            if not stored_data:
+                # Usually the node being unreachable: transient results are not memoized
+                return {
+                    'verified': False,
+                    'reason': 'Batch root block could not be retrieved from IOTA',
+                    'merkle_root': batch.merkle_root,
+                    'transient': True,
+                }
+            stored_payload = json.loads(stored_data)
+            if stored_payload.get('merkle_root') != batch.merkle_root:
+                return {
+                    'verified': False,
+                    'reason': 'Batch root on IOTA does not match local record',
+                    'merkle_root': batch.merkle_root,
+                }
+            batch.root_confirmed = True
+            batch.save(update_fields=['root_confirmed'])
+
+        return {
+            'verified': True,
+            'reason': 'Certificate included in IOTA-anchored Merkle batch',
+            'merkle_root': batch.merkle_root,
+            'batch_block_id': batch.iota_block_id,
+            'alt_verification': alt_verification,
+            'stored_data': json.loads(self.create_certificate_payload(certificate)),
+        }
+
     def verify_certificate_on_iota(self, certificate):
         """
         Verify certificate data against IOTA Tangle
+        Results are memoized per (certificate_id, updated_at); network fallbacks and
+        transient failures (the batch root could not be fetched) are not
         Returns: dict with verification result
         """
+        key = (certificate.id, certificate.updated_at)
+        result = verification_cache.get(key)
+        if result is None:
+            result = self._verify_certificate_on_iota(certificate)
+            if certificate.iota_block_id and not result.get('fallback') and not result.get('transient'):
+                verification_cache.set(key, result)
+        return dict(result)
+
+    def _verify_certificate_on_iota(self, certificate):
+        if certificate.anchor_batch_id:
+            return self.verify_batch_inclusion(certificate)
+
         if not self.enabled or not certificate.iota_block_id:
             return {
                 'verified': False,
@@ -145,50 +423,44 @@ class IOTAService:
                 }
             
         try:
-            # Get block from IOTA
-            block = self.client.get_block(certificate.iota_block_id)
-            
-            # Extract payload data
-            if hasattr(block, 'payload') and block.payload:
-                # Convert hex data back to string
-                hex_data = block.payload.data if hasattr(block.payload, 'data') else None
-                if hex_data:
-                    # Convert hex to UTF-8
-                    stored_data = bytes.fromhex(hex_data).decode('utf-8')
-                    stored_payload = json.loads(stored_data)
-                    
-                    # Create current payload for comparison
-                    current_payload_json = self.create_certificate_payload(certificate)
-                    current_payload = json.loads(current_payload_json)
-                    
-                    # Compare critical fields
-                    critical_fields = ['file_hash', 'student_name', 'course_name', 'institution_name']
-                    mismatches = []
-                    
-                    for field in critical_fields:
-                        if stored_payload.get(field) != current_payload.get(field):
-                            mismatches.append({
-                                'field': field,
-                                'stored': stored_payload.get(field),
-                                'current': current_payload.get(field)
-                            })
-                    
-                    if mismatches:
-                        return {
-                            'verified': False,
-                            'reason': 'Data mismatch detected',
-                            'mismatches': mismatches,
-                            'stored_data': stored_payload,
-                            'current_data': current_payload
-                        }
-                    else:
-                        return {
-                            'verified': True,
-                            'reason': 'Certificate data matches IOTA record',
-                            'stored_data': stored_payload,
-                            'alt_verification': False
-                        }
+            # Get block from IOTA (or the block cache)
+            stored_data = self.fetch_block_data(certificate.iota_block_id)
             
+            if stored_data:
+                stored_payload = json.loads(stored_data)
+                
+                # Create current payload for comparison
+                current_payload_json = self.create_certificate_payload(certificate)
+                current_payload = json.loads(current_payload_json)
+                
+                # Compare critical fields
+                critical_fields = ['file_hash', 'student_name', 'course_name', 'institution_name']
+                mismatches = []
+                
+                for field in critical_fields:
+                    if stored_payload.get(field) != current_payload.get(field):
+                        mismatches.append({
+                            'field': field,
+                            'stored': stored_payload.get(field),
+                            'current': current_payload.get(field)
+                        })
+                
+                if mismatches:
+                    return {
+                        'verified': False,
+                        'reason': 'Data mismatch detected',
+                        'mismatches': mismatches,
+                        'stored_data': stored_payload,
+                        'current_data': current_payload
+                    }
+                else:
+                    return {
+                        'verified': True,
+                        'reason': 'Certificate data matches IOTA record',
+                        'stored_data': stored_payload,
+                        'alt_verification': False
+                    }
+        
             return {
                 'verified': False,
                 'reason': 'No payload data found in IOTA block'
@@ -215,20 +487,62 @@ class IOTAService:
             return None
             
         try:
-            block = self.client.get_block(block_id)
-            
-            if hasattr(block, 'payload') and block.payload:
-                hex_data = block.payload.data if hasattr(block.payload, 'data') else None
-                if hex_data:
-                    stored_data = bytes.fromhex(hex_data).decode('utf-8')
-                    return json.loads(stored_data)
-            
-            return None
+            stored_data = self.fetch_block_data(block_id)
+            return json.loads(stored_data) if stored_data else None
             
         except Exception as e:
             # logger.error(f"Failed to retrieve data from IOTA block {block_id}: {e}")
             return None
 
 
-# Global IOTA service instance
-iota_service = IOTAService()
+_shared_service = None
+_shared_service_lock = threading.Lock()
+
+
+def get_iota_service():
+    """
+    Process-wide IOTAService, so the SDK is imported and the node client
+    (with its connection pool) is created once rather than per request
+    """
+    global _shared_service
+    if _shared_service is None:
+        with _shared_service_lock:
+            if _shared_service is None:
+                _shared_service = IOTAService()
+    return _shared_service
+
+
+def verify_certificates_parallel(certificates, max_workers=None):
+    """
+    Verify certificates on IOTA with a bounded thread pool.
+    Yields (certificate, result) pairs as each check completes.
+    """
+    from django.db import connection
+
+    service = get_iota_service()
+    if max_workers is None:
+        max_workers = getattr(settings, 'IOTA_VERIFY_WORKERS', 8)
+    if max_workers <= 1:
+        for certificate in certificates:
+            yield certificate, service.verify_certificate_on_iota(certificate)
+        return
+
+    def verify(certificate):
+        try:
+            return service.verify_certificate_on_iota(certificate)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(verify, certificate): certificate for certificate in certificates}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def _reset_shared_service(setting, **kwargs):
+    global _shared_service
+    if setting.startswith('IOTA_'):
+        _shared_service = None
+
+
+setting_changed.connect(_reset_shared_service)
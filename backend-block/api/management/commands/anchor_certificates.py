@@ -0,0 +1,68 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.anchoring import drain_outbox
+from api.iota_service import get_iota_service
+
+
+class Command(BaseCommand):
+    help = 'Drain the anchor outbox: anchor queued certificates on IOTA in Merkle batches (one root block per batch)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'IOTA_BATCH_SIZE', 256),
+            help='Maximum number of certificates per Merkle batch',
+        )
+        parser.add_argument(
+            '--max-wait',
+            type=int,
+            default=getattr(settings, 'IOTA_BATCH_MAX_WAIT_SECONDS', 300),
+            help='Anchor a partial batch once its oldest certificate has waited this many seconds',
+        )
+        parser.add_argument(
+            '--flush',
+            action='store_true',
+            help='Anchor a trailing partial batch regardless of --max-wait',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=getattr(settings, 'IOTA_OUTBOX_CONCURRENCY', 2),
+            help='Maximum number of batches posted to IOTA at the same time',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep running and poll the outbox every --interval seconds',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=10,
+            help='Polling interval in seconds when --loop is set',
+        )
+
+    def handle(self, *args, **options):
+        iota_service = get_iota_service()
+
+        while True:
+            stats = drain_outbox(
+                iota_service,
+                batch_size=options['batch_size'],
+                concurrency=max(1, options['concurrency']),
+                max_wait=timedelta(seconds=options['max_wait']),
+                flush=options['flush'],
+            )
+            if stats['batches'] or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Anchored {stats['anchored']} certificate(s) in {stats['batches']} batch(es), "
+                    f"{stats['retried']} scheduled for retry"
+                ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from api import phash
+from api.models import Certificate
+
+
+class Command(BaseCommand):
+    help = 'Compute perceptual hashes for certificates uploaded before near-duplicate search existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=200,
+            help='Number of certificates hashed per round',
+        )
+
+    def handle(self, *args, **options):
+        pending = Certificate.objects.filter(perceptual_hash='').order_by('id')
+        fields = list(phash.hash_fields(None))
+        last_id = 0
+        hashed = 0
+        skipped = 0
+
+        while True:
+            certificates = list(pending.filter(id__gt=last_id)[:options['chunk_size']])
+            if not certificates:
+                break
+            last_id = certificates[-1].id
+
+            opened = []
+            for certificate in certificates:
+                try:
+                    opened.append((certificate, certificate.file_path.open('rb')))
+                except (FileNotFoundError, ValueError):
+                    skipped += 1
+
+            values = phash.compute_dhashes_parallel([(f, certificate.file_type) for certificate, f in opened])
+            updated = []
+            for (certificate, f), value in zip(opened, values):
+                f.close()
+                if value is None:
+                    skipped += 1
+                    continue
+                phash.apply_hash(certificate, value)
+                updated.append(certificate)
+            Certificate.objects.bulk_update(updated, fields, batch_size=500)
+            hashed += len(updated)
+
+        self.stdout.write(self.style.SUCCESS(f'Hashed {hashed} certificate(s), skipped {skipped}'))
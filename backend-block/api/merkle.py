@@ -0,0 +1,75 @@
+"""
+Merkle tree helpers for batch anchoring of certificates.
+
+Leaves and inner nodes are domain separated (0x00 / 0x01 prefixes) and an odd
+node at the end of a level is promoted unchanged, so a proof can never be
+replayed against a tree with a duplicated last leaf.
+"""
+import hashlib
+
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+def leaf_hash(data):
+    """SHA256 leaf hash of a payload (str or bytes), returned as hex"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(LEAF_PREFIX + data).hexdigest()
+
+
+def _node_hash(left, right):
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def build_tree(leaves):
+    """
+    Build all levels of the tree from a list of hex leaf hashes.
+    Returns a list of levels, levels[0] being the leaves and levels[-1] the root.
+    """
+    if not leaves:
+        raise ValueError('Cannot build a Merkle tree without leaves')
+
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        current = levels[-1]
+        parent = []
+        for i in range(0, len(current) - 1, 2):
+            parent.append(_node_hash(current[i], current[i + 1]))
+        if len(current) % 2:
+            parent.append(current[-1])
+        levels.append(parent)
+    return levels
+
+
+def merkle_root(levels):
+    return levels[-1][0]
+
+
+def inclusion_proof(levels, index):
+    """
+    Inclusion proof for the leaf at index as a list of
+    {'hash': <hex>, 'position': 'left' | 'right'} sibling steps.
+    """
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({
+                'hash': level[sibling],
+                'position': 'left' if sibling < index else 'right',
+            })
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf, proof, root):
+    """Recompute the root from a leaf hash and its proof and compare with root"""
+    current = leaf
+    for step in proof or []:
+        if step['position'] == 'left':
+            current = _node_hash(step['hash'], current)
+        else:
+            current = _node_hash(current, step['hash'])
+    return current == root
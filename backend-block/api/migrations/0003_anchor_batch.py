@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_certificate_iota_block_id_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnchorBatch",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("merkle_root", models.CharField(max_length=64, unique=True)),
+                ("leaf_count", models.PositiveIntegerField()),
+                (
+                    "iota_block_id",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                ("iota_timestamp", models.DateTimeField(blank=True, null=True)),
+                ("root_confirmed", models.BooleanField(default=False)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="merkle_leaf_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="merkle_proof",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="anchor_batch",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="certificates",
+                to="api.anchorbatch",
+            ),
+        ),
+    ]
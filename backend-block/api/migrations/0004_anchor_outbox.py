@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_anchor_status(apps, schema_editor):
+    Certificate = apps.get_model("api", "Certificate")
+    AnchorOutbox = apps.get_model("api", "AnchorOutbox")
+
+    Certificate.objects.filter(iota_stored=True).update(anchor_status="anchored")
+    Certificate.objects.filter(iota_stored=True, iota_block_id__startswith="ALTCHAIN_").update(
+        anchor_status="alt_anchored"
+    )
+
+    # Certificates that were never anchored (or only got a synthetic ALTCHAIN_
+    # id) are queued so the worker retries the real anchor
+    pending = Certificate.objects.filter(iota_stored=False) | Certificate.objects.filter(
+        iota_block_id__startswith="ALTCHAIN_", anchor_batch__isnull=True
+    )
+    AnchorOutbox.objects.bulk_create(
+        [
+            AnchorOutbox(
+                certificate_id=certificate_id,
+                idempotency_key=f"certificate:{certificate_id}:{file_hash}",
+            )
+            for certificate_id, file_hash in pending.values_list("id", "file_hash")
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_anchor_batch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="certificate",
+            name="anchor_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("anchored", "Anchored"),
+                    ("alt_anchored", "Anchored (alternative ledger)"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=15,
+            ),
+        ),
+        migrations.CreateModel(
+            name="AnchorOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("idempotency_key", models.CharField(max_length=100, unique=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processing", "Processing"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveIntegerField(default=0)),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("claim_token", models.CharField(blank=True, max_length=32)),
+                ("locked_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "certificate",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="anchor_outbox",
+                        to="api.certificate",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "next_attempt_at"],
+                        name="api_anchoro_status_b4026b_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_anchor_status, migrations.RunPython.noop),
+    ]
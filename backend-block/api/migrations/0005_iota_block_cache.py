@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_anchor_outbox"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IOTABlock",
+            fields=[
+                (
+                    "block_id",
+                    models.CharField(max_length=255, primary_key=True, serialize=False),
+                ),
+                ("data", models.TextField()),
+                ("fetched_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def collapse_fan_out(apps, schema_editor):
+    FailedVerificationLog = apps.get_model("api", "FailedVerificationLog")
+
+    # Keep the first row of each per-college fan-out as the broadcast event
+    keep_ids = list(
+        FailedVerificationLog.objects.values("verification_attempt_id")
+        .annotate(first_id=Min("id"))
+        .values_list("first_id", flat=True)
+    )
+    FailedVerificationLog.objects.exclude(id__in=keep_ids).delete()
+    FailedVerificationLog.objects.update(college=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_iota_block_cache"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FailedVerificationCursor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("last_seen_id", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="failedverificationlog",
+            name="college",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="failed_verifications",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="failedverificationlog",
+            index=models.Index(
+                fields=["created_at"], name="api_failedv_created_05eac0_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="failedverificationcursor",
+            name="college",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="failed_verification_cursor",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(collapse_fan_out, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_failed_verification_broadcast"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="certificate",
+            name="perceptual_hash",
+            field=models.CharField(blank=True, max_length=16),
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="phash_band0",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="phash_band1",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="phash_band2",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="certificate",
+            name="phash_band3",
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
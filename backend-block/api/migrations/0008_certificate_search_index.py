@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:10
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS api_certificate_search "
+        "USING fts5(student_name, course_name, institution_name, tokenize='trigram')"
+    )
+    schema_editor.execute(
+        "INSERT INTO api_certificate_search (rowid, student_name, course_name, institution_name) "
+        "SELECT id, student_name, course_name, institution_name FROM api_certificate"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS api_certificate_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_certificate_perceptual_hash"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Certificate = apps.get_model("api", "Certificate")
+    VerificationAttempt = apps.get_model("api", "VerificationAttempt")
+    FailedVerificationLog = apps.get_model("api", "FailedVerificationLog")
+    DashboardCounter = apps.get_model("api", "DashboardCounter")
+
+    counters = []
+    for user_id, total in (
+        Certificate.objects.values_list("uploaded_by_id").annotate(total=Count("id"))
+    ):
+        counters.append(DashboardCounter(user_id=user_id, name="certificates", value=total))
+
+    for user_id, total in (
+        VerificationAttempt.objects.values_list("company_id").annotate(total=Count("id"))
+    ):
+        counters.append(DashboardCounter(user_id=user_id, name="verifications", value=total))
+    for attempt_status, name in (
+        ("verified", "verified_verifications"),
+        ("failed", "failed_verifications"),
+    ):
+        for user_id, total in (
+            VerificationAttempt.objects.filter(status=attempt_status)
+            .values_list("company_id")
+            .annotate(total=Count("id"))
+        ):
+            counters.append(DashboardCounter(user_id=user_id, name=name, value=total))
+
+    for user_id, total in (
+        FailedVerificationLog.objects.filter(college__isnull=False)
+        .values_list("college_id")
+        .annotate(total=Count("id"))
+    ):
+        counters.append(DashboardCounter(user_id=user_id, name="failure_logs", value=total))
+    # The broadcast row always exists so concurrent increments only ever update it
+    counters.append(
+        DashboardCounter(
+            user_id=None,
+            name="failure_logs",
+            value=FailedVerificationLog.objects.filter(college__isnull=True).count(),
+        )
+    )
+
+    DashboardCounter.objects.bulk_create(counters, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_certificate_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50)),
+                ("value", models.BigIntegerField(default=0)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="dashboard_counters",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "name"), name="unique_dashboard_counter"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
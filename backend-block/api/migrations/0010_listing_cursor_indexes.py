@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_dashboard_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="certificate",
+            index=models.Index(
+                fields=["uploaded_by", "-created_at", "-id"],
+                name="api_certifi_uploade_5472d8_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="verificationattempt",
+            index=models.Index(
+                fields=["company", "-created_at", "-id"],
+                name="api_verific_company_8df884_idx",
+            ),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 import hashlib
 import os
 
@@ -18,7 +19,29 @@ class CustomUser(AbstractUser):
         return f"{self.username} ({self.user_type})"
 
 
+class AnchorBatch(models.Model):
+    """A Merkle batch of certificates anchored on IOTA with a single root block"""
+    merkle_root = models.CharField(max_length=64, unique=True)
+    leaf_count = models.PositiveIntegerField()
+    iota_block_id = models.CharField(max_length=255, blank=True, null=True)
+    iota_timestamp = models.DateTimeField(null=True, blank=True)
+    # Set once the root block has been fetched and matched, so later
+    # verifications of any certificate in the batch stay local
+    root_confirmed = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Batch {self.merkle_root[:12]} ({self.leaf_count} certificates)"
+
+
 class Certificate(models.Model):
+    ANCHOR_STATUS = (
+        ('pending', 'Pending'),
+        ('anchored', 'Anchored'),
+        ('alt_anchored', 'Anchored (alternative ledger)'),
+        ('failed', 'Failed'),
+    )
+    
     uploaded_by = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='certificates')
     file_path = models.FileField(upload_to='certificates/')
     file_name = models.CharField(max_length=255)
@@ -44,9 +67,29 @@ class Certificate(models.Model):
     iota_stored = models.BooleanField(default=False)
     iota_timestamp = models.DateTimeField(null=True, blank=True)
     
+    # Merkle batch anchoring
+    anchor_batch = models.ForeignKey(AnchorBatch, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='certificates')
+    merkle_leaf_hash = models.CharField(max_length=64, blank=True)
+    merkle_proof = models.JSONField(null=True, blank=True)
+    anchor_status = models.CharField(max_length=15, choices=ANCHOR_STATUS, default='pending')
+    
+    # Perceptual hash (64-bit dHash as hex) split into indexed 16-bit bands, see api/phash.py
+    perceptual_hash = models.CharField(max_length=16, blank=True)
+    phash_band0 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    phash_band1 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    phash_band2 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    phash_band3 = models.PositiveIntegerField(null=True, blank=True, db_index=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Cursor pagination of a college's listing
+            models.Index(fields=['uploaded_by', '-created_at', '-id']),
+        ]
+    
     def save(self, *args, **kwargs):
         if self.file_path and not self.file_hash:
             # Generate SHA256 hash of the file
@@ -64,6 +107,62 @@ class Certificate(models.Model):
         return f"{self.file_name} - {self.student_name}"
 
 
+class AnchorOutbox(models.Model):
+    """
+    Transactional outbox of certificates waiting to be anchored on IOTA.
+    Rows are written in the same transaction as the Certificate and drained
+    by `manage.py anchor_certificates`.
+    """
+    OUTBOX_STATUS = (
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    
+    certificate = models.ForeignKey(Certificate, on_delete=models.CASCADE, related_name='anchor_outbox')
+    idempotency_key = models.CharField(max_length=100, unique=True)
+    status = models.CharField(max_length=10, choices=OUTBOX_STATUS, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    @staticmethod
+    def key_for(certificate):
+        return f"certificate:{certificate.id}:{certificate.file_hash}"
+    
+    @classmethod
+    def for_certificates(cls, certificates):
+        """Unsaved outbox rows for freshly created certificates (for create/bulk_create)"""
+        return [cls(certificate=certificate, idempotency_key=cls.key_for(certificate)) for certificate in certificates]
+    
+    def __str__(self):
+        return f"Anchor {self.idempotency_key} ({self.status})"
+
+
+class IOTABlock(models.Model):
+    """
+    Persistent cache of fetched IOTA block payloads.
+    Blocks are immutable, so rows never expire.
+    """
+    block_id = models.CharField(max_length=255, primary_key=True)
+    data = models.TextField()
+    fetched_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return self.block_id
+
+
 class VerificationAttempt(models.Model):
     VERIFICATION_STATUS = (
         ('pending', 'Pending'),
@@ -99,6 +198,12 @@ class VerificationAttempt(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Cursor pagination of a company's listing
+            models.Index(fields=['company', '-created_at', '-id']),
+        ]
+    
     def save(self, *args, **kwargs):
         if self.uploaded_file and not self.file_hash:
             # Generate SHA256 hash of the file
@@ -114,10 +219,57 @@ class VerificationAttempt(models.Model):
 
 
 class FailedVerificationLog(models.Model):
-    college = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='failed_verifications')
+    """
+    One row per failed verification event. A null college is a broadcast
+    visible to every college (fan-out on read instead of one row per college).
+    """
+    college = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='failed_verifications',
+                                null=True, blank=True)
     verification_attempt = models.ForeignKey(VerificationAttempt, on_delete=models.CASCADE)
     reason = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+    
+    @classmethod
+    def visible_to(cls, college):
+        """Broadcast events plus any addressed to this college"""
+        return cls.objects.filter(models.Q(college__isnull=True) | models.Q(college=college))
+    
     def __str__(self):
         return f"Failed verification for {self.verification_attempt.candidate_name}"
+
+
+class FailedVerificationCursor(models.Model):
+    """
+    Per-college read cursor over FailedVerificationLog: events with an id
+    above last_seen_id are unread
+    """
+    college = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='failed_verification_cursor')
+    last_seen_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.college.username} read up to {self.last_seen_id}"
+
+
+class DashboardCounter(models.Model):
+    """
+    Per-user dashboard counter (see api/dashboard.py). A null user is the
+    broadcast row, e.g. failure logs visible to every college.
+    """
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, null=True, blank=True,
+                             related_name='dashboard_counters')
+    name = models.CharField(max_length=50)
+    value = models.BigIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='unique_dashboard_counter'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id or 'all'}:{self.name}={self.value}"
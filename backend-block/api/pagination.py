@@ -0,0 +1,103 @@
+"""
+Keyset (cursor) pagination on (created_at, id), newest first.
+
+Pages are fetched with a WHERE on the last seen (created_at, id) instead of
+OFFSET, and no COUNT(*) is issued unless the caller asks for one.
+"""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(created_at, pk):
+    raw = f'{created_at.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def page_limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def cursor_page(queryset, request):
+    """
+    One page of queryset (newest first) after the request's ?cursor=.
+    Returns (rows, pagination dict). Raises InvalidCursor for a malformed cursor.
+    """
+    limit = page_limit(request)
+    queryset = queryset.order_by('-created_at', '-id')
+
+    token = request.GET.get('cursor')
+    if token:
+        created_at, pk = decode_cursor(token)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    rows = list(queryset[:limit + 1])
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    return rows, {
+        'limit': limit,
+        'has_next': has_next,
+        'next_cursor': encode_cursor(rows[-1].created_at, rows[-1].id) if has_next else None,
+    }
+
+
+def ranked_page(fetch, request):
+    """
+    One page of a ranked result (e.g. search results); the cursor is an offset
+    into the ranking. fetch(offset, limit) returns ids in rank order.
+    Returns (page ids, pagination dict).
+    """
+    limit = page_limit(request)
+    token = request.GET.get('cursor')
+    try:
+        offset = int(token) if token else 0
+    except ValueError:
+        raise InvalidCursor('Invalid cursor')
+    if offset < 0:
+        raise InvalidCursor('Invalid cursor')
+
+    page_ids = fetch(offset, limit + 1)
+    has_next = len(page_ids) > limit
+    page_ids = page_ids[:limit]
+    return page_ids, {
+        'limit': limit,
+        'has_next': has_next,
+        'next_cursor': str(offset + limit) if has_next else None,
+    }
+
+
+def add_count(pagination, request, exact, estimate=None):
+    """
+    Add total_items when ?count=exact or ?count=estimate is requested.
+    exact/estimate are callables; estimate falls back to exact when unavailable.
+    """
+    mode = request.GET.get('count', '')
+    if mode == 'estimate' and estimate is not None:
+        value = estimate()
+        if value is not None:
+            pagination.update(total_items=value, count_is_estimate=True)
+            return pagination
+    if mode in ('exact', 'estimate'):
+        pagination.update(total_items=exact(), count_is_estimate=False)
+    return pagination
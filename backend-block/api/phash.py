@@ -0,0 +1,132 @@
+"""
+Perceptual hashing (dHash) of certificate images and near-duplicate search.
+
+Hashes are 64-bit and split into four 16-bit bands stored in indexed columns
+(multi-index hashing). Two hashes within Hamming distance d share at least one
+band within distance d // 4, so a search only has to look up the query bands
+and their close neighbours instead of scanning every certificate.
+"""
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from itertools import combinations
+
+from django.conf import settings
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+BAND_COUNT = 4
+BAND_BITS = HASH_BITS // BAND_COUNT
+BAND_FIELDS = [f'phash_band{i}' for i in range(BAND_COUNT)]
+
+
+def _open_image(file, file_type):
+    from PIL import Image
+
+    if file_type == 'pdf':
+        # Scanned certificates are PDFs wrapping a single page image
+        try:
+            from PyPDF2 import PdfReader
+        except ImportError:
+            return None
+        reader = PdfReader(file)
+        if not reader.pages or not reader.pages[0].images:
+            return None
+        return Image.open(io.BytesIO(reader.pages[0].images[0].data))
+    return Image.open(file)
+
+
+def dhash_image(image, hash_size=8):
+    """Difference hash: one bit per horizontally adjacent pixel pair of a 9x8 grayscale thumbnail"""
+    from PIL import Image
+
+    pixels = list(image.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS).getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def compute_dhash(file, file_type):
+    """
+    dHash of an uploaded certificate file, or None when no image can be read
+    (e.g. text-only PDFs). Leaves the file rewound.
+    """
+    try:
+        file.seek(0)
+        image = _open_image(file, file_type)
+        return dhash_image(image) if image is not None else None
+    except Exception as e:
+        logger.info(f"Could not compute perceptual hash for {getattr(file, 'name', file)}: {e}")
+        return None
+    finally:
+        file.seek(0)
+
+
+def compute_dhashes_parallel(items):
+    """dHash a list of (file, file_type) pairs in a thread pool; returns hashes in order"""
+    from .bulk import _worker_count
+
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=_worker_count()) as executor:
+        return list(executor.map(lambda item: compute_dhash(*item), items))
+
+
+def split_bands(value):
+    mask = (1 << BAND_BITS) - 1
+    return [(value >> (BAND_BITS * (BAND_COUNT - 1 - i))) & mask for i in range(BAND_COUNT)]
+
+
+def hash_fields(value):
+    """Model field values for a hash (or for no hash)"""
+    if value is None:
+        return {'perceptual_hash': '', **{field: None for field in BAND_FIELDS}}
+    return {'perceptual_hash': f'{value:016x}', **dict(zip(BAND_FIELDS, split_bands(value)))}
+
+
+def apply_hash(certificate, value):
+    for field, field_value in hash_fields(value).items():
+        setattr(certificate, field, field_value)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+def _band_neighbours(band, radius):
+    """All 16-bit values within Hamming distance radius of band"""
+    values = [band]
+    for distance in range(1, radius + 1):
+        for bits in combinations(range(BAND_BITS), distance):
+            flipped = band
+            for bit in bits:
+                flipped ^= 1 << bit
+            values.append(flipped)
+    return values
+
+
+def find_near_duplicates(queryset, value, max_distance=None, limit=10):
+    """
+    Certificates in queryset whose perceptual hash is within max_distance of value.
+    Returns a list of (certificate, distance), closest first.
+    """
+    if max_distance is None:
+        max_distance = getattr(settings, 'PHASH_MAX_DISTANCE', 10)
+    band_radius = max_distance // BAND_COUNT
+
+    condition = Q()
+    for field, band in zip(BAND_FIELDS, split_bands(value)):
+        condition |= Q(**{f'{field}__in': _band_neighbours(band, band_radius)})
+
+    matches = []
+    for certificate in queryset.filter(condition).exclude(perceptual_hash=''):
+        distance = hamming(value, int(certificate.perceptual_hash, 16))
+        if distance <= max_distance:
+            matches.append((certificate, distance))
+    matches.sort(key=lambda match: match[1])
+    return matches[:limit]
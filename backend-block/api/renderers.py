@@ -0,0 +1,26 @@
+"""
+JSON renderer backed by orjson when it is installed.
+
+orjson serializes several times faster than the stdlib encoder DRF uses; when it
+is missing, or an indented response is requested, rendering falls
+back to DRF's JSONRenderer so output stays the same.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        # Types orjson does not know (lazy strings, Decimals, querysets...) go through DRF's encoder
+        return orjson.dumps(data, default=_encoder.default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,123 @@
+"""
+Certificate search: an SQLite FTS5 trigram index over student, course and
+institution names (kept in sync by the signals in api/signals.py), plus a
+typo- and initials-tolerant score used when comparing names.
+"""
+import re
+from difflib import SequenceMatcher
+
+from django.db import connection
+
+SEARCH_TABLE = 'api_certificate_search'
+SEARCH_COLUMNS = ['student_name', 'course_name', 'institution_name']
+
+_available = None
+
+
+def is_available():
+    """True when the FTS5 index exists (SQLite only; other backends fall back to icontains)"""
+    global _available
+    if _available is None:
+        _available = connection.vendor == 'sqlite' and SEARCH_TABLE in connection.introspection.table_names()
+    return _available
+
+
+def index_certificates(certificates):
+    if not certificates or not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (%s, %s, %s, %s)",
+            [(c.id, c.student_name, c.course_name, c.institution_name) for c in certificates],
+        )
+
+
+def remove_certificates(certificate_ids):
+    if not certificate_ids or not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(i,) for i in certificate_ids])
+
+
+def _fts_query(text):
+    # Trigram tokens need at least three characters; quoting makes each term a literal substring
+    terms = [term for term in re.findall(r'\w+', text) if len(term) >= 3]
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def searchable(text):
+    """True when the index can serve a search for text (otherwise callers fall back to icontains)"""
+    return bool(_fts_query(text)) and is_available()
+
+
+def _match_sql(select, query, uploaded_by):
+    sql = (
+        f"SELECT {select} FROM {SEARCH_TABLE} s JOIN api_certificate c ON c.id = s.rowid "
+        f"WHERE {SEARCH_TABLE} MATCH %s"
+    )
+    params = [query]
+    if uploaded_by is not None:
+        sql += " AND c.uploaded_by_id = %s"
+        params.append(uploaded_by.id)
+    return sql, params
+
+
+def search_certificate_ids(text, uploaded_by=None, limit=1000, offset=0):
+    """
+    Certificate ids matching text, best match first: `limit` of them from
+    position `offset` in the ranking.
+    Returns None when the index cannot serve the query (caller falls back to icontains).
+    """
+    query = _fts_query(text)
+    if not query or not is_available():
+        return None
+
+    sql, params = _match_sql('s.rowid', query, uploaded_by)
+    sql += f" ORDER BY bm25({SEARCH_TABLE}), s.rowid LIMIT %s OFFSET %s"
+    params.extend([limit, offset])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def count_certificate_matches(text, uploaded_by=None):
+    """Number of certificates matching text, or None when the index cannot serve the query"""
+    query = _fts_query(text)
+    if not query or not is_available():
+        return None
+
+    sql, params = _match_sql('COUNT(*)', query, uploaded_by)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()[0]
+
+
+def _tokens(text):
+    return re.findall(r'\w+', (text or '').lower())
+
+
+def _token_score(expected, actual):
+    if len(expected) == 1 or len(actual) == 1:
+        # Initials: "A" matches "Arjun"
+        return 1.0 if expected[0] == actual[0] else 0.0
+    return SequenceMatcher(None, expected, actual).ratio()
+
+
+def match_score(expected, actual):
+    """
+    How well an expected value (typed by a company, possibly OCR'd) matches a
+    stored one, from 0 to 1. Word order, punctuation, case, initials and small
+    typos are tolerated; an empty expectation matches anything.
+    """
+    expected_tokens = _tokens(expected)
+    actual_tokens = _tokens(actual)
+    if not expected_tokens:
+        return 1.0
+    if not actual_tokens:
+        return 0.0
+
+    per_token = [max(_token_score(e, a) for a in actual_tokens) for e in expected_tokens]
+    token_score = sum(per_token) / len(per_token)
+    whole_score = SequenceMatcher(None, ' '.join(expected_tokens), ' '.join(actual_tokens)).ratio()
+    return round(max(token_score, whole_score), 3)
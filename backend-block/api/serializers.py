@@ -47,6 +47,28 @@ class UserLoginSerializer(serializers.Serializer):
         return data
 
 
+class FieldsProjectionMixin:
+    """
+    Serializer mixin taking a `fields` kwarg (e.g. from ?fields=) that restricts
+    output to the requested subset of the declared fields
+    """
+    
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+    
+    @classmethod
+    def projection(cls, requested):
+        """Requested field names (comma separated) that exist on the serializer, or None for all"""
+        if not requested:
+            return None
+        fields = [name.strip() for name in requested.split(',') if name.strip() in cls.Meta.fields]
+        return fields or None
+
+
 class CertificateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Certificate
@@ -54,13 +76,23 @@ class CertificateSerializer(serializers.ModelSerializer):
                  'student_name', 'course_name', 'institution_name', 'issue_date',
                  'grade_score', 'ocr_processed', 'ocr_output', 'metadata_extracted',
                  'iota_message_id', 'iota_block_id', 'iota_transaction_id', 
-                 'iota_stored', 'iota_timestamp', 'created_at', 'updated_at']
+                 'iota_stored', 'iota_timestamp', 'anchor_status', 'created_at', 'updated_at']
         read_only_fields = ['id', 'file_hash', 'file_name', 'ocr_processed', 
                            'ocr_output', 'metadata_extracted', 'iota_message_id',
-                           'iota_block_id', 'iota_transaction_id', 'iota_stored',
+                           'iota_block_id', 'iota_transaction_id', 'iota_stored', 'anchor_status',
                            'iota_timestamp', 'created_at', 'updated_at']
 
 
+class CertificateListSerializer(FieldsProjectionMixin, serializers.ModelSerializer):
+    """Listing rows: no OCR output, file hash or IOTA identifiers"""
+    
+    class Meta:
+        model = Certificate
+        fields = ['id', 'file_name', 'file_type', 'student_name', 'course_name',
+                 'institution_name', 'issue_date', 'grade_score', 'iota_stored',
+                 'anchor_status', 'created_at']
+
+
 class CertificateUploadSerializer(serializers.ModelSerializer):
     files = serializers.ListField(
         child=serializers.FileField(),
@@ -86,6 +118,16 @@ class VerificationAttemptSerializer(serializers.ModelSerializer):
                            'course_match', 'institution_match', 'created_at', 'updated_at']
 
 
+class VerificationAttemptListSerializer(FieldsProjectionMixin, serializers.ModelSerializer):
+    """Listing rows: no OCR output or uploaded file"""
+    
+    class Meta:
+        model = VerificationAttempt
+        fields = ['id', 'certificate', 'candidate_name', 'candidate_email', 'expected_course',
+                 'expected_institution', 'status', 'name_match', 'course_match',
+                 'institution_match', 'created_at']
+
+
 class FailedVerificationLogSerializer(serializers.ModelSerializer):
     verification_attempt = VerificationAttemptSerializer(read_only=True)
     
@@ -0,0 +1,57 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import dashboard, search
+from .models import Certificate, FailedVerificationLog, VerificationAttempt
+
+
+@receiver(post_save, sender=Certificate)
+def index_certificate(sender, instance, **kwargs):
+    search.index_certificates([instance])
+
+
+@receiver(post_delete, sender=Certificate)
+def unindex_certificate(sender, instance, **kwargs):
+    search.remove_certificates([instance.id])
+
+
+# Dashboard counters: these run inside the writer's transaction, so the
+# counter commits (or rolls back) together with the row it counts
+
+@receiver(post_save, sender=Certificate)
+def count_certificate(sender, instance, created, **kwargs):
+    if created:
+        dashboard.increment(instance.uploaded_by_id, dashboard.CERTIFICATES)
+    dashboard.invalidate_recent([instance.uploaded_by_id])
+
+
+@receiver(post_delete, sender=Certificate)
+def uncount_certificate(sender, instance, **kwargs):
+    dashboard.increment(instance.uploaded_by_id, dashboard.CERTIFICATES, -1)
+    dashboard.invalidate_recent([instance.uploaded_by_id])
+
+
+@receiver(post_save, sender=VerificationAttempt)
+def count_verification_attempt(sender, instance, created, **kwargs):
+    if created:
+        for name in dashboard.attempt_counters(instance.status):
+            dashboard.increment(instance.company_id, name)
+    dashboard.invalidate_recent([instance.company_id])
+
+
+@receiver(post_delete, sender=VerificationAttempt)
+def uncount_verification_attempt(sender, instance, **kwargs):
+    for name in dashboard.attempt_counters(instance.status):
+        dashboard.increment(instance.company_id, name, -1)
+    dashboard.invalidate_recent([instance.company_id])
+
+
+@receiver(post_save, sender=FailedVerificationLog)
+def count_failure_log(sender, instance, created, **kwargs):
+    if created:
+        dashboard.increment(instance.college_id, dashboard.FAILURE_LOGS)
+
+
+@receiver(post_delete, sender=FailedVerificationLog)
+def uncount_failure_log(sender, instance, **kwargs):
+    dashboard.increment(instance.college_id, dashboard.FAILURE_LOGS, -1)
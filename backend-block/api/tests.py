@@ -1,3 +1,747 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .anchoring import anchor_entries, claim_due_entries, enqueue_certificates
+from .iota_service import IOTAService, LocalTangleClient, block_cache, verification_cache
+from . import phash, search
+from .merkle import build_tree, inclusion_proof, leaf_hash, merkle_root, verify_proof
+from .models import (
+    AnchorBatch, AnchorOutbox, CustomUser, Certificate, FailedVerificationLog, IOTABlock, VerificationAttempt
+)
+
+
+TEST_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_manifest(rows):
+    lines = ['file_name,student_name,course_name,institution_name,issue_date,grade_score']
+    lines.extend(','.join(row) for row in rows)
+    return SimpleUploadedFile('manifest.csv', '\n'.join(lines).encode(), content_type='text/csv')
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, IOTA_ENABLED=False)
+class BulkUploadCertificatesTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.college = CustomUser.objects.create_user(
+            username='college', password='pass', user_type='college',
+            organization_name='Test University', contact_email='c@test.com'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.college)
+
+    def test_zip_archive_with_manifest_creates_rows_and_reports_errors(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('a.pdf', b'certificate a')
+            zf.writestr('b.pdf', b'certificate b')
+            zf.writestr('dup.pdf', b'certificate a')
+        archive.seek(0)
+
+        response = self.client.post('/api/certificates/bulk-upload/', {
+            'manifest': make_manifest([
+                ['a.pdf', 'Alice', 'BSc', 'Test University', '2024-06-01', 'A'],
+                ['b.pdf', 'Bob', 'BSc', 'Test University', 'not-a-date', 'B'],
+                ['dup.pdf', 'Carol', 'BSc', 'Test University', '', ''],
+                ['missing.pdf', 'Dan', 'BSc', 'Test University', '', ''],
+            ]),
+            'archive': SimpleUploadedFile('batch.zip', archive.read(), content_type='application/zip'),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        statuses = [row['status'] for row in response.data['rows']]
+        self.assertEqual(statuses, ['created', 'error', 'error', 'error'])
+        self.assertEqual(Certificate.objects.count(), 1)
+        certificate = Certificate.objects.get()
+        self.assertEqual(certificate.student_name, 'Alice')
+        self.assertFalse(certificate.iota_stored)
+        self.assertEqual(certificate.anchor_status, 'pending')
+        self.assertEqual(AnchorOutbox.objects.get().certificate, certificate)
+
+    def test_duplicate_file_names_are_reported_not_overwritten(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w') as zf:
+            zf.writestr('2023/a.pdf', b'certificate a 2023')
+            zf.writestr('2024/a.pdf', b'certificate a 2024')
+            zf.writestr('b.pdf', b'certificate b')
+        archive.seek(0)
+
+        response = self.client.post('/api/certificates/bulk-upload/', {
+            'manifest': make_manifest([
+                ['a.pdf', 'Alice', 'BSc', 'Test University', '', ''],
+                ['b.pdf', 'Bob', 'BSc', 'Test University', '', ''],
+            ]),
+            'archive': SimpleUploadedFile('batch.zip', archive.read(), content_type='application/zip'),
+            'files': [SimpleUploadedFile('b.pdf', b'certificate b again')],
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(response.data['rows'][0]['errors'], ['File a.pdf appears more than once in upload'])
+        self.assertEqual(response.data['rows'][1]['errors'], ['File b.pdf appears more than once in upload'])
+
+    @override_settings(BULK_UPLOAD_MAX_BYTES=16)
+    def test_archive_over_the_byte_limit_is_rejected(self):
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('a.pdf', b'x' * 64)
+        archive.seek(0)
+
+        response = self.client.post('/api/certificates/bulk-upload/', {
+            'manifest': make_manifest([['a.pdf', 'Alice', 'BSc', 'Test University', '', '']]),
+            'archive': SimpleUploadedFile('batch.zip', archive.read(), content_type='application/zip'),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Certificate.objects.count(), 0)
+
+    def test_all_or_nothing_rejects_batch(self):
+        response = self.client.post('/api/certificates/bulk-upload/', {
+            'manifest': make_manifest([
+                ['a.pdf', 'Alice', 'BSc', 'Test University', '', ''],
+                ['b.txt', 'Bob', 'BSc', 'Test University', '', ''],
+            ]),
+            'files': [
+                SimpleUploadedFile('a.pdf', b'certificate a'),
+                SimpleUploadedFile('b.txt', b'certificate b'),
+            ],
+            'all_or_nothing': 'true',
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Certificate.objects.count(), 0)
+
+    def test_companies_cannot_bulk_upload(self):
+        company = CustomUser.objects.create_user(
+            username='company', password='pass', user_type='company',
+            organization_name='Acme', contact_email='a@test.com'
+        )
+        self.client.force_authenticate(company)
+        response = self.client.post('/api/certificates/bulk-upload/', {}, format='multipart')
+        self.assertEqual(response.status_code, 403)
+
+
+class MerkleTreeTests(TestCase):
+    def test_every_leaf_proves_against_root(self):
+        for size in (1, 2, 3, 5, 8, 13):
+            leaves = [leaf_hash(f'payload-{i}') for i in range(size)]
+            levels = build_tree(leaves)
+            root = merkle_root(levels)
+            for i, leaf in enumerate(leaves):
+                self.assertTrue(verify_proof(leaf, inclusion_proof(levels, i), root))
+
+    def test_tampered_leaf_fails(self):
+        leaves = [leaf_hash(f'payload-{i}') for i in range(4)]
+        levels = build_tree(leaves)
+        proof = inclusion_proof(levels, 2)
+        self.assertFalse(verify_proof(leaf_hash('forged'), proof, merkle_root(levels)))
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class BatchAnchoringTests(TestCase):
+    def setUp(self):
+        self.college = CustomUser.objects.create_user(
+            username='college', password='pass', user_type='college',
+            organization_name='Test University', contact_email='c@test.com'
+        )
+        self.certificates = [
+            Certificate.objects.create(
+                uploaded_by=self.college,
+                file_path=SimpleUploadedFile(f'{i}.pdf', f'certificate {i}'.encode()),
+                file_type='pdf',
+                student_name=f'Student {i}',
+                course_name='BSc',
+                institution_name='Test University',
+            )
+            for i in range(5)
+        ]
+        enqueue_certificates(self.certificates)
+        self.client_stub = LocalTangleClient()
+        self.service = IOTAService(client=self.client_stub)
+
+    def anchor(self):
+        with patch('api.management.commands.anchor_certificates.get_iota_service', return_value=self.service):
+            call_command('anchor_certificates', '--batch-size', '3', '--concurrency', '1', '--flush',
+                         stdout=io.StringIO())
+
+    def test_batches_anchor_one_root_block_each(self):
+        self.anchor()
+        self.assertEqual(self.client_stub.post_count, 2)
+        self.assertEqual(AnchorBatch.objects.count(), 2)
+        self.assertFalse(Certificate.objects.filter(iota_stored=False).exists())
+        self.assertFalse(Certificate.objects.exclude(anchor_status='anchored').exists())
+        self.assertFalse(AnchorOutbox.objects.exclude(status='done').exists())
+
+    def test_already_anchored_certificates_are_not_posted_again(self):
+        self.anchor()
+        AnchorOutbox.objects.update(status='pending')
+        self.anchor()
+        self.assertEqual(self.client_stub.post_count, 2)
+        self.assertEqual(AnchorOutbox.objects.filter(status='done').count(), 5)
+
+    def test_failed_post_is_retried_with_backoff(self):
+        with patch.object(self.client_stub, 'build_and_post_block', side_effect=ConnectionError('node down')):
+            self.anchor()
+        self.assertFalse(Certificate.objects.filter(iota_stored=True).exists())
+        self.assertFalse(Certificate.objects.filter(iota_block_id__startswith='ALTCHAIN_').exists())
+        for entry in AnchorOutbox.objects.all():
+            self.assertEqual(entry.status, 'pending')
+            self.assertEqual(entry.attempts, 1)
+            self.assertGreater(entry.next_attempt_at, entry.updated_at)
+            self.assertIn('node down', entry.last_error)
+
+        # Not due yet: nothing is claimed
+        self.anchor()
+        self.assertEqual(self.client_stub.post_count, 0)
+
+        AnchorOutbox.objects.update(next_attempt_at=timezone.now())
+        self.anchor()
+        self.assertEqual(self.client_stub.post_count, 2)
+        self.assertEqual(Certificate.objects.filter(anchor_status='anchored').count(), 5)
+
+    def test_posted_root_is_reused_after_a_failed_certificate_update(self):
+        entries = claim_due_entries(5)
+        with patch('api.anchoring.Certificate.objects.bulk_update', side_effect=RuntimeError('db down')):
+            with self.assertRaises(RuntimeError):
+                anchor_entries(self.service, entries)
+        self.assertEqual(self.client_stub.post_count, 1)
+        self.assertTrue(AnchorBatch.objects.get().iota_block_id)
+
+        # The retry sees the rows as stored: the certificates were never updated
+        retry = list(AnchorOutbox.objects.select_related('certificate__uploaded_by').order_by('id'))
+        anchored, _ = anchor_entries(self.service, retry)
+        self.assertEqual(anchored, 5)
+        self.assertEqual(self.client_stub.post_count, 1)
+
+    def test_verification_checks_proof_and_fetches_root_once_per_batch(self):
+        self.anchor()
+        batch = AnchorBatch.objects.order_by('id').first()
+        for certificate in Certificate.objects.filter(anchor_batch=batch).select_related('anchor_batch', 'uploaded_by'):
+            result = self.service.verify_certificate_on_iota(certificate)
+            self.assertTrue(result['verified'], result)
+        self.assertEqual(self.client_stub.get_count, 1)
+
+    def test_unreachable_batch_root_is_not_memoized(self):
+        self.anchor()
+        certificate = Certificate.objects.select_related('anchor_batch', 'uploaded_by').first()
+        with patch.object(self.client_stub, 'get_block', side_effect=ConnectionError('node down')):
+            result = self.service.verify_certificate_on_iota(certificate)
+        self.assertFalse(result['verified'])
+        self.assertTrue(result['transient'])
+
+        # The node is back: the certificate verifies instead of replaying the outage
+        self.assertTrue(self.service.verify_certificate_on_iota(certificate)['verified'])
+
+    def test_modified_certificate_fails_verification(self):
+        self.anchor()
+        certificate = Certificate.objects.select_related('anchor_batch', 'uploaded_by').first()
+        certificate.student_name = 'Someone Else'
+        result = self.service.verify_certificate_on_iota(certificate)
+        self.assertFalse(result['verified'])
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class IOTABlockCacheTests(TestCase):
+    def setUp(self):
+        college = CustomUser.objects.create_user(
+            username='college', password='pass', user_type='college',
+            organization_name='Test University', contact_email='c@test.com'
+        )
+        self.certificate = Certificate.objects.create(
+            uploaded_by=college,
+            file_path=SimpleUploadedFile('single.pdf', b'single certificate'),
+            file_type='pdf',
+            student_name='Alice',
+            course_name='BSc',
+            institution_name='Test University',
+        )
+        self.client_stub = LocalTangleClient()
+        self.service = IOTAService(client=self.client_stub)
+        result = self.service.store_certificate_on_iota(self.certificate)
+        self.certificate.iota_block_id = result['block_id']
+        self.certificate.iota_stored = True
+        self.certificate.save()
+
+    def test_repeat_verification_is_memoized(self):
+        for _ in range(3):
+            self.assertTrue(self.service.verify_certificate_on_iota(self.certificate)['verified'])
+        self.assertEqual(self.client_stub.get_count, 1)
+
+    def test_block_survives_in_persistent_table(self):
+        self.service.verify_certificate_on_iota(self.certificate)
+        block_cache.clear()
+        verification_cache.clear()
+        self.assertTrue(IOTABlock.objects.filter(block_id=self.certificate.iota_block_id).exists())
+        self.assertTrue(self.service.verify_certificate_on_iota(self.certificate)['verified'])
+        self.assertEqual(self.client_stub.get_count, 1)
+
+    def test_updated_certificate_is_verified_again(self):
+        self.service.verify_certificate_on_iota(self.certificate)
+        self.certificate.student_name = 'Mallory'
+        self.certificate.save()
+        result = self.service.verify_certificate_on_iota(self.certificate)
+        self.assertFalse(result['verified'])
+        self.assertEqual(self.client_stub.get_count, 1)
+
+
+def make_verification_manifest(rows):
+    lines = ['file_name,candidate_name,expected_course,expected_institution']
+    lines.extend(','.join(row) for row in rows)
+    return SimpleUploadedFile('manifest.csv', '\n'.join(lines).encode(), content_type='text/csv')
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, IOTA_VERIFY_WORKERS=1)
+class BatchVerificationTests(TestCase):
+    def setUp(self):
+        self.college = CustomUser.objects.create_user(
+            username='college', password='pass', user_type='college',
+            organization_name='Test University', contact_email='c@test.com'
+        )
+        self.company = CustomUser.objects.create_user(
+            username='company', password='pass', user_type='company',
+            organization_name='Acme', contact_email='a@test.com'
+        )
+        for name, content in (('Alice', b'alice certificate'), ('Bob', b'bob certificate')):
+            Certificate.objects.create(
+                uploaded_by=self.college,
+                file_path=SimpleUploadedFile(f'{name}.pdf', content),
+                file_type='pdf',
+                student_name=name,
+                course_name='BSc',
+                institution_name='Test University',
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.company)
+
+    def post_batch(self, **extra):
+        return self.client.post('/api/verification/verify-batch/', {
+            'manifest': make_verification_manifest([
+                ['alice.pdf', 'Alice', 'BSc', 'Test University'],
+                ['bob.pdf', 'Robert', 'BSc', ''],
+                ['unknown.pdf', 'Eve', '', ''],
+                ['missing.pdf', 'Dan', '', ''],
+            ]),
+            'files': [
+                SimpleUploadedFile('alice.pdf', b'alice certificate'),
+                SimpleUploadedFile('bob.pdf', b'bob certificate'),
+                SimpleUploadedFile('unknown.pdf', b'forged certificate'),
+            ],
+            **extra,
+        }, format='multipart')
+
+    def test_batch_resolves_every_candidate(self):
+        response = self.post_batch()
+        self.assertEqual(response.status_code, 200)
+        statuses = [row['status'] for row in response.data['results']]
+        self.assertEqual(statuses, ['verified', 'verified', 'failed', 'error'])
+        self.assertTrue(response.data['results'][0]['metadata_match']['name_match'])
+        self.assertFalse(response.data['results'][1]['metadata_match']['name_match'])
+        self.assertEqual(response.data['summary'], {'total': 4, 'verified': 2, 'failed': 1, 'errors': 1})
+        self.assertEqual(VerificationAttempt.objects.filter(company=self.company).count(), 3)
+        self.assertEqual(FailedVerificationLog.objects.count(), 1)
+
+    def test_streamed_results_are_ndjson(self):
+        response = self.post_batch(stream='true')
+        self.assertEqual(response.status_code, 200)
+        lines = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(sorted(line['row'] for line in lines[:-1]), [1, 2, 3, 4])
+        self.assertEqual(lines[-1]['summary']['verified'], 2)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class FailedVerificationBroadcastTests(TestCase):
+    def setUp(self):
+        self.colleges = [
+            CustomUser.objects.create_user(
+                username=f'college{i}', password='pass', user_type='college',
+                organization_name=f'University {i}', contact_email=f'c{i}@test.com'
+            )
+            for i in range(3)
+        ]
+        company = CustomUser.objects.create_user(
+            username='company', password='pass', user_type='company',
+            organization_name='Acme', contact_email='a@test.com'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(company)
+
+    def verify_unknown(self, content):
+        return self.client.post('/api/verification/verify/', {
+            'file': SimpleUploadedFile('unknown.pdf', content),
+            'candidate_name': 'Eve',
+        }, format='multipart')
+
+    def test_failure_writes_one_event_visible_to_every_college(self):
+        self.assertEqual(self.verify_unknown(b'forged').data['status'], 'failed')
+        self.assertEqual(FailedVerificationLog.objects.count(), 1)
+
+        for college in self.colleges:
+            self.client.force_authenticate(college)
+            response = self.client.get('/api/verification/failed-attempts/')
+            self.assertEqual(response.data['count'], 1)
+
+    def test_unread_count_follows_read_cursor(self):
+        self.verify_unknown(b'forged one')
+        self.verify_unknown(b'forged two')
+
+        self.client.force_authenticate(self.colleges[0])
+        self.assertEqual(self.client.get('/api/verification/failed-attempts/').data['unread_count'], 2)
+        self.assertEqual(self.client.get('/api/verification/failed-attempts/').data['unread_count'], 0)
+
+        self.client.force_authenticate(self.colleges[1])
+        self.assertEqual(self.client.get('/api/verification/failed-attempts/').data['unread_count'], 2)
+
+    def test_page_and_limit_are_validated(self):
+        for i in range(3):
+            self.verify_unknown(f'forged {i}'.encode())
+
+        self.client.force_authenticate(self.colleges[0])
+        for query in ('page=abc', 'limit=ten', 'page=0', 'limit=-5'):
+            response = self.client.get(f'/api/verification/failed-attempts/?{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+        response = self.client.get('/api/verification/failed-attempts/?limit=100000')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['failed_attempts']), 3)
+        self.assertEqual(response.data['pagination']['total_pages'], 1)
+
+
+def make_image(fmt, quality=95, size=(240, 160)):
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGB', size, 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([10, 10, size[0] - 10, 50], fill='navy')
+    draw.ellipse([40, 70, 120, 150], fill='darkred')
+    draw.line([140, 70, size[0] - 20, 150], fill='black', width=6)
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **({'quality': quality} if fmt == 'JPEG' else {}))
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class NearDuplicateSearchTests(TestCase):
+    def setUp(self):
+        self.college = CustomUser.objects.create_user(
+            username='college', password='pass', user_type='college',
+            organization_name='Test University', contact_email='c@test.com'
+        )
+        self.client = APIClient()
+
+    def test_band_index_finds_hashes_within_distance(self):
+        base = 0x0F0F_3C3C_A5A5_FF00
+        # 2 bits flipped in each of two bands (distance 4) and one far away hash
+        near = base ^ 0x0003_0000_0000_0003
+        far = base ^ 0xFFFF_FFFF_0000_0000
+        for i, value in enumerate((near, far)):
+            Certificate.objects.create(
+                uploaded_by=self.college,
+                file_path=SimpleUploadedFile(f'{i}.png', f'certificate {i}'.encode()),
+                file_type='png',
+                student_name=f'Student {i}',
+                **phash.hash_fields(value),
+            )
+        matches = phash.find_near_duplicates(Certificate.objects.all(), base, max_distance=8)
+        self.assertEqual([(c.student_name, d) for c, d in matches], [('Student 0', 4)])
+
+    def test_recompressed_copy_is_reported_as_near_duplicate(self):
+        self.client.force_authenticate(self.college)
+        self.client.post('/api/certificates/upload/', {
+            'file': SimpleUploadedFile('original.png', make_image('PNG')),
+            'student_name': 'Alice',
+            'course_name': 'BSc',
+            'institution_name': 'Test University',
+        }, format='multipart')
+        self.assertTrue(Certificate.objects.get().perceptual_hash)
+
+        company = CustomUser.objects.create_user(
+            username='company', password='pass', user_type='company',
+            organization_name='Acme', contact_email='a@test.com'
+        )
+        self.client.force_authenticate(company)
+        response = self.client.post('/api/verification/verify/', {
+            'file': SimpleUploadedFile('scan.jpg', make_image('JPEG', quality=40)),
+            'candidate_name': 'Alice',
+        }, format='multipart')
+
+        self.assertEqual(response.data['status'], 'failed')
+        self.assertEqual(len(response.data['near_duplicates']), 1)
+        self.assertEqual(response.data['near_duplicates'][0]['student_name'], 'Alice')
+        self.assertLessEqual(response.data['near_duplicates'][0]['distance'], 10)
+
+
+class MatchScoreTests(TestCase):
+    def test_tolerates_typos_initials_and_order(self):
+        self.assertGreaterEqual(search.match_score('Arjun Kumar', 'Arjun Kumar'), 0.99)
+        self.assertGreaterEqual(search.match_score('A. Kumar', 'Arjun Kumar'), 0.8)
+        self.assertGreaterEqual(search.match_score('Kumar Arjun', 'Arjun Kumar'), 0.8)
+        self.assertGreaterEqual(search.match_score('Arjun Kumr', 'Arjun Kumar'), 0.8)
+        self.assertGreaterEqual(search.match_score('BSc', 'BSc Computer Science'), 0.99)
+        self.assertLess(search.match_score('Priya Sharma', 'Arjun Kumar'), 0.8)
+        self.assertEqual(search.match_score('', 'Arjun Kumar'), 1.0)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class CertificateSearchTests(TestCase):
+    def setUp(self):
+        self.college = CustomUser.objects.create_user(
+            username='college', password='pass', user_type='college',
+            organization_name='Test University', contact_email='c@test.com'
+        )
+        for i, (name, course) in enumerate([
+            ('Arjun Kumar', 'BSc Physics'),
+            ('Priya Sharma', 'BSc Kumaraswamy Studies'),
+            ('Rahul Verma', 'MBA'),
+        ]):
+            Certificate.objects.create(
+                uploaded_by=self.college,
+                file_path=SimpleUploadedFile(f'{i}.pdf', f'certificate {i}'.encode()),
+                file_type='pdf',
+                student_name=name,
+                course_name=course,
+                institution_name='Test University',
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.college)
+
+    def search(self, text):
+        response = self.client.get('/api/certificates/', {'search': text})
+        return [c['student_name'] for c in response.data['certificates']]
+
+    def test_search_ranks_name_and_course_hits(self):
+        self.assertEqual(self.search('kumar')[0], 'Arjun Kumar')
+        self.assertEqual(set(self.search('kumar')), {'Arjun Kumar', 'Priya Sharma'})
+        self.assertEqual(self.search('MBA'), ['Rahul Verma'])
+
+    def test_search_pages_through_every_match_with_exact_count(self):
+        for i in range(3):
+            Certificate.objects.create(
+                uploaded_by=self.college, file_path=SimpleUploadedFile(f'k{i}.pdf', f'kumar {i}'.encode()), file_type='pdf',
+                student_name=f'Kumar {i}', course_name='BA', institution_name='Test University',
+            )
+        names, cursor = [], None
+        while True:
+            params = {'search': 'kumar', 'limit': 2, 'count': 'exact', **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/api/certificates/', params)
+            pagination = response.data['pagination']
+            names += [c['student_name'] for c in response.data['certificates']]
+            self.assertEqual(pagination['total_items'], 5)
+            cursor = pagination['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(names), 5)
+        self.assertEqual(len(set(names)), 5)
+
+    def test_index_follows_updates_and_deletes(self):
+        certificate = Certificate.objects.get(student_name='Rahul Verma')
+        certificate.student_name = 'Rahul Varma'
+        certificate.save()
+        self.assertEqual(self.search('varma'), ['Rahul Varma'])
+        certificate.delete()
+        self.assertEqual(self.search('varma'), [])
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT, IOTA_VERIFY_WORKERS=1)
+class DashboardCounterTests(TestCase):
+    def setUp(self):
+        caches['dashboard'].clear()
+        self.college = CustomUser.objects.create_user(
+            username='college', password='pass', user_type='college',
+            organization_name='Test University', contact_email='c@test.com'
+        )
+        self.company = CustomUser.objects.create_user(
+            username='company', password='pass', user_type='company',
+            organization_name='Acme', contact_email='a@test.com'
+        )
+        self.client = APIClient()
+
+    def stats(self, user):
+        self.client.force_authenticate(user)
+        return self.client.get('/api/dashboard/stats/').data
+
+    def upload(self, name, content):
+        self.client.force_authenticate(self.college)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/certificates/upload/', {
+                'file': SimpleUploadedFile(name, content),
+                'student_name': 'Alice',
+                'course_name': 'BSc',
+                'institution_name': 'Test University',
+            }, format='multipart')
+
+    def test_counters_follow_uploads_verifications_and_deletes(self):
+        self.upload('a.pdf', b'certificate a')
+        self.upload('b.pdf', b'certificate b')
+
+        self.client.force_authenticate(self.company)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/verification/verify/', {
+                'file': SimpleUploadedFile('a.pdf', b'certificate a'), 'candidate_name': 'Alice',
+            }, format='multipart')
+            self.client.post('/api/verification/verify-batch/', {
+                'manifest': make_verification_manifest([['x.pdf', 'Eve', '', '']]),
+                'files': [SimpleUploadedFile('x.pdf', b'forged')],
+            }, format='multipart')
+
+        college_stats = self.stats(self.college)
+        self.assertEqual(college_stats['stats'], {'total_certificates': 2, 'failed_verification_attempts': 1})
+        self.assertEqual(len(college_stats['recent_certificates']), 2)
+        company_stats = self.stats(self.company)['stats']
+        self.assertEqual(company_stats['total_verifications'], 2)
+        self.assertEqual(company_stats['successful_verifications'], 1)
+        self.assertEqual(company_stats['failed_verifications'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Certificate.objects.filter(file_name='b.pdf').get().delete()
+        college_stats = self.stats(self.college)
+        self.assertEqual(college_stats['stats']['total_certificates'], 1)
+        self.assertEqual(len(college_stats['recent_certificates']), 1)
+
+    def test_polling_reads_no_large_tables(self):
+        self.upload('a.pdf', b'certificate a')
+        self.stats(self.college)
+        self.client.force_authenticate(self.college)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/dashboard/stats/')
+        tables = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('"api_certificate"', tables)
+        self.assertNotIn('"api_failedverificationlog"', tables)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        self.college = CustomUser.objects.create_user(
+            username='college', password='pass', user_type='college',
+            organization_name='Test University', contact_email='c@test.com'
+        )
+        for i in range(7):
+            Certificate.objects.create(
+                uploaded_by=self.college,
+                file_path=SimpleUploadedFile(f'{i}.pdf', f'certificate {i}'.encode()),
+                file_type='pdf',
+                student_name=f'Student {i}',
+                course_name='BSc',
+                institution_name='Test University',
+                ocr_output='x' * 10000,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.college)
+
+    def test_cursor_walks_every_row_once_newest_first(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'limit': 3, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/api/certificates/', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('total_items', response.data['pagination'])
+            seen.extend(c['id'] for c in response.data['certificates'])
+            cursor = response.data['pagination']['next_cursor']
+            if not cursor:
+                break
+        expected = list(Certificate.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_slim_rows_fields_projection_and_counts(self):
+        response = self.client.get('/api/certificates/', {'fields': 'id,student_name', 'count': 'exact'})
+        self.assertEqual(set(response.data['certificates'][0]), {'id', 'student_name'})
+        self.assertEqual(response.data['pagination']['total_items'], 7)
+
+        response = self.client.get('/api/certificates/', {'count': 'estimate'})
+        self.assertNotIn('ocr_output', response.data['certificates'][0])
+        self.assertTrue(response.data['pagination']['count_is_estimate'])
+        self.assertEqual(response.data['pagination']['total_items'], 7)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/certificates/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class JSONRenderingTests(TestCase):
+    def test_renderer_matches_drf_output(self):
+        from decimal import Decimal
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import ORJSONRenderer
+
+        data = {'name': 'Priyā', 'score': Decimal('9.5'), 'when': timezone.now().date(), 'rows': [{'id': 1}]}
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+    def test_listing_is_gzipped_when_accepted(self):
+        import gzip
+
+        college = CustomUser.objects.create_user(
+            username='college', password='pass', user_type='college',
+            organization_name='Test University', contact_email='c@test.com'
+        )
+        for i in range(10):
+            Certificate.objects.create(
+                uploaded_by=college, file_path=SimpleUploadedFile(f'{i}.pdf', f'certificate {i}'.encode()), file_type='pdf',
+                student_name=f'Student {i}', course_name='BSc', institution_name='Test University',
+            )
+        client = APIClient()
+        client.force_authenticate(college)
+
+        response = client.get('/api/certificates/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['certificates']), 10)
+
+        response = client.get('/api/certificates/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class CertificateExportTests(TestCase):
+    def setUp(self):
+        self.college = CustomUser.objects.create_user(
+            username='college', password='pass', user_type='college',
+            organization_name='Test University', contact_email='c@test.com'
+        )
+        for i in range(5):
+            Certificate.objects.create(
+                uploaded_by=self.college,
+                file_path=SimpleUploadedFile(f'{i}.pdf', f'certificate {i}'.encode()),
+                file_type='pdf',
+                student_name=f'Student {i}',
+                course_name='BSc',
+                institution_name='Test University',
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.college)
+
+    def test_csv_export_streams_every_row(self):
+        import csv
+
+        response = self.client.get('/api/certificates/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['student_name'] for row in rows], [f'Student {i}' for i in range(5)])
+
+    def test_jsonl_export_resumes_after_id(self):
+        ids = list(Certificate.objects.order_by('id').values_list('id', flat=True))
+        response = self.client.get('/api/certificates/export/', {'output': 'jsonl', 'after': ids[2]})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], ids[3:])
+
+        response = self.client.get('/api/certificates/export/', {'output': 'xml'})
+        self.assertEqual(response.status_code, 400)
@@ -16,13 +16,16 @@ urlpatterns = [
     # Certificate endpoints
     path('certificates/check-hash/', views.check_file_hash, name='check_file_hash'),
     path('certificates/upload/', views.upload_certificate, name='upload_certificate'),
+    path('certificates/bulk-upload/', views.bulk_upload_certificates, name='bulk_upload_certificates'),
     path('certificates/', views.list_certificates, name='list_certificates'),
+    path('certificates/export/', views.export_certificates, name='export_certificates'),
     path('certificates/<int:certificate_id>/', views.certificate_detail, name='certificate_detail'),
     path('certificates/<int:certificate_id>/delete/', views.delete_certificate, name='delete_certificate'),
     path('certificates/<int:certificate_id>/verify-iota/', views.verify_certificate_iota, name='verify_certificate_iota'),
     
     # Verification endpoints
     path('verification/verify/', views.verify_certificate, name='verify_certificate'),
+    path('verification/verify-batch/', views.verify_certificates_batch, name='verify_certificates_batch'),
     path('verification/attempts/', views.list_verification_attempts, name='list_verification_attempts'),
     path('verification/failed-attempts/', views.failed_verification_attempts, name='failed_verification_attempts'),
     
@@ -6,20 +6,34 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 import hashlib
+import json
 import os
 from datetime import datetime
 from django.core.files.storage import default_storage
 from django.conf import settings
 from django.core.paginator import Paginator
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
 
-from .models import CustomUser, Certificate, VerificationAttempt, FailedVerificationLog
+from .models import Certificate, VerificationAttempt, FailedVerificationLog, FailedVerificationCursor
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, CertificateSerializer,
     CertificateUploadSerializer, VerificationAttemptSerializer,
+    CertificateListSerializer, VerificationAttemptListSerializer,
     FailedVerificationLogSerializer, FileHashCheckSerializer,
     FileHashResponseSerializer
 )
-from .iota_service import IOTAService
+from .iota_service import get_iota_service, verify_certificates_parallel
+from .anchoring import enqueue_certificates
+from . import dashboard, phash, search
+from .pagination import DEFAULT_LIMIT, MAX_LIMIT, InvalidCursor, add_count, cursor_page, ranked_page
+from .exports import CERTIFICATE_EXPORT_COLUMNS, InvalidExport, export_format, export_range, stream_export
+from .bulk import (
+    BulkUploadError, CERTIFICATE_MANIFEST_COLUMNS, VERIFICATION_MANIFEST_COLUMNS, parse_manifest,
+    collect_upload_files, close_upload_files, hash_files_parallel, save_files_parallel,
+    delete_stored_files, existing_hashes, validate_certificate_row
+)
 
 
 @extend_schema(
@@ -63,9 +77,11 @@ def api_info(request):
             'certificates': {
                 'check_hash': '/api/certificates/check-hash/',
                 'upload': '/api/certificates/upload/',
+                'bulk_upload': '/api/certificates/bulk-upload/',
             },
             'verification': {
                 'verify': '/api/verification/verify/',
+                'verify_batch': '/api/verification/verify-batch/',
                 'failed_attempts': '/api/verification/failed-attempts/',
             }
         }
@@ -189,6 +205,54 @@ def calculate_file_hash(file):
     return hasher.hexdigest()
 
 
+def file_type_of(file_name):
+    return os.path.splitext(file_name)[1].lower()[1:]
+
+
+def near_duplicate_report(perceptual_hash):
+    """Visually similar certificates on file for an unmatched upload, closest first"""
+    if perceptual_hash is None:
+        return []
+    matches = phash.find_near_duplicates(Certificate.objects.select_related('uploaded_by'), perceptual_hash)
+    return [
+        {
+            'certificate_id': certificate.id,
+            'student_name': certificate.student_name,
+            'course_name': certificate.course_name,
+            'institution_name': certificate.institution_name,
+            'organization': certificate.uploaded_by.organization_name,
+            'distance': distance,
+        }
+        for certificate, distance in matches
+    ]
+
+
+def match_certificate_metadata(verification_attempt, certificate):
+    """
+    Mark a verification attempt as verified against certificate and record metadata matches
+    Returns: dict of the tolerant match scores (0-1) behind each match flag
+    """
+    verification_attempt.certificate = certificate
+    verification_attempt.status = 'verified'
+    
+    threshold = getattr(settings, 'SEARCH_MATCH_THRESHOLD', 0.8)
+    scores = {
+        'name_score': search.match_score(verification_attempt.candidate_name, certificate.student_name),
+        'course_score': search.match_score(verification_attempt.expected_course, certificate.course_name),
+        'institution_score': search.match_score(verification_attempt.expected_institution,
+                                                certificate.institution_name),
+    }
+    verification_attempt.name_match = scores['name_score'] >= threshold
+    verification_attempt.course_match = scores['course_score'] >= threshold
+    verification_attempt.institution_match = scores['institution_score'] >= threshold
+    
+    if verification_attempt.name_match and verification_attempt.course_match and verification_attempt.institution_match:
+        verification_attempt.verification_notes = 'All metadata matches. Certificate verified.'
+    else:
+        verification_attempt.verification_notes = 'Certificate found but metadata partially matches.'
+    return scores
+
+
 @extend_schema(
     operation_id='upload_certificate',
     summary='Upload Certificate',
@@ -306,36 +370,13 @@ def upload_certificate(request):
         issue_date=issue_date,
         grade_score=request.data.get('grade_score', ''),
     )
-    certificate.save()
-    
-    # Store certificate on IOTA (individual, non-bulk)
-    iota_status = "unknown"
-    try:
-        iota_service = IOTAService()
-        iota_result = iota_service.store_certificate_on_iota(certificate)
-        if iota_result and iota_result.get('success'):
-            certificate.iota_block_id = iota_result.get('block_id')
-            certificate.iota_message_id = iota_result.get('message_id')
-            certificate.iota_stored = True
-            certificate.iota_timestamp = iota_result.get('timestamp')
-            certificate.save()
-            # Check if this is alternative data
-            if iota_result.get('alt_data', False):
-                iota_status = "alt_stored"
-            else:
-                iota_status = "stored"
-        else:
-            # Log error but don't fail the upload
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Failed to store certificate {certificate.id} on IOTA: {iota_result}")
-            iota_status = "failed"
-    except Exception as e:
-        # Log error but don't fail the upload
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Exception storing certificate {certificate.id} on IOTA: {e}")
-        iota_status = "error"
+    phash.apply_hash(certificate, phash.compute_dhash(file, file_ext[1:]))
+    # The outbox row commits with the certificate; `anchor_certificates` anchors it
+    # on IOTA in the next Merkle batch, so the upload never waits on the network
+    with transaction.atomic():
+        certificate.save()
+        enqueue_certificates([certificate])
+    iota_status = "queued"
     
     serializer = CertificateSerializer(certificate)
     response_data = {
@@ -345,16 +386,181 @@ def upload_certificate(request):
     }
     
     # Add helpful message about IOTA status
-    if iota_status == "alt_stored":
-        response_data['iota_note'] = "Certificate secured via alternative distributed ledger protocol"
-    elif iota_status == "stored":
-        response_data['iota_note'] = "Certificate successfully stored on IOTA blockchain"
-    elif iota_status in ["failed", "error"]:
-        response_data['iota_note'] = "Certificate saved locally, blockchain storage encountered network issues"
+    if iota_status == "queued":
+        response_data['iota_note'] = "Certificate queued for batch anchoring on IOTA blockchain"
     
     return Response(response_data, status=status.HTTP_201_CREATED)
 
 
+@extend_schema(
+    operation_id='bulk_upload_certificates',
+    summary='Bulk Upload Certificates',
+    description='Upload a batch of certificates (zip archive and/or multiple files) with a CSV manifest - Only for colleges',
+    request={
+        'multipart/form-data': {
+            'type': 'object',
+            'properties': {
+                'manifest': {
+                    'type': 'string',
+                    'format': 'binary',
+                    'description': 'CSV with columns file_name, student_name, course_name, institution_name, issue_date, grade_score'
+                },
+                'archive': {
+                    'type': 'string',
+                    'format': 'binary',
+                    'description': 'Zip archive of certificate files'
+                },
+                'files': {
+                    'type': 'array',
+                    'items': {'type': 'string', 'format': 'binary'},
+                    'description': 'Certificate files (PDF/Image)'
+                },
+                'all_or_nothing': {
+                    'type': 'boolean',
+                    'description': 'Reject the whole batch if any row is invalid'
+                }
+            },
+            'required': ['manifest']
+        }
+    },
+    responses={
+        201: {'description': 'Per-row ingest report'},
+        400: {'description': 'Bad request'},
+        403: {'description': 'Only colleges can upload certificates'}
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser])
+def bulk_upload_certificates(request):
+    """
+    Upload a batch of certificates with a CSV manifest - Only for colleges
+
+    Files are hashed in a thread pool, every row is validated up front and the
+    valid rows are inserted with a single bulk_create in one transaction.
+    Blockchain anchoring is left to the `anchor_certificates` batch command.
+    """
+    if request.user.user_type != 'college':
+        return Response({'error': 'Only colleges can upload certificates'},
+                       status=status.HTTP_403_FORBIDDEN)
+
+    manifest = request.FILES.get('manifest')
+    if not manifest:
+        return Response({'error': 'No manifest provided'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        rows = parse_manifest(manifest, CERTIFICATE_MANIFEST_COLUMNS)
+        files, duplicates = collect_upload_files(request)
+    except BulkUploadError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        return _ingest_certificate_rows(request, rows, files, duplicates)
+    finally:
+        close_upload_files(files)
+
+
+def _ingest_certificate_rows(request, rows, files, duplicates):
+    """Validate, store and insert the manifest rows of a bulk certificate upload"""
+    if not rows:
+        return Response({'error': 'Manifest has no rows'}, status=status.HTTP_400_BAD_REQUEST)
+
+    all_or_nothing = str(request.data.get('all_or_nothing', '')).lower() in ('1', 'true', 'yes')
+
+    # Only hash files that the manifest actually references
+    referenced = {row.get('file_name') for row in rows}
+    hashes = hash_files_parallel({name: f for name, f in files.items() if name in referenced})
+    already_stored = existing_hashes(Certificate, hashes.values())
+
+    report = []
+    valid = []
+    seen_hashes = {}
+    for index, row in enumerate(rows, start=1):
+        cleaned, errors = validate_certificate_row(row, files, hashes, duplicates)
+        file_hash = cleaned.get('file_hash')
+        if file_hash:
+            if file_hash in already_stored:
+                errors.append('Certificate with this file already exists')
+            elif file_hash in seen_hashes:
+                errors.append(f'Duplicate of row {seen_hashes[file_hash]} in this batch')
+            else:
+                seen_hashes[file_hash] = index
+
+        entry = {
+            'row': index,
+            'file_name': cleaned['file_name'],
+            'file_hash': file_hash,
+            'status': 'error' if errors else 'valid',
+            'errors': errors,
+        }
+        report.append(entry)
+        if not errors:
+            valid.append((entry, cleaned))
+
+    invalid_count = len(report) - len(valid)
+    if all_or_nothing and invalid_count:
+        for entry in report:
+            if entry['status'] == 'valid':
+                entry['status'] = 'skipped'
+        return Response({
+            'message': f'Batch rejected: {invalid_count} invalid row(s)',
+            'created': 0,
+            'failed': invalid_count,
+            'rows': report,
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    perceptual_hashes = phash.compute_dhashes_parallel([
+        (files[cleaned['file_name']], cleaned['file_type']) for _, cleaned in valid
+    ])
+    stored_names = save_files_parallel([
+        (f"certificates/{cleaned['file_name']}", files[cleaned['file_name']])
+        for _, cleaned in valid
+    ])
+
+    certificates = [
+        Certificate(
+            uploaded_by=request.user,
+            file_path=stored_name,
+            file_name=cleaned['file_name'],
+            file_hash=cleaned['file_hash'],
+            file_type=cleaned['file_type'],
+            student_name=cleaned['student_name'],
+            course_name=cleaned['course_name'],
+            institution_name=cleaned['institution_name'],
+            issue_date=cleaned['issue_date'],
+            grade_score=cleaned['grade_score'],
+            **phash.hash_fields(perceptual_hash),
+        )
+        for stored_name, perceptual_hash, (_, cleaned) in zip(stored_names, perceptual_hashes, valid)
+    ]
+
+    try:
+        with transaction.atomic():
+            Certificate.objects.bulk_create(certificates, batch_size=500)
+            enqueue_certificates(certificates)
+            # bulk_create sends no post_save, so index and count explicitly
+            search.index_certificates(certificates)
+            dashboard.increment(request.user.id, dashboard.CERTIFICATES, len(certificates))
+            dashboard.invalidate_recent([request.user.id])
+    except IntegrityError:
+        # A concurrent upload claimed one of the hashes after validation
+        delete_stored_files(stored_names)
+        return Response({'error': 'Batch conflicts with concurrently uploaded certificates, please retry'},
+                       status=status.HTTP_409_CONFLICT)
+
+    for certificate, (entry, _) in zip(certificates, valid):
+        entry['status'] = 'created'
+        entry['certificate_id'] = certificate.id
+
+    return Response({
+        'message': f'Uploaded {len(certificates)} certificate(s)',
+        'created': len(certificates),
+        'failed': invalid_count,
+        'iota_status': 'queued' if certificates else None,
+        'rows': report,
+    }, status=status.HTTP_201_CREATED)
+
+
 # Verification Views
 @extend_schema(
     operation_id='verify_certificate',
@@ -449,30 +655,13 @@ def verify_certificate(request):
     # Check if certificate exists in database
     try:
         certificate = Certificate.objects.get(file_hash=file_hash)
-        verification_attempt.certificate = certificate
-        verification_attempt.status = 'verified'
-        
-        # Check metadata matches
-        candidate_name = request.data.get('candidate_name', '').lower()
-        expected_course = request.data.get('expected_course', '').lower()
-        expected_institution = request.data.get('expected_institution', '').lower()
-        
-        verification_attempt.name_match = candidate_name in certificate.student_name.lower()
-        verification_attempt.course_match = expected_course in certificate.course_name.lower()
-        verification_attempt.institution_match = expected_institution in certificate.institution_name.lower()
-        
-        if verification_attempt.name_match and verification_attempt.course_match and verification_attempt.institution_match:
-            verification_attempt.verification_notes = 'All metadata matches. Certificate verified.'
-        else:
-            verification_attempt.verification_notes = 'Certificate found but metadata partially matches.'
-        
+        match_scores = match_certificate_metadata(verification_attempt, certificate)
         verification_attempt.save()
         
         # Verify certificate against IOTA if stored
         iota_verification = None
         if certificate.iota_stored and certificate.iota_block_id:
-            iota_service = IOTAService()
-            iota_verification = iota_service.verify_certificate_on_iota(certificate)
+            iota_verification = get_iota_service().verify_certificate_on_iota(certificate)
         
         return Response({
             'verification_id': verification_attempt.id,
@@ -483,57 +672,297 @@ def verify_certificate(request):
                 'name_match': verification_attempt.name_match,
                 'course_match': verification_attempt.course_match,
                 'institution_match': verification_attempt.institution_match,
+                **match_scores,
             },
             'iota_verification': iota_verification,
             'ocr_implemented': False
         }, status=status.HTTP_200_OK)
         
     except Certificate.DoesNotExist:
+        near_duplicates = near_duplicate_report(phash.compute_dhash(file, file_type_of(file.name)))
         verification_attempt.status = 'failed'
         verification_attempt.verification_notes = 'Certificate not found in database. OCR processing needed.'
+        if near_duplicates:
+            verification_attempt.verification_notes += f' {len(near_duplicates)} visually similar certificate(s) on file.'
         verification_attempt.save()
         
-        # Create failed verification log for all colleges
-        colleges = CustomUser.objects.filter(user_type='college')
-        for college in colleges:
-            FailedVerificationLog.objects.create(
-                college=college,
-                verification_attempt=verification_attempt,
-                reason=f'Unknown certificate verification attempt for {verification_attempt.candidate_name}'
-            )
+        # One broadcast event; colleges see it through FailedVerificationLog.visible_to
+        FailedVerificationLog.objects.create(
+            verification_attempt=verification_attempt,
+            reason=f'Unknown certificate verification attempt for {verification_attempt.candidate_name}'
+        )
         
         return Response({
             'verification_id': verification_attempt.id,
             'status': 'failed',
             'message': 'Certificate not found in database. OCR processing would be needed.',
+            'near_duplicates': near_duplicates,
             'ocr_implemented': False,
             'next_steps': 'File would be sent to OCR API for processing'
         }, status=status.HTTP_200_OK)
 
 
+@extend_schema(
+    operation_id='verify_certificates_batch',
+    summary='Batch Verify Certificates',
+    description='Verify a cohort of candidate certificates (zip archive and/or multiple files) with a CSV manifest - Only for companies',
+    request={
+        'multipart/form-data': {
+            'type': 'object',
+            'properties': {
+                'manifest': {
+                    'type': 'string',
+                    'format': 'binary',
+                    'description': 'CSV with columns file_name, candidate_name, candidate_email, expected_course, expected_institution'
+                },
+                'archive': {
+                    'type': 'string',
+                    'format': 'binary',
+                    'description': 'Zip archive of certificate files'
+                },
+                'files': {
+                    'type': 'array',
+                    'items': {'type': 'string', 'format': 'binary'},
+                    'description': 'Certificate files (PDF/Image)'
+                },
+                'stream': {
+                    'type': 'boolean',
+                    'description': 'Stream results as NDJSON, one line per candidate as it completes'
+                }
+            },
+            'required': ['manifest']
+        }
+    },
+    responses={
+        200: {'description': 'Per-candidate verification results'},
+        400: {'description': 'Bad request'},
+        403: {'description': 'Only companies can verify certificates'}
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser, FormParser])
+def verify_certificates_batch(request):
+    """
+    Verify a cohort of candidates' certificates in one request - Only for companies
+
+    Files are hashed in a thread pool and resolved with a single file_hash__in
+    query, attempts are inserted with bulk_create and IOTA checks run in a
+    bounded pool (once per distinct certificate).
+    """
+    if request.user.user_type != 'company':
+        return Response({'error': 'Only companies can verify certificates'},
+                       status=status.HTTP_403_FORBIDDEN)
+
+    manifest = request.FILES.get('manifest')
+    if not manifest:
+        return Response({'error': 'No manifest provided'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        rows = parse_manifest(manifest, VERIFICATION_MANIFEST_COLUMNS)
+        files, duplicates = collect_upload_files(request)
+    except BulkUploadError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        return _verify_candidate_rows(request, rows, files, duplicates)
+    finally:
+        close_upload_files(files)
+
+
+def _verify_candidate_rows(request, rows, files, duplicates):
+    """Hash, resolve and record the manifest rows of a cohort verification"""
+    if not rows:
+        return Response({'error': 'Manifest has no rows'}, status=status.HTTP_400_BAD_REQUEST)
+
+    referenced = {row.get('file_name') for row in rows}
+    hashes = hash_files_parallel({name: f for name, f in files.items() if name in referenced})
+    certificates = {
+        certificate.file_hash: certificate
+        for certificate in Certificate.objects.filter(file_hash__in=set(hashes.values()))
+        .select_related('uploaded_by', 'anchor_batch')
+    }
+
+    results = []
+    attempts = []
+    for index, row in enumerate(rows, start=1):
+        file_name = row.get('file_name', '')
+        entry = {'row': index, 'file_name': file_name, 'candidate_name': row.get('candidate_name', '')}
+        results.append(entry)
+
+        errors = []
+        if file_name in duplicates:
+            errors.append(f'File {file_name} appears more than once in upload')
+        elif file_name not in files:
+            errors.append(f'File {file_name} not found in upload')
+        if not entry['candidate_name']:
+            errors.append('candidate_name is required')
+        if errors:
+            entry.update(status='error', errors=errors)
+            continue
+
+        verification_attempt = VerificationAttempt(
+            company=request.user,
+            candidate_name=entry['candidate_name'],
+            candidate_email=row.get('candidate_email', ''),
+            expected_course=row.get('expected_course', ''),
+            expected_institution=row.get('expected_institution', ''),
+            file_hash=hashes[file_name],
+            ocr_implemented=False,
+        )
+        certificate = certificates.get(verification_attempt.file_hash)
+        if certificate:
+            entry['metadata_match'] = match_certificate_metadata(verification_attempt, certificate)
+        else:
+            verification_attempt.status = 'failed'
+            verification_attempt.verification_notes = 'Certificate not found in database. OCR processing needed.'
+        attempts.append((entry, verification_attempt))
+
+    stored_names = save_files_parallel([
+        (f"verification_attempts/{entry['file_name']}", files[entry['file_name']])
+        for entry, _ in attempts
+    ])
+    for stored_name, (_, verification_attempt) in zip(stored_names, attempts):
+        verification_attempt.uploaded_file = stored_name
+
+    failed_attempts = [attempt for _, attempt in attempts if attempt.status == 'failed']
+    summary_verified = sum(1 for _, attempt in attempts if attempt.status == 'verified')
+    failed_entries = [entry for entry, attempt in attempts if attempt.status == 'failed']
+    failed_hashes = phash.compute_dhashes_parallel([
+        (files[entry['file_name']], file_type_of(entry['file_name'])) for entry in failed_entries
+    ])
+    for entry, perceptual_hash in zip(failed_entries, failed_hashes):
+        entry['near_duplicates'] = near_duplicate_report(perceptual_hash)
+    try:
+        with transaction.atomic():
+            VerificationAttempt.objects.bulk_create([attempt for _, attempt in attempts], batch_size=500)
+            FailedVerificationLog.objects.bulk_create([
+                FailedVerificationLog(
+                    verification_attempt=attempt,
+                    reason=f'Unknown certificate verification attempt for {attempt.candidate_name}'
+                )
+                for attempt in failed_attempts
+            ], batch_size=500)
+            # bulk_create sends no post_save, so count explicitly
+            dashboard.increment(request.user.id, dashboard.VERIFICATIONS, len(attempts))
+            dashboard.increment(request.user.id, dashboard.VERIFIED, summary_verified)
+            dashboard.increment(request.user.id, dashboard.FAILED, len(failed_attempts))
+            dashboard.increment(None, dashboard.FAILURE_LOGS, len(failed_attempts))
+            dashboard.invalidate_recent([request.user.id])
+    except Exception:
+        delete_stored_files(stored_names)
+        raise
+
+    # Rows sharing a certificate share one IOTA check
+    awaiting_iota = {}
+    for entry, verification_attempt in attempts:
+        entry['verification_id'] = verification_attempt.id
+        entry['status'] = verification_attempt.status
+        certificate = verification_attempt.certificate
+        if certificate is None:
+            entry['message'] = 'Certificate not found in database. OCR processing would be needed.'
+            continue
+        entry['message'] = 'Certificate found and verified'
+        entry['certificate_details'] = CertificateSerializer(certificate).data
+        entry['metadata_match'] = {
+            'name_match': verification_attempt.name_match,
+            'course_match': verification_attempt.course_match,
+            'institution_match': verification_attempt.institution_match,
+            **entry['metadata_match'],
+        }
+        entry['iota_verification'] = None
+        if certificate.iota_stored and certificate.iota_block_id:
+            awaiting_iota.setdefault(certificate.id, (certificate, []))[1].append(entry)
+
+    def completed_rows():
+        awaiting = {id(entry) for _, entries in awaiting_iota.values() for entry in entries}
+        for entry in results:
+            if id(entry) not in awaiting:
+                yield entry
+        checks = verify_certificates_parallel([certificate for certificate, _ in awaiting_iota.values()])
+        for certificate, iota_verification in checks:
+            for entry in awaiting_iota[certificate.id][1]:
+                entry['iota_verification'] = iota_verification
+                yield entry
+
+    summary = {
+        'total': len(results),
+        'verified': summary_verified,
+        'failed': len(failed_attempts),
+        'errors': len(results) - len(attempts),
+    }
+
+    if str(request.data.get('stream', '')).lower() in ('1', 'true', 'yes'):
+        def ndjson():
+            for entry in completed_rows():
+                yield json.dumps(entry, cls=DjangoJSONEncoder) + '\n'
+            yield json.dumps({'summary': summary}) + '\n'
+
+        return StreamingHttpResponse(ndjson(), content_type='application/x-ndjson')
+
+    for _ in completed_rows():
+        pass
+    return Response({'summary': summary, 'results': results}, status=status.HTTP_200_OK)
+
+
 @extend_schema(
     operation_id='failed_verification_attempts',
     summary='Failed Verification Attempts',
     description='Get failed verification attempts for a college',
+    parameters=[
+        OpenApiParameter('page', int, description='Page number (from 1)'),
+        OpenApiParameter('limit', int, description='Page size (max 100)'),
+    ],
 )
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def failed_verification_attempts(request):
     """
-    Get failed verification attempts for a college
+    Get failed verification attempts for a college (paginated, newest first)
+    
+    Viewing the first page advances the college's read cursor, so
+    unread_count reports events that arrived since the last visit.
     """
     if request.user.user_type != 'college':
         return Response({'error': 'Only colleges can view failed verification attempts'}, 
                        status=status.HTTP_403_FORBIDDEN)
     
-    failed_attempts = FailedVerificationLog.objects.filter(
-        college=request.user
-    ).order_by('-created_at')
+    failed_attempts = FailedVerificationLog.visible_to(request.user).select_related(
+        'verification_attempt'
+    ).order_by('-created_at', '-id')
+    
+    cursor, _ = FailedVerificationCursor.objects.get_or_create(college=request.user)
+    unread_count = failed_attempts.filter(id__gt=cursor.last_seen_id).count()
+    
+    # Pagination
+    try:
+        page = int(request.GET.get('page', 1))
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        return Response({'error': 'page and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+    if page < 1 or limit < 1:
+        return Response({'error': 'page and limit must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+    paginator = Paginator(failed_attempts, min(limit, MAX_LIMIT))
+    page_obj = paginator.get_page(page)
+    
+    if page_obj.number == 1 and page_obj.object_list:
+        newest_id = max(log.id for log in page_obj.object_list)
+        if newest_id > cursor.last_seen_id:
+            cursor.last_seen_id = newest_id
+            cursor.save(update_fields=['last_seen_id', 'updated_at'])
     
-    serializer = FailedVerificationLogSerializer(failed_attempts, many=True)
+    serializer = FailedVerificationLogSerializer(page_obj.object_list, many=True)
     return Response({
         'failed_attempts': serializer.data,
-        'count': failed_attempts.count()
+        'count': paginator.count,
+        'unread_count': unread_count,
+        'pagination': {
+            'current_page': page_obj.number,
+            'total_pages': paginator.num_pages,
+            'total_items': paginator.count,
+            'has_next': page_obj.has_next(),
+            'has_previous': page_obj.has_previous(),
+        }
     }, status=status.HTTP_200_OK)
 
 
@@ -582,48 +1011,106 @@ def update_profile(request):
 @extend_schema(
     operation_id='list_certificates',
     summary='List Certificates',
-    description='List certificates uploaded by the college (paginated with search)'
+    description='List certificates uploaded by the college (cursor paginated with search)',
+    parameters=[
+        OpenApiParameter('cursor', str, description='next_cursor from the previous page'),
+        OpenApiParameter('limit', int, description='Page size (max 100)'),
+        OpenApiParameter('search', str, description='Ranked search over student, course and institution names'),
+        OpenApiParameter('fields', str, description='Comma separated subset of fields to return'),
+        OpenApiParameter('count', str, enum=['exact', 'estimate'], description='Include total_items'),
+    ]
 )
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_certificates(request):
     """
-    List certificates uploaded by the college (paginated with search)
+    List certificates uploaded by the college (cursor paginated with search)
+    
+    Pages are keyed on (created_at, id), so no COUNT(*) runs unless ?count= asks for it;
+    search results are paged in rank order.
     """
     if request.user.user_type != 'college':
         return Response({'error': 'Only colleges can view their certificates'}, 
                        status=status.HTTP_403_FORBIDDEN)
     
-    certificates = Certificate.objects.filter(uploaded_by=request.user).order_by('-created_at')
-    
-    # Search functionality
-    search = request.GET.get('search', '')
-    if search:
-        certificates = certificates.filter(student_name__icontains=search)
+    fields = CertificateListSerializer.projection(request.GET.get('fields'))
+    certificates = Certificate.objects.filter(uploaded_by=request.user).only(
+        *(set(fields or CertificateListSerializer.Meta.fields) | {'id', 'created_at'})
+    )
     
-    # Pagination
-    page = int(request.GET.get('page', 1))
-    limit = int(request.GET.get('limit', 10))
-    paginator = Paginator(certificates, limit)
-    page_obj = paginator.get_page(page)
+    try:
+        # Search functionality: ranked full-text search over names, icontains when the index can't serve it
+        search_text = request.GET.get('search', '')
+        if search_text and search.searchable(search_text):
+            page_ids, pagination = ranked_page(
+                lambda offset, limit: search.search_certificate_ids(search_text, request.user, limit, offset),
+                request,
+            )
+            rows = sorted(certificates.filter(id__in=page_ids), key=lambda c: page_ids.index(c.id))
+            add_count(pagination, request,
+                      exact=lambda: search.count_certificate_matches(search_text, uploaded_by=request.user))
+        else:
+            if search_text:
+                certificates = certificates.filter(student_name__icontains=search_text)
+            rows, pagination = cursor_page(certificates, request)
+            estimate = None if search_text else (
+                lambda: dashboard.read_counters(request.user).get(dashboard.CERTIFICATES, 0)
+            )
+            add_count(pagination, request, exact=certificates.count, estimate=estimate)
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
-    serializer = CertificateSerializer(page_obj.object_list, many=True)
+    serializer = CertificateListSerializer(rows, many=True, fields=fields)
     return Response({
         'certificates': serializer.data,
-        'pagination': {
-            'current_page': page,
-            'total_pages': paginator.num_pages,
-            'total_items': paginator.count,
-            'has_next': page_obj.has_next(),
-            'has_previous': page_obj.has_previous(),
-        }
+        'pagination': pagination
     }, status=status.HTTP_200_OK)
 
 
+@extend_schema(
+    operation_id='export_certificates',
+    summary='Export Certificates',
+    description='Stream the college certificate registry as CSV or JSONL',
+    parameters=[
+        OpenApiParameter('output', str, enum=['csv', 'jsonl'], description='Export format (default csv)'),
+        OpenApiParameter('after', int, description='Resume after this certificate id'),
+        OpenApiParameter('since', str, description='Only certificates created at or after this ISO datetime'),
+        OpenApiParameter('until', str, description='Only certificates created before this ISO datetime'),
+    ]
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_certificates(request):
+    """
+    Stream the college certificate registry as CSV or JSONL
+    
+    Rows are read with a server-side iterator in id order, so memory stays flat;
+    an interrupted export resumes with ?after=<last id received>.
+    """
+    if request.user.user_type != 'college':
+        return Response({'error': 'Only colleges can export their certificates'}, 
+                       status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        fmt = export_format(request)
+        certificates = export_range(Certificate.objects.filter(uploaded_by=request.user), request)
+    except InvalidExport as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return stream_export(certificates, CERTIFICATE_EXPORT_COLUMNS, fmt, 'certificates')
+
+
 @extend_schema(
     operation_id='list_verification_attempts',
     summary='List Verification Attempts',
-    description='List verification attempts made by the company',
+    description='List verification attempts made by the company (cursor paginated)',
+    parameters=[
+        OpenApiParameter('cursor', str, description='next_cursor from the previous page'),
+        OpenApiParameter('limit', int, description='Page size (max 100)'),
+        OpenApiParameter('status', str, description='Filter by verification status'),
+        OpenApiParameter('fields', str, description='Comma separated subset of fields to return'),
+        OpenApiParameter('count', str, enum=['exact', 'estimate'], description='Include total_items'),
+    ],
     responses={
         200: {
             'description': 'List of verification attempts',
@@ -634,16 +1121,16 @@ def list_certificates(request):
                         'properties': {
                             'verification_attempts': {
                                 'type': 'array',
-                                'items': {'$ref': '#/components/schemas/VerificationAttempt'}
+                                'items': {'type': 'object', 'description': 'VerificationAttemptListSerializer row'}
                             },
                             'pagination': {
                                 'type': 'object',
                                 'properties': {
-                                    'current_page': {'type': 'integer'},
-                                    'total_pages': {'type': 'integer'},
-                                    'total_items': {'type': 'integer'},
+                                    'limit': {'type': 'integer'},
                                     'has_next': {'type': 'boolean'},
-                                    'has_previous': {'type': 'boolean'}
+                                    'next_cursor': {'type': 'string', 'nullable': True},
+                                    'total_items': {'type': 'integer'},
+                                    'count_is_estimate': {'type': 'boolean'}
                                 }
                             }
                         }
@@ -658,35 +1145,39 @@ def list_certificates(request):
 @permission_classes([IsAuthenticated])
 def list_verification_attempts(request):
     """
-    List verification attempts made by the company
+    List verification attempts made by the company (cursor paginated)
     """
     if request.user.user_type != 'company':
         return Response({'error': 'Only companies can view their verification attempts'}, 
                        status=status.HTTP_403_FORBIDDEN)
     
-    attempts = VerificationAttempt.objects.filter(company=request.user).order_by('-created_at')
+    fields = VerificationAttemptListSerializer.projection(request.GET.get('fields'))
+    attempts = VerificationAttempt.objects.filter(company=request.user).only(
+        *(set(fields or VerificationAttemptListSerializer.Meta.fields) | {'id', 'created_at'})
+    )
     
     # Filter by status
     status_filter = request.GET.get('status', '')
     if status_filter:
         attempts = attempts.filter(status=status_filter)
     
-    # Pagination
-    page = int(request.GET.get('page', 1))
-    limit = int(request.GET.get('limit', 10))
-    paginator = Paginator(attempts, limit)
-    page_obj = paginator.get_page(page)
+    try:
+        rows, pagination = cursor_page(attempts, request)
+    except InvalidCursor as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Estimates come from the dashboard counters (all, verified or failed attempts)
+    counter_name = {'': dashboard.VERIFICATIONS, 'verified': dashboard.VERIFIED,
+                    'failed': dashboard.FAILED}.get(status_filter)
+    estimate = None if counter_name is None else (
+        lambda: dashboard.read_counters(request.user).get(counter_name, 0)
+    )
+    add_count(pagination, request, exact=attempts.count, estimate=estimate)
     
-    serializer = VerificationAttemptSerializer(page_obj.object_list, many=True)
+    serializer = VerificationAttemptListSerializer(rows, many=True, fields=fields)
     return Response({
         'verification_attempts': serializer.data,
-        'pagination': {
-            'current_page': page,
-            'total_pages': paginator.num_pages,
-            'total_items': paginator.count,
-            'has_next': page_obj.has_next(),
-            'has_previous': page_obj.has_previous(),
-        }
+        'pagination': pagination
     }, status=status.HTTP_200_OK)
 
 
@@ -700,26 +1191,33 @@ def list_verification_attempts(request):
 def dashboard_stats(request):
     """
     Get dashboard statistics based on user type
+    
+    Counts come from DashboardCounter rows and recent items from the cache
+    (see api/dashboard.py), so polling does not scan certificates or attempts.
     """
+    counters = dashboard.read_counters(request.user)
+    
     if request.user.user_type == 'college':
-        total_certificates = Certificate.objects.filter(uploaded_by=request.user).count()
-        recent_certificates = Certificate.objects.filter(uploaded_by=request.user).order_by('-created_at')[:5]
-        failed_attempts_count = FailedVerificationLog.objects.filter(college=request.user).count()
+        recent_certificates = dashboard.get_recent(request.user, lambda: CertificateSerializer(
+            Certificate.objects.filter(uploaded_by=request.user).order_by('-created_at')[:5], many=True
+        ).data)
         
         return Response({
             'user_type': 'college',
             'stats': {
-                'total_certificates': total_certificates,
-                'failed_verification_attempts': failed_attempts_count,
+                'total_certificates': counters.get(dashboard.CERTIFICATES, 0),
+                'failed_verification_attempts': counters.get(dashboard.FAILURE_LOGS, 0),
             },
-            'recent_certificates': CertificateSerializer(recent_certificates, many=True).data
+            'recent_certificates': recent_certificates
         }, status=status.HTTP_200_OK)
     
     elif request.user.user_type == 'company':
-        total_verifications = VerificationAttempt.objects.filter(company=request.user).count()
-        successful_verifications = VerificationAttempt.objects.filter(company=request.user, status='verified').count()
-        failed_verifications = VerificationAttempt.objects.filter(company=request.user, status='failed').count()
-        recent_attempts = VerificationAttempt.objects.filter(company=request.user).order_by('-created_at')[:5]
+        total_verifications = counters.get(dashboard.VERIFICATIONS, 0)
+        successful_verifications = counters.get(dashboard.VERIFIED, 0)
+        failed_verifications = counters.get(dashboard.FAILED, 0)
+        recent_attempts = dashboard.get_recent(request.user, lambda: VerificationAttemptSerializer(
+            VerificationAttempt.objects.filter(company=request.user).order_by('-created_at')[:5], many=True
+        ).data)
         
         return Response({
             'user_type': 'company',
@@ -729,7 +1227,7 @@ def dashboard_stats(request):
                 'failed_verifications': failed_verifications,
                 'success_rate': round((successful_verifications / total_verifications * 100) if total_verifications > 0 else 0, 2)
             },
-            'recent_attempts': VerificationAttemptSerializer(recent_attempts, many=True).data
+            'recent_attempts': recent_attempts
         }, status=status.HTTP_200_OK)
 
 
@@ -804,8 +1302,7 @@ def verify_certificate_iota(request, certificate_id):
                 verificationattempt__company=request.user
             )
         
-        iota_service = IOTAService()
-        iota_verification = iota_service.verify_certificate_on_iota(certificate)
+        iota_verification = get_iota_service().verify_certificate_on_iota(certificate)
         
         return Response({
             'certificate_id': certificate.id,
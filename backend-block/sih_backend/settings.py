@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "django.middleware.gzip.GZipMiddleware",
+    "api.middleware.BrotliMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -139,7 +141,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.ORJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
         'rest_framework.parsers.JSONParser',
@@ -183,9 +185,53 @@ MEDIA_ROOT = BASE_DIR / 'media'
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 
+# Bulk certificate ingest limits
+BULK_UPLOAD_MAX_FILES = int(os.getenv('BULK_UPLOAD_MAX_FILES', '5000'))
+BULK_UPLOAD_MAX_BYTES = int(os.getenv('BULK_UPLOAD_MAX_BYTES', str(512 * 1024 * 1024)))  # 512MB
+DATA_UPLOAD_MAX_NUMBER_FILES = BULK_UPLOAD_MAX_FILES + 1  # files plus the manifest
+
+# Maximum dHash Hamming distance (of 64 bits) reported as a near-duplicate certificate
+PHASH_MAX_DISTANCE = int(os.getenv('PHASH_MAX_DISTANCE', '10'))
+# Dashboard recent-item lists are invalidated by every web process and the
+# anchoring worker, so they live in a cache all processes share: a table in the
+# main database (created by migration 0011), or Redis when DASHBOARD_CACHE_REDIS_URL is set
+DASHBOARD_CACHE_TABLE = 'api_dashboard_cache'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('DASHBOARD_CACHE_REDIS_URL'),
+    } if os.getenv('DASHBOARD_CACHE_REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': DASHBOARD_CACHE_TABLE,
+    },
+}
+# Backstop TTL for cached dashboard recent items (writes invalidate them immediately)
+DASHBOARD_RECENT_CACHE_SECONDS = int(os.getenv('DASHBOARD_RECENT_CACHE_SECONDS', '300'))
+# Minimum tolerant match score (0-1) for name/course/institution to count as matching
+SEARCH_MATCH_THRESHOLD = float(os.getenv('SEARCH_MATCH_THRESHOLD', '0.8'))
+
 # Custom user model
 AUTH_USER_MODEL = 'api.CustomUser'
 
 # IOTA Configuration
 IOTA_ENABLED = os.getenv('IOTA_ENABLED', 'True').lower() == 'true'
 IOTA_NODE_URL = os.getenv('IOTA_NODE_URL', 'https://api.testnet.iota.cafe')
+# Uploads write an AnchorOutbox row; `manage.py anchor_certificates` drains it in Merkle batches
+IOTA_BATCH_SIZE = int(os.getenv('IOTA_BATCH_SIZE', '256'))
+IOTA_BATCH_MAX_WAIT_SECONDS = int(os.getenv('IOTA_BATCH_MAX_WAIT_SECONDS', '300'))
+IOTA_OUTBOX_CONCURRENCY = int(os.getenv('IOTA_OUTBOX_CONCURRENCY', '2'))
+IOTA_OUTBOX_MAX_ATTEMPTS = int(os.getenv('IOTA_OUTBOX_MAX_ATTEMPTS', '8'))
+IOTA_OUTBOX_BACKOFF_BASE_SECONDS = int(os.getenv('IOTA_OUTBOX_BACKOFF_BASE_SECONDS', '30'))
+IOTA_OUTBOX_BACKOFF_MAX_SECONDS = int(os.getenv('IOTA_OUTBOX_BACKOFF_MAX_SECONDS', '3600'))
+# Entries left 'processing' longer than this (crashed worker) are claimed again
+IOTA_OUTBOX_LEASE_SECONDS = int(os.getenv('IOTA_OUTBOX_LEASE_SECONDS', '600'))
+# In-memory LRU sizes; fetched blocks are also persisted in the IOTABlock table
+IOTA_BLOCK_CACHE_SIZE = int(os.getenv('IOTA_BLOCK_CACHE_SIZE', '4096'))
+IOTA_VERIFICATION_CACHE_SIZE = int(os.getenv('IOTA_VERIFICATION_CACHE_SIZE', '4096'))
+# Concurrent IOTA checks per batch verification request
+IOTA_VERIFY_WORKERS = int(os.getenv('IOTA_VERIFY_WORKERS', '8'))
+# Use the in-process LocalTangleClient instead of a real node (tests/local development)
+IOTA_USE_LOCAL_CLIENT = os.getenv('IOTA_USE_LOCAL_CLIENT', 'False').lower() == 'true'
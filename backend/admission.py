@@ -0,0 +1,232 @@
+"""
+Admission control for OCR: a budget of decoded pixels.
+
+A 16 MB upload can be a JPEG that decodes to hundreds of megapixels, and
+preprocessing keeps several copies of the page in memory. Each OCR job is
+therefore charged its pixel count, read from the image headers without
+decoding (see measure), against a shared PixelBudget:
+
+- a job that fits in the free budget runs straight away;
+- otherwise it waits in a FIFO queue, up to OCR_QUEUE_MEGAPIXELS of waiting work;
+- beyond that the upload is rejected with 429 and a Retry-After estimate.
+
+When OCR_WORKER_ADDRESS is set the budget lives in the OCR pool server, so
+it is shared by every API process; otherwise each process has its own.
+Budget usage is served at /api/admin/stats/ocr-budget.
+"""
+import collections
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+MEGAPIXEL = 1_000_000
+# Rough peak working set per pixel: BGR page, grayscale copies and binarized output
+BYTES_PER_PIXEL = 12
+LEASE_SECONDS = 900
+DEFAULT_RETRY_AFTER_SECONDS = 10
+
+
+def _megapixels(name, default):
+    return int(float(os.environ.get(name, default)) * MEGAPIXEL)
+
+
+class ImageRejected(Exception):
+    """Image can never be admitted (unreadable, or larger than the whole budget)"""
+
+
+class AdmissionRejected(Exception):
+    """Budget and queue are full; retry after retry_after seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f'OCR is at capacity, retry in {retry_after}s')
+        self.retry_after = retry_after
+
+
+def measure(source):
+    """
+    Decoded pixel count of an image file or stream, from its headers only
+    (every frame of a multi-page TIFF counts). Streams are rewound afterwards.
+    """
+    from PIL import Image
+
+    position = source.tell() if hasattr(source, 'tell') else None
+    try:
+        with Image.open(source) as image:
+            pixels = 0
+            for frame in range(getattr(image, 'n_frames', 1)):
+                image.seek(frame)
+                pixels += image.width * image.height
+            return pixels
+    except Image.DecompressionBombError as e:
+        raise ImageRejected(str(e))
+    except (OSError, ValueError, SyntaxError) as e:
+        raise ImageRejected(f'Unreadable image: {e}')
+    finally:
+        if position is not None:
+            source.seek(position)
+
+
+class PixelBudget:
+    """
+    Pixels of OCR work allowed in flight, plus a FIFO queue of work waiting
+    for room. Tickets come from enqueue(); acquire() blocks until the ticket
+    is admitted, release() returns its pixels. Leases older than
+    lease_seconds are reclaimed in case their holder died.
+    """
+
+    def __init__(self, capacity, queue_capacity, lease_seconds=LEASE_SECONDS):
+        self.capacity = capacity
+        self.queue_capacity = queue_capacity
+        self.lease_seconds = lease_seconds
+        self._changed = threading.Condition()
+        self._active = {}  # ticket -> (pixels, admitted at)
+        self._queue = collections.OrderedDict()  # ticket -> [pixels, queued at, waiting]
+        self._admitted = 0
+        self._rejected = 0
+        self._hold_seconds = None  # moving average of how long jobs hold their pixels
+
+    def _in_use(self):
+        return sum(pixels for pixels, _ in self._active.values())
+
+    def _queued(self):
+        return sum(entry[0] for entry in self._queue.values())
+
+    def _reclaim(self):
+        cutoff = time.monotonic() - self.lease_seconds
+        for ticket in [t for t, (_, since) in self._active.items() if since < cutoff]:
+            logger.warning(f"Reclaiming expired OCR budget lease {ticket}")
+            del self._active[ticket]
+        for ticket in [t for t, (_, since, _w) in self._queue.items() if since < cutoff]:
+            del self._queue[ticket]
+
+    def _promote(self):
+        """Admit waiting tickets in arrival order while they fit"""
+        in_use = self._in_use()
+        for ticket, (pixels, _, waiting) in list(self._queue.items()):
+            if not waiting:
+                continue
+            if in_use + pixels > self.capacity:
+                break
+            del self._queue[ticket]
+            self._active[ticket] = (pixels, time.monotonic())
+            self._admitted += 1
+            in_use += pixels
+        self._changed.notify_all()
+
+    def _retry_after(self):
+        if self._hold_seconds is None:
+            return DEFAULT_RETRY_AFTER_SECONDS
+        backlog = max(1.0, (self._in_use() + self._queued()) / self.capacity)
+        return max(1, math.ceil(self._hold_seconds * backlog))
+
+    def enqueue(self, pixels):
+        """
+        Ticket for a job of this many pixels, or (None, retry_after seconds)
+        when the queue is full. Raises ImageRejected if it can never fit.
+        """
+        if pixels > self.capacity:
+            raise ImageRejected(
+                f'Image is {pixels / MEGAPIXEL:.1f} MP; the limit is {self.capacity / MEGAPIXEL:.1f} MP')
+        with self._changed:
+            self._reclaim()
+            if self._queued() + pixels > self.queue_capacity:
+                self._rejected += 1
+                return None, self._retry_after()
+            ticket = uuid.uuid4().hex
+            self._queue[ticket] = [pixels, time.monotonic(), False]
+            return ticket, 0
+
+    def acquire(self, ticket, timeout):
+        """Wait until ticket is admitted; False (and the ticket dropped) on timeout"""
+        with self._changed:
+            if ticket in self._queue:
+                self._queue[ticket][2] = True
+                self._promote()
+            if self._changed.wait_for(lambda: ticket not in self._queue, timeout=timeout):
+                return ticket in self._active
+            del self._queue[ticket]
+            self._promote()
+            return False
+
+    def release(self, ticket):
+        with self._changed:
+            entry = self._active.pop(ticket, None)
+            self._queue.pop(ticket, None)
+            if entry is not None:
+                held = time.monotonic() - entry[1]
+                self._hold_seconds = held if self._hold_seconds is None else 0.8 * self._hold_seconds + 0.2 * held
+            self._promote()
+
+    def stats(self):
+        with self._changed:
+            self._reclaim()
+            in_use, queued = self._in_use(), self._queued()
+            return {
+                'capacity_megapixels': round(self.capacity / MEGAPIXEL, 1),
+                'in_use_megapixels': round(in_use / MEGAPIXEL, 1),
+                'queued_megapixels': round(queued / MEGAPIXEL, 1),
+                'queue_capacity_megapixels': round(self.queue_capacity / MEGAPIXEL, 1),
+                'utilization': round(in_use / self.capacity, 3),
+                'estimated_memory_mb': round(in_use * BYTES_PER_PIXEL / 2 ** 20),
+                'active_jobs': len(self._active),
+                'queued_jobs': len(self._queue),
+                'admitted_total': self._admitted,
+                'rejected_total': self._rejected,
+                'avg_hold_seconds': round(self._hold_seconds, 2) if self._hold_seconds is not None else None,
+            }
+
+
+def budget_from_env():
+    return PixelBudget(
+        capacity=_megapixels('OCR_PIXEL_BUDGET_MEGAPIXELS', 150),
+        queue_capacity=_megapixels('OCR_QUEUE_MEGAPIXELS', 600),
+    )
+
+
+_local_budget = None
+_local_lock = threading.Lock()
+
+
+def get_budget():
+    """The pool server's shared budget when OCR_WORKER_ADDRESS is set, else this process's"""
+    global _local_budget
+    from ocr_workers import pixel_budget_client
+
+    client = pixel_budget_client()
+    if client is not None:
+        return client
+    with _local_lock:
+        if _local_budget is None:
+            _local_budget = budget_from_env()
+        return _local_budget
+
+
+def admit(source):
+    """
+    Measure an upload and queue it against the budget. Returns (ticket, pixels).
+    Raises ImageRejected or AdmissionRejected.
+    """
+    pixels = measure(source)
+    ticket, retry_after = get_budget().enqueue(pixels)
+    if ticket is None:
+        raise AdmissionRejected(retry_after)
+    return ticket, pixels
+
+
+def acquire(ticket, timeout=None):
+    if timeout is None:
+        timeout = float(os.environ.get('OCR_ADMISSION_TIMEOUT_SECONDS', 300))
+    return get_budget().acquire(ticket, timeout)
+
+
+def release(ticket):
+    get_budget().release(ticket)
+
+
+def budget_stats():
+    return get_budget().stats()
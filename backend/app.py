@@ -10,10 +10,13 @@ import json
 import secrets
 
 try:
-    from .final_ocr_system import MarksCardOCRSystem
-except Exception:
-    # Fallback when running app.py directly
-    from final_ocr_system import MarksCardOCRSystem
+    from .fast_json import init_json
+    from .compression import init_compression
+    from . import admission
+except ImportError:
+    from fast_json import init_json
+    from compression import init_compression
+    import admission
 
 # Flask config
 UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
@@ -32,10 +35,16 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', secrets.token_hex(32))
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['RESULTS_FOLDER'] = RESULTS_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# How long an upload may wait for OCR pixel budget before getting a 429 (see admission.py)
+UPLOAD_ADMISSION_WAIT_SECONDS = float(os.environ.get('UPLOAD_ADMISSION_WAIT_SECONDS', 30))
 
 # Initialize CORS
 CORS(app, origins=['http://localhost:3000', 'http://127.0.0.1:5500', 'file://'])
 
+# Fast JSON rendering and response compression
+init_json(app)
+init_compression(app)
+
 # Simple JWT token creation
 def create_simple_token(user_id, role):
     """Create a simple token for authentication"""
@@ -101,32 +110,51 @@ def upload():
         return redirect(url_for('index'))
 
     if file and allowed_file(file.filename):
-        ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = secure_filename(f"{ts}_" + file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-
-        # Run OCR
-        ocr = MarksCardOCRSystem(confidence_threshold=0.5)
-        data = ocr.process_marks_card(
-            file_path,
-            preprocess=True,
-            do_deskew=True,
-            do_denoise=True,
-            use_adaptive=True,
-            contrast=True,
-            temp_dir=os.path.join(app.config['RESULTS_FOLDER'], 'preprocessed')
-        )
-
-        # Save results to dedicated folder per upload
-        out_dir = os.path.join(app.config['RESULTS_FOLDER'], os.path.splitext(filename)[0])
-        ocr.save_results(data, out_dir)
-
-        return redirect(url_for('result', run_id=os.path.basename(out_dir)))
+        # Charge the decoded size against the OCR pixel budget before saving anything
+        try:
+            ticket, _ = admission.admit(file.stream)
+        except admission.ImageRejected as e:
+            return f'Image rejected: {e}', 413
+        except admission.AdmissionRejected as e:
+            return 'OCR is busy, please retry shortly', 429, {'Retry-After': str(e.retry_after)}
+        if not admission.acquire(ticket, timeout=UPLOAD_ADMISSION_WAIT_SECONDS):
+            return 'OCR is busy, please retry shortly', 429, {'Retry-After': str(admission.DEFAULT_RETRY_AFTER_SECONDS)}
+        try:
+            return _process_upload(file)
+        finally:
+            admission.release(ticket)
 
     return redirect(url_for('index'))
 
 
+def _process_upload(file):
+    """Save an admitted upload, OCR it and redirect to its results"""
+    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    filename = secure_filename(f"{ts}_" + file.filename)
+    file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    file.save(file_path)
+
+    # Run OCR (the OCR stack is imported on first upload, not at startup)
+    try:
+        from .final_ocr_system import MarksCardOCRSystem
+    except ImportError:
+        # Fallback when running app.py directly
+        from final_ocr_system import MarksCardOCRSystem
+    ocr = MarksCardOCRSystem(confidence_threshold=0.5)
+    data = ocr.process_marks_card(file_path, cascade=True)
+    try:
+        from .ocr_templates import stats as template_stats
+    except ImportError:
+        from ocr_templates import stats as template_stats
+    template_stats.record(data.template_matched, data.template)
+
+    # Save results to dedicated folder per upload
+    out_dir = os.path.join(app.config['RESULTS_FOLDER'], os.path.splitext(filename)[0])
+    ocr.save_results(data, out_dir)
+
+    return redirect(url_for('result', run_id=os.path.basename(out_dir)))
+
+
 @app.route('/result/<run_id>', methods=['GET'])
 def result(run_id: str):
     out_dir = os.path.join(app.config['RESULTS_FOLDER'], run_id)
@@ -157,12 +185,26 @@ def api_result(run_id: str):
         return jsonify(**__import__('json').load(f))
 
 
+# Demo account passwords; their hashes are generated on first login rather
+# than at import, since each PBKDF2 hash takes a noticeable fraction of a second
+DEMO_PASSWORDS = {
+    'admin@credentialkavach.gov.in': 'Admin@123',
+    'student@example.com': 'Student@123',
+    'college@example.com': 'College@123',
+    'employer@example.com': 'Employer@123',
+}
+
+def password_hash_of(user):
+    if user['password_hash'] is None:
+        user['password_hash'] = generate_password_hash(DEMO_PASSWORDS[user['email']])
+    return user['password_hash']
+
 # Simple user storage (in production, use proper database)
 users_db = {
     'admin@credentialkavach.gov.in': {
         'id': str(uuid.uuid4()),
         'email': 'admin@credentialkavach.gov.in',
-        'password_hash': generate_password_hash('Admin@123'),
+        'password_hash': None,
         'full_name': 'Government Administrator',
         'phone': '9999999999',
         'role': 'government',
@@ -173,7 +215,7 @@ users_db = {
     'student@example.com': {
         'id': str(uuid.uuid4()),
         'email': 'student@example.com',
-        'password_hash': generate_password_hash('Student@123'),
+        'password_hash': None,
         'full_name': 'Test Student',
         'phone': '9876543210',
         'role': 'student',
@@ -184,7 +226,7 @@ users_db = {
     'college@example.com': {
         'id': str(uuid.uuid4()),
         'email': 'college@example.com',
-        'password_hash': generate_password_hash('College@123'),
+        'password_hash': None,
         'full_name': 'Test College Admin',
         'phone': '9876543211',
         'role': 'college',
@@ -195,7 +237,7 @@ users_db = {
     'employer@example.com': {
         'id': str(uuid.uuid4()),
         'email': 'employer@example.com',
-        'password_hash': generate_password_hash('Employer@123'),
+        'password_hash': None,
         'full_name': 'Test Employer',
         'phone': '9876543212',
         'role': 'employer',
@@ -220,7 +262,7 @@ def login():
         # Check user in simple storage
         user = users_db.get(email)
         
-        if not user or not check_password_hash(user['password_hash'], password):
+        if not user or not check_password_hash(password_hash_of(user), password):
             return jsonify({'message': 'Invalid email or password'}), 401
         
         if not user.get('is_active', True):
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Deskew benchmark: preprocessing.deskew against the approaches it replaced.
+
+Synthetic marks-card-like pages (text lines plus a table grid) are rotated by
+known angles; each method's estimated angle is compared with the truth and
+the full deskew (estimate + warp) is timed.
+
+    python benchmarks/bench_deskew.py
+    python benchmarks/bench_deskew.py --size 2480x3508 --angles -7 -2 0 0.2 3 9
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preprocessing import binarize, deskew, estimate_skew_angle  # noqa: E402
+
+
+def synthetic_page(width, height, seed=0):
+    """White page with a header, rows of text and a marks table"""
+    rng = np.random.default_rng(seed)
+    page = np.full((height, width), 255, np.uint8)
+    margin = width // 12
+    scale = width / 1200
+    y = margin
+    cv2.putText(page, 'UNIVERSITY OF EXAMPLE - STATEMENT OF MARKS', (margin, y),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.2 * scale, 0, max(1, int(3 * scale)))
+    y += int(80 * scale)
+    while y < height - margin:
+        x = margin
+        while x < width - margin:
+            word = ''.join(rng.choice(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'), rng.integers(3, 9)))
+            cv2.putText(page, word, (x, y), cv2.FONT_HERSHEY_SIMPLEX, 0.8 * scale, 0, max(1, int(2 * scale)))
+            x += int((len(word) * 18 + 30) * scale)
+        y += int(45 * scale)
+    for col in np.linspace(margin, width - margin, 5).astype(int):
+        cv2.line(page, (col, height // 2), (col, height - margin), 0, max(1, int(scale)))
+    return page
+
+
+def rotate(page, angle):
+    h, w = page.shape
+    M = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+    return cv2.warpAffine(page, M, (w, h), flags=cv2.INTER_LINEAR, borderValue=255)
+
+
+# --- Previous implementations, kept here for comparison --------------------
+
+def legacy_min_area_rect_angle(img_gray, max_angle=15.0):
+    """Old preprocessing.deskew estimate: minAreaRect over every foreground pixel"""
+    th = cv2.bitwise_not(binarize(img_gray, method='otsu'))
+    coords = np.column_stack(np.where(th > 0))
+    if coords.size == 0:
+        return 0.0
+    angle = cv2.minAreaRect(coords)[-1]
+    if angle < -45:
+        angle = 90 + angle
+    return float(np.clip(angle, -max_angle, max_angle))
+
+
+def legacy_min_area_rect_deskew(img_gray):
+    angle = legacy_min_area_rect_angle(img_gray)
+    h, w = img_gray.shape[:2]
+    M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    return cv2.warpAffine(img_gray, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+
+
+def legacy_contour_angle(img_gray):
+    """Old ocr_extractor._deskew_image estimate: minAreaRect of the largest contour"""
+    contours, _ = cv2.findContours(img_gray, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return 0.0
+    angle = cv2.minAreaRect(max(contours, key=cv2.contourArea))[2]
+    return -(90 + angle) if angle < -45 else -angle
+
+
+def legacy_contour_deskew(img_gray):
+    angle = legacy_contour_angle(img_gray)
+    if abs(angle) <= 0.5:
+        return img_gray
+    h, w = img_gray.shape[:2]
+    M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    return cv2.warpAffine(img_gray, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
+
+
+METHODS = {
+    'projection (new)': (estimate_skew_angle, deskew),
+    'minAreaRect pixels (old)': (legacy_min_area_rect_angle, legacy_min_area_rect_deskew),
+    'largest contour (old)': (legacy_contour_angle, legacy_contour_deskew),
+}
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark deskew time and accuracy')
+    parser.add_argument('--size', default='1654x2339', help='Page size WxH (default: A4 at 200 dpi)')
+    parser.add_argument('--angles', type=float, nargs='+', default=[-8.0, -3.5, -1.0, 0.0, 0.2, 2.0, 6.5, 12.0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    page = synthetic_page(width, height)
+    # Rotating the page by +a skews it; the correcting angle is -a
+    samples = [(angle, rotate(page, angle)) for angle in args.angles]
+
+    print(f"Page {width}x{height}, skews {args.angles}\n")
+    print(f"{'method':<26} {'mean |err|':>10} {'max |err|':>10} {'mean ms':>9}")
+    for name, (estimate, full) in METHODS.items():
+        errors = [abs(estimate(img) - (-angle)) for angle, img in samples]
+        times = [timed(full, img, repeat=args.repeat) for _, img in samples]
+        print(f"{name:<26} {np.mean(errors):>9.2f}° {np.max(errors):>9.2f}° {1000 * np.mean(times):>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Stage memo benchmark: a sweep over preprocessing settings (deskew, adaptive
+vs Otsu, CLAHE clip limit, denoise h) on one page, with every combination
+computed from scratch versus with a StageMemo. Outputs are checked to match.
+
+    python benchmarks/bench_memo.py
+    python benchmarks/bench_memo.py --image sample_marks_cards/1.png --memo-mb 64 --spill-dir /tmp/ocr-memo
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_engine import OCREngine  # noqa: E402
+from stage_memo import MEGABYTE, StageMemo  # noqa: E402
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GRID = {
+    'deskew': [True, False],
+    'denoise_h': [8, 12],
+    'clip_limit': [2.0, 3.0, 4.0],
+    'adaptive': [True, False],
+}
+
+
+def sweep(engine, image):
+    outputs = []
+    for values in itertools.product(*GRID.values()):
+        state = engine.run(image, 'full', stop='enhance', **dict(zip(GRID, values)))
+        outputs.append(state.buffers['ocr_input'])
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memoized preprocessing sweeps')
+    parser.add_argument('--image', default=os.path.join(BACKEND_DIR, 'sample_marks_cards', '2.png'))
+    parser.add_argument('--memo-mb', type=float, default=256)
+    parser.add_argument('--spill-dir', default=None)
+    args = parser.parse_args()
+
+    combinations = int(np.prod([len(values) for values in GRID.values()]))
+    print(f"{combinations} settings on {os.path.basename(args.image)}")
+
+    start = time.perf_counter()
+    reference = sweep(OCREngine(), args.image)
+    print(f"{'no memo':<12} {time.perf_counter() - start:>7.2f}s")
+
+    memo = StageMemo(int(args.memo_mb * MEGABYTE), spill_dir=args.spill_dir)
+    start = time.perf_counter()
+    memoized = sweep(OCREngine(memo=memo), args.image)
+    elapsed = time.perf_counter() - start
+    same = 'identical' if all(np.array_equal(a, b) for a, b in zip(reference, memoized)) else 'DIFFERS'
+    print(f"{'memo':<12} {elapsed:>7.2f}s  {same}  {memo.stats()}")
+
+
+if __name__ == '__main__':
+    main()
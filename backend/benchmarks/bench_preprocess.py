@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tiled preprocessing benchmark: denoise + adaptive threshold on a noisy
+synthetic page, whole-image versus tiled on 1..N threads. The tiled output is
+checked to be identical to the whole-image output.
+
+    python benchmarks/bench_preprocess.py --size 2480x3508 --threads 1 2 4
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import preprocessing  # noqa: E402
+from benchmarks.bench_deskew import synthetic_page  # noqa: E402
+
+
+def whole_image(img):
+    denoised = cv2.fastNlMeansDenoising(img, h=12)
+    return cv2.adaptiveThreshold(denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10)
+
+
+def tiled(img):
+    return preprocessing.binarize(preprocessing.denoise(img, h=12), method='adaptive')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tiled denoise/threshold')
+    parser.add_argument('--size', default='2480x3508', help='Page size WxH (default: A4 at 300 dpi)')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split('x'))
+    page = synthetic_page(width, height)
+    page = cv2.add(page, np.random.default_rng(0).integers(0, 40, page.shape, dtype=np.uint8))
+
+    start = time.perf_counter()
+    reference = whole_image(page)
+    print(f"{'whole image':<18} {time.perf_counter() - start:>7.2f}s  ({os.cpu_count()} cores)")
+
+    for threads in args.threads:
+        # Fresh pool per thread count
+        os.environ['OCR_PREPROCESS_THREADS'] = str(threads)
+        preprocessing._executor = None
+        start = time.perf_counter()
+        result = tiled(page)
+        elapsed = time.perf_counter() - start
+        same = 'identical' if np.array_equal(result, reference) else 'DIFFERS'
+        print(f"{f'tiled x{threads}':<18} {elapsed:>7.2f}s  {same}")
+
+
+if __name__ == '__main__':
+    main()
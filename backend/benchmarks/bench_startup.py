@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the Flask backends.
+
+Each target is imported in a fresh interpreter (so nothing is already cached
+in sys.modules) and we record wall time, peak RSS and whether any of the heavy
+OCR dependencies got loaded along the way. API-only processes should load
+none of them.
+
+    python benchmarks/bench_startup.py            # table
+    python benchmarks/bench_startup.py --json     # machine readable
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['paddlex', 'paddleocr', 'paddle', 'cv2', 'numpy', 'pandas', 'PIL']
+
+TARGETS = {
+    'credential_app': 'import credential_app; credential_app.create_app()',
+    'app': 'import app',
+}
+
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'seconds': elapsed, 'peak_rss_mb': rss_kb / 1024, 'heavy_modules': heavy}}))
+"""
+
+
+def measure(target, repeat=3):
+    """Best-of-repeat startup measurement of one target in fresh interpreters"""
+    env = dict(os.environ, DATABASE_URL=os.environ.get('STARTUP_BENCH_DATABASE_URL', 'sqlite://'))
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(code=TARGETS[target], heavy=HEAVY_MODULES)],
+            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda run: run['seconds'])
+    return {'target': target, **best}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure Flask backend startup time')
+    parser.add_argument('targets', nargs='*', help=f"Targets to measure: {', '.join(TARGETS)} (default: all)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    results = [measure(target, args.repeat) for target in args.targets or TARGETS]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'target':<16} {'seconds':>8} {'peak MB':>8}  heavy modules")
+    for result in results:
+        print(f"{result['target']:<16} {result['seconds']:>8.3f} {result['peak_rss_mb']:>8.1f}  "
+              f"{', '.join(result['heavy_modules']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
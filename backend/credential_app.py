@@ -26,6 +26,9 @@ def create_app():
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
     app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)
     
+    # Per-process cache of user role/status behind JWT endpoints (see identity.py)
+    app.config['USER_CACHE_TTL_SECONDS'] = int(os.environ.get('USER_CACHE_TTL_SECONDS', 30))
+    
     # Mail configuration
     app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
@@ -47,6 +50,12 @@ def create_app():
     cors.init_app(app, origins=['http://localhost:3000', 'http://127.0.0.1:5500', 'file://'])
     mail.init_app(app)
     
+    # Fast JSON rendering and response compression
+    from fast_json import init_json
+    from compression import init_compression
+    init_json(app)
+    init_compression(app)
+    
     # Import and register blueprints
     from routes.auth import auth_bp
     from routes.api import api_bp
@@ -124,6 +133,10 @@ def create_app():
             db.session.commit()
             print("Admin account created during app initialization")
     
+    # Re-queue OCR jobs interrupted by the last shutdown
+    from ocr_jobs import resume_pending
+    resume_pending(app)
+    
     return app
 
 if __name__ == '__main__':
@@ -0,0 +1,116 @@
+"""
+Fast JSON output for the Flask apps.
+
+ORJSONProvider swaps Flask's json provider for orjson when it is installed
+(falling back to the stdlib provider otherwise), and stream_json_array writes
+large lists as a chunked JSON array so the full payload is never held in memory.
+"""
+import itertools
+import json
+import logging
+from decimal import Decimal
+
+from flask import Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 500
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps_bytes(obj, sort_keys=False):
+    """Serialize obj to UTF-8 JSON bytes with orjson when available"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(obj, default=_default, option=option)
+    return json.dumps(
+        obj, default=DefaultJSONProvider.default, ensure_ascii=False, sort_keys=sort_keys, separators=(',', ':')
+    ).encode('utf-8')
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson; behaves like the default one without it"""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj, self.sort_keys).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj, self.sort_keys) + b'\n', mimetype=self.mimetype)
+
+
+def init_json(app):
+    app.json = ORJSONProvider(app)
+
+
+def _iter_json_array(items, key, extra, chunk_size):
+    if key is None:
+        yield b'['
+    else:
+        prefix = dumps_bytes(extra or {})[:-1]
+        yield prefix + (b',' if extra else b'') + dumps_bytes(key) + b':['
+
+    buffer = []
+    first = True
+    error = None
+    try:
+        for item in items:
+            buffer.append(dumps_bytes(item))
+            if len(buffer) >= chunk_size:
+                yield (b'' if first else b',') + b','.join(buffer)
+                first = False
+                buffer = []
+    except Exception as e:
+        # The status line is already sent; finish the document so the client
+        # gets valid JSON that says it is incomplete instead of a cut-off body
+        logger.exception("Streaming JSON array failed")
+        error = str(e)
+    if buffer:
+        yield (b'' if first else b',') + b','.join(buffer)
+
+    if key is None:
+        yield b']'
+    elif error is None:
+        yield b']}'
+    else:
+        yield b'],' + dumps_bytes('error') + b':' + dumps_bytes(error) + b'}'
+
+
+def stream_json_array(items, key=None, extra=None, chunk_size=STREAM_CHUNK_SIZE, status=200):
+    """
+    Stream items (any iterable of JSON-serializable objects) as a JSON array,
+    or as {**extra, key: [...]} when key is given. Items are serialized and
+    flushed chunk_size at a time, so memory stays flat however long the list is.
+
+    The first chunk is pulled before the response is built, so a failing query
+    raises here (where the route can still answer with an error status). A later
+    failure ends the array early and adds an "error" member next to key.
+    """
+    items = iter(items)
+    head = list(itertools.islice(items, chunk_size))
+    body = stream_with_context(_iter_json_array(itertools.chain(head, items), key, extra, chunk_size))
+    return Response(body, status=status, mimetype='application/json')
@@ -9,21 +9,95 @@ import json
 import csv
 import re
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+import time
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from dataclasses import dataclass, asdict
-from paddlex import create_pipeline
-try:
-    # When imported as a module (e.g., from Flask app)
-    from .preprocessing import preprocess_image
-except Exception:
-    # When run directly as a script
-    from preprocessing import preprocess_image
 import argparse
 
-# Setup logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# paddlex, OpenCV and NumPy are imported on first use (see ocr_engine) so web
+# processes that never run OCR don't load them
 logger = logging.getLogger(__name__)
 
+
+def _preprocessing():
+    try:
+        # When imported as a module (e.g., from Flask app)
+        from . import preprocessing
+    except ImportError:
+        # When run directly as a script
+        import preprocessing
+    return preprocessing
+
+
+def _templates():
+    try:
+        from . import ocr_templates
+    except ImportError:
+        import ocr_templates
+    return ocr_templates
+
+
+def _ocr_engine():
+    try:
+        from . import ocr_engine
+    except ImportError:
+        import ocr_engine
+    return ocr_engine
+
+
+def _elements(text_elements):
+    """Engine text elements in this module's format (no boxes)"""
+    return [{'text': item['text'], 'confidence': item['confidence'], 'index': item['index']}
+            for item in text_elements]
+
+
+def _describe(image):
+    return image if isinstance(image, str) else f"<array {getattr(image, 'shape', '?')}>"
+
+
+def _emit(progress, stage, **data):
+    """Report a stage transition or partial result to a progress callback, if any"""
+    if progress is not None:
+        try:
+            progress(stage, data)
+        except Exception as e:
+            logger.warning(f"⚠️ Progress callback failed: {e}")
+
+
+def _partial_fields(marks_data):
+    """Student fields known so far, for progress reports"""
+    info = marks_data.student_info
+    return {'university': marks_data.university, 'name': info.name, 'roll_number': info.roll_number,
+            'registration_number': info.registration_number}
+
+
+def _field_value(marks_data, field):
+    """A top-level or student_info field of MarksCardData, by name"""
+    if hasattr(marks_data.student_info, field):
+        return getattr(marks_data.student_info, field)
+    return getattr(marks_data, field, None)
+
+
+# Cascade acceptance thresholds (see MarksCardOCRSystem.process_cascade)
+CASCADE_MIN_CONFIDENCE = float(os.environ.get('OCR_CASCADE_MIN_CONFIDENCE', 0.85))
+CASCADE_MIN_COVERAGE = float(os.environ.get('OCR_CASCADE_MIN_COVERAGE', 1.0))
+CASCADE_UPSCALE = 2.0
+CASCADE_UPSCALE_MAX_SIDE = 3500
+# Each entry is satisfied by any one of its fields
+REQUIRED_FIELDS = (('name',), ('roll_number', 'registration_number'), ('subjects',))
+
+
+def assess(marks_data, required=REQUIRED_FIELDS) -> Dict[str, Any]:
+    """Mean recognition confidence and the fraction of required fields present"""
+    confidences = [item['confidence'] for item in marks_data.all_extracted_text]
+    missing = [group[0] for group in required if not any(_field_value(marks_data, f) for f in group)]
+    return {
+        'mean_confidence': round(sum(confidences) / len(confidences), 4) if confidences else 0.0,
+        'coverage': round(1 - len(missing) / len(required), 3) if required else 1.0,
+        'missing': missing,
+    }
+
+
 @dataclass
 class StudentInfo:
     """Student information extracted from marks card."""
@@ -56,6 +130,11 @@ class MarksCardData:
     result: Optional[str] = None
     division: Optional[str] = None
     all_extracted_text: List[Dict[str, Any]] = None
+    template: Optional[str] = None  # layout template the fields were read with
+    template_matched: Optional[str] = None  # template whose header matched, even if we fell back
+    tier: Optional[str] = None  # cascade tier that produced the result (process_cascade only)
+    cascade: List[Dict[str, Any]] = None  # per-tier scores and timings (process_cascade only)
+    timings: Dict[str, float] = None  # seconds spent in each engine stage
     
     def __post_init__(self):
         if self.student_info is None:
@@ -68,79 +147,50 @@ class MarksCardData:
 class MarksCardOCRSystem:
     """Complete OCR system for marks cards with structured field extraction."""
     
-    def __init__(self, confidence_threshold: float = 0.5):
-        """Initialize the OCR system."""
+    def __init__(self, confidence_threshold: float = 0.5, profile: Optional[str] = None):
+        """
+        Initialize the OCR system. profile names a tuned OCR profile (see
+        ocr_tuning; default OCR_PROFILE): its preprocessing settings replace the
+        preprocessing flags of process_marks_card, and its confidence threshold
+        replaces confidence_threshold.
+        """
         self.confidence_threshold = confidence_threshold
+        self._extractor = None
+        self.engine = _ocr_engine().get_engine()
+        self.profile = profile or os.environ.get('OCR_PROFILE') or None
+        if self.profile:
+            ocr_engine = _ocr_engine()
+            ocr_engine.load_profile(self.profile)
+            self.confidence_threshold = ocr_engine.PROFILES[self.profile].get('confidence_threshold',
+                                                                              confidence_threshold)
+            logger.info(f"🎛️ Using OCR profile '{self.profile}'")
         logger.info("Initializing PaddleOCR system...")
         
         try:
-            self.ocr = create_pipeline(pipeline="OCR")
+            self.engine.models.load()
             logger.info("✅ PaddleOCR initialized successfully")
         except Exception as e:
             logger.error(f"❌ Failed to initialize PaddleOCR: {e}")
             raise
     
-    def extract_raw_text(self, image_path: str) -> List[Dict[str, Any]]:
-        """Extract raw text from image using PaddleOCR."""
+    def extract_raw_text(self, image_path, progress: Optional[Callable] = None) -> List[Dict[str, Any]]:
+        """Extract raw text from an image path or decoded array as given (no preprocessing)."""
         try:
-            logger.info(f"🔍 Processing image: {image_path}")
-            
-            # Perform OCR
-            results_generator = self.ocr.predict(image_path)
-            results = list(results_generator)
-            
-            if not results:
-                logger.warning("⚠️ No text detected")
-                return []
-            
-            result = results[0]
-            
-            def find_rec_data(obj, depth=0):
-                """Recursively search for rec_texts and rec_scores."""
-                if depth > 3:
-                    return None
-                    
-                if isinstance(obj, dict):
-                    if 'rec_texts' in obj and 'rec_scores' in obj:
-                        return obj
-                    
-                    for value in obj.values():
-                        found = find_rec_data(value, depth + 1)
-                        if found:
-                            return found
-                elif hasattr(obj, '__dict__'):
-                    return find_rec_data(obj.__dict__, depth + 1)
-                
-                return None
-            
-            # Find the data containing rec_texts and rec_scores
-            result_data = find_rec_data(result)
-            
-            if result_data and 'rec_texts' in result_data:
-                texts = result_data['rec_texts']
-                scores = result_data['rec_scores']
-                
-                logger.info(f"📊 Found {len(texts)} text elements")
-                
-                extracted_text = []
-                for i, (text, confidence) in enumerate(zip(texts, scores)):
-                    if confidence >= self.confidence_threshold:
-                        extracted_text.append({
-                            'text': str(text).strip(),
-                            'confidence': float(confidence),
-                            'index': i
-                        })
-                
-                logger.info(f"✅ Extracted {len(extracted_text)} high-confidence text elements")
-                return extracted_text
-            else:
-                logger.error("❌ Could not find rec_texts and rec_scores in result")
-                return []
-                
+            logger.info(f"🔍 Processing image: {_describe(image_path)}")
+            state = self.engine.run(image_path, 'raw', stop='recognize', progress=progress,
+                                    confidence_threshold=self.confidence_threshold)
+            return _elements(state.buffers['text_elements'])
         except Exception as e:
             logger.error(f"❌ OCR extraction failed: {e}")
             return []
-    
+
+    def recognize_lines(self, crops) -> List[Dict[str, Any]]:
+        """
+        Recognition only (no text detection) on single-line crops.
+        Returns one {'text', 'confidence'} per crop; text is None below the confidence threshold.
+        """
+        return self.engine.recognize_crops(crops, self.confidence_threshold)
+
     def extract_student_info(self, text_elements: List[Dict[str, Any]]) -> StudentInfo:
         """Extract student information from text elements."""
         student_info = StudentInfo()
@@ -255,38 +305,153 @@ class MarksCardOCRSystem:
                 division = text
         
         return total_marks, result, division
-    
-    def process_marks_card(self, image_path: str, *, preprocess: bool = True,
-                           do_deskew: bool = True, do_denoise: bool = True,
+
+    def extract_with_template(self, page_gray, template, progress: Optional[Callable] = None) -> MarksCardData:
+        """
+        Read the template's field regions from an upright, cropped grayscale page.
+        "line" fields get recognition only; "block" fields (subjects, summary)
+        run the full OCR pipeline on just their region.
+        """
+        templates = _templates()
+        marks_data = MarksCardData(university=template.university, certificate_type=template.certificate_type)
+        # Expanded once for the recognition model; line crops are views of it
+        page = _ocr_engine().three_channel(page_gray)
+
+        line_fields = [(name, spec) for name, spec in template.fields.items() if spec.get('mode', 'line') == 'line']
+        if line_fields:
+            _emit(progress, 'recognition', fields=len(line_fields))
+            lines = self.recognize_lines([templates.crop_region(page, spec['region']) for _, spec in line_fields])
+            for (name, spec), line in zip(line_fields, lines):
+                value = line['text']
+                if value and spec.get('strip'):
+                    value = re.sub(spec['strip'], '', value, flags=re.IGNORECASE).strip(' :.-·…') or None
+                if value is None:
+                    continue
+                marks_data.all_extracted_text.append({'text': line['text'], 'confidence': line['confidence'],
+                                                      'index': len(marks_data.all_extracted_text), 'field': name})
+                if hasattr(marks_data.student_info, name):
+                    setattr(marks_data.student_info, name, value)
+                elif name in ('university', 'certificate_type', 'total_marks', 'result', 'division'):
+                    setattr(marks_data, name, value)
+            _emit(progress, 'fields', **_partial_fields(marks_data))
+
+        for name, spec in template.fields.items():
+            if spec.get('mode', 'line') != 'block':
+                continue
+            elements = self.extract_raw_text(templates.crop_region(page_gray, spec['region']), progress=progress)
+            marks_data.all_extracted_text.extend(elements)
+            if name == 'subjects':
+                marks_data.subjects = self.extract_subjects(elements)
+                _emit(progress, 'fields', subjects=[asdict(subject) for subject in marks_data.subjects])
+            elif name == 'summary':
+                total_marks, result, division = self.extract_summary_info(elements)
+                marks_data.total_marks = marks_data.total_marks or total_marks
+                marks_data.result = marks_data.result or result
+                marks_data.division = marks_data.division or division
+                _emit(progress, 'fields', total_marks=marks_data.total_marks, result=marks_data.result,
+                      division=marks_data.division)
+
+        return marks_data
+
+    def _process_with_template(self, gray, progress: Optional[Callable] = None
+                               ) -> Tuple[Optional[MarksCardData], Optional[str]]:
+        """
+        Region OCR when the header of the upright grayscale page matches a known layout.
+        Returns (marks_data or None to fall back to full-page OCR, name of the matched template).
+        """
+        registry = _templates().get_registry()
+        if not registry.templates:
+            return None, None
+
+        template = registry.match(gray)
+        if template is None:
+            return None, None
+
+        logger.info(f"🗂️ Layout matches template '{template.name}'")
+        _emit(progress, 'template', template=template.name)
+        marks_data = self.extract_with_template(gray, template, progress=progress)
+        missing = [f for f in template.required if not _field_value(marks_data, f)]
+        if missing:
+            logger.info(f"↩️ Template '{template.name}' missed {missing}, falling back to full-page OCR")
+            return None, template.name
+
+        marks_data.template = marks_data.template_matched = template.name
+        return marks_data, template.name
+
+    def process_marks_card(self, image_path, *, preprocess: bool = True,
+                           do_crop: bool = True, do_deskew: bool = True, do_denoise: bool = True,
                            use_adaptive: bool = True, contrast: bool = True,
-                           temp_dir: Optional[str] = None) -> MarksCardData:
-        """Process complete marks card and return structured data."""
-        logger.info(f"🎯 Processing marks card: {image_path}")
+                           use_templates: bool = True, cascade: bool = False,
+                           temp_dir: Optional[str] = None,
+                           progress: Optional[Callable] = None) -> MarksCardData:
+        """
+        Process complete marks card and return structured data.
+        image_path may also be a decoded BGR array; either way the page is
+        decoded once and preprocessed in memory by the OCR engine (the
+        preprocessed page is written to temp_dir only if one is given). Pages
+        matching a known layout template are read region by region; others
+        get full-page OCR. Seconds per engine stage are on marks_data.timings.
+        With cascade=True the preprocessing flags are ignored and stages are
+        only applied as needed (see process_cascade).
+        progress, if given, is called as progress(stage, data) at each stage
+        transition ('preprocessing', 'detection', 'recognition', 'extraction')
+        and with partial results ('fields').
+        """
+        if cascade:
+            return self.process_cascade(image_path, do_crop=do_crop, use_templates=use_templates, progress=progress)
+
+        logger.info(f"🎯 Processing marks card: {_describe(image_path)}")
+
+        profile, options = 'raw', {}
+        if preprocess and self.profile:
+            profile = self.profile
+        elif preprocess:
+            profile = 'full'
+            options = dict(crop=do_crop, deskew=do_deskew, denoise=do_denoise, adaptive=use_adaptive,
+                           contrast=contrast)
+        try:
+            page = self.engine.run(image_path, profile, stop='normalize', progress=progress,
+                                   confidence_threshold=self.confidence_threshold, **options)
+        except Exception as e:
+            logger.error(f"❌ Could not read image: {e}")
+            return MarksCardData()
 
-        # Optional preprocessing with OpenCV
-        img_for_ocr = image_path
-        if preprocess:
+        template_matched = None
+        if use_templates:
             try:
-                img_for_ocr = preprocess_image(
-                    image_path,
-                    do_deskew=do_deskew,
-                    do_denoise=do_denoise,
-                    use_adaptive=use_adaptive,
-                    contrast=contrast,
-                    output_dir=temp_dir
-                )
-                logger.info(f"🧪 Preprocessed image saved: {img_for_ocr}")
+                marks_data, template_matched = self._process_with_template(page.buffers['gray'], progress=progress)
+                if marks_data is not None:
+                    marks_data.timings = page.timings
+                    return marks_data
             except Exception as e:
-                logger.warning(f"⚠️ Preprocessing failed ({e}), falling back to original image")
-                img_for_ocr = image_path
-        
-        # Extract raw text
-        text_elements = self.extract_raw_text(img_for_ocr)
-        
-        if not text_elements:
+                logger.warning(f"⚠️ Template extraction failed ({e}), falling back to full-page OCR")
+
+        try:
+            state = self.engine.run(page, start='denoise',
+                                    fields=lambda elements: self._structure_or_none(elements, progress))
+        except Exception as e:
+            logger.error(f"❌ OCR extraction failed: {e}")
+            return MarksCardData(template_matched=template_matched)
+        if temp_dir:
+            self._save_preprocessed(state, temp_dir)
+
+        if state.result is None:
             logger.error("❌ No text elements extracted")
-            return MarksCardData()
-        
+        marks_data = state.result or MarksCardData()
+        marks_data.template_matched = template_matched
+        marks_data.timings = {**page.timings, **state.timings}
+        return marks_data
+
+    @staticmethod
+    def _save_preprocessed(state, temp_dir):
+        base = os.path.splitext(os.path.basename(state.source))[0] if isinstance(state.source, str) else 'page'
+        path = os.path.join(temp_dir, f"{base}_preprocessed.png")
+        _preprocessing().save_image(state.buffers['ocr_input'], path)
+        logger.info(f"🧪 Preprocessed image saved: {path}")
+
+    def structure(self, text_elements: List[Dict[str, Any]], progress: Optional[Callable] = None) -> MarksCardData:
+        """Structured marks card fields from full-page text elements."""
+        _emit(progress, 'extraction')
         # Initialize marks card data
         marks_data = MarksCardData()
         marks_data.all_extracted_text = text_elements
@@ -299,13 +464,16 @@ class MarksCardOCRSystem:
         
         # Extract structured information
         marks_data.student_info = self.extract_student_info(text_elements)
+        _emit(progress, 'fields', **_partial_fields(marks_data))
         marks_data.subjects = self.extract_subjects(text_elements)
+        _emit(progress, 'fields', subjects=[asdict(subject) for subject in marks_data.subjects])
         
         # Extract summary information
         total_marks, result, division = self.extract_summary_info(text_elements)
         marks_data.total_marks = total_marks
         marks_data.result = result
         marks_data.division = division
+        _emit(progress, 'fields', total_marks=total_marks, result=result, division=division)
         
         logger.info(f"✅ Extraction complete:")
         logger.info(f"   📚 Student: {marks_data.student_info.name}")
@@ -314,6 +482,129 @@ class MarksCardOCRSystem:
         logger.info(f"   📊 Total Elements: {len(text_elements)}")
         
         return marks_data
+
+    def process_cascade(self, image_path, *, do_crop: bool = True, use_templates: bool = True,
+                        min_confidence: Optional[float] = None,
+                        min_coverage: Optional[float] = None,
+                        progress: Optional[Callable] = None) -> MarksCardData:
+        """
+        Cheapest tier first: the layout template (if any), then OCR of the
+        cropped page as-is, then full preprocessing (denoise, CLAHE, binarize,
+        or the tuned profile's settings), then the same at a higher
+        resolution, then the MarksCardOCRExtractor enhancement and field
+        patterns. Every tier reuses the page decoded and normalized once.
+        The first tier whose mean confidence and required-field coverage (see assess) meet the thresholds wins; if none
+        does, the best attempt is kept. The winning tier and every attempt's
+        scores are recorded on marks_data.tier / marks_data.cascade.
+        """
+        min_confidence = CASCADE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        min_coverage = CASCADE_MIN_COVERAGE if min_coverage is None else min_coverage
+        logger.info(f"🎯 Processing marks card (cascade): {_describe(image_path)}")
+
+        try:
+            page = self.engine.run(image_path, stop='normalize', progress=progress, crop=do_crop,
+                                   confidence_threshold=self.confidence_threshold)
+        except Exception as e:
+            logger.error(f"❌ Could not read image: {e}")
+            return MarksCardData(cascade=[])
+
+        template_matched = None
+
+        def ocr(profile, start='denoise', fields=None, **options):
+            # Each tier continues from the decoded, upright page instead of redoing it
+            fields = fields or (lambda elements: self._structure_or_none(elements, progress))
+            state = self.engine.run(page, profile, start=start, fields=fields, **options)
+            if state.result is not None:
+                state.result.timings = {**page.timings, **state.timings}
+            return state.result
+
+        def template_tier():
+            nonlocal template_matched
+            marks_data, template_matched = self._process_with_template(page.buffers['gray'], progress=progress)
+            if marks_data is not None:
+                marks_data.timings = page.timings
+            return marks_data
+
+        def light_tier():
+            return ocr('light')
+
+        profile = self.profile or 'full'
+        # A tuned profile's crop/deskew/scale were measured by ocr_tuning from
+        # decode on; renormalize the page when they differ from the shared one
+        normalize_params = next(stage.params for stage in self.engine.graph if stage.name == 'normalize')
+        profile_options = _ocr_engine().PROFILES[profile]
+        renormalize = any(profile_options.get(name, page.options[name]) != page.options[name]
+                          for name in normalize_params)
+
+        def full_tier():
+            return ocr(profile, start='normalize' if renormalize else 'denoise')
+
+        def upscaled_tier():
+            scale = min(CASCADE_UPSCALE, CASCADE_UPSCALE_MAX_SIDE / max(page.buffers['gray'].shape[:2]))
+            if scale < 1.25:
+                return None
+            return ocr(profile, start='normalize', scale=scale)
+
+        def extractor_tier():
+            return ocr('extractor', fields=lambda elements: self._structure_with_extractor(elements, progress))
+
+        tiers = [('light', light_tier), ('full', full_tier), ('upscaled', upscaled_tier), ('extractor', extractor_tier)]
+        if use_templates:
+            tiers.insert(0, ('template', template_tier))
+
+        attempts, best, best_score = [], None, None
+        for tier, run in tiers:
+            _emit(progress, 'tier', tier=tier)
+            start = time.perf_counter()
+            try:
+                marks_data = run()
+            except Exception as e:
+                logger.warning(f"⚠️ Cascade tier '{tier}' failed: {e}")
+                marks_data = None
+            seconds = round(time.perf_counter() - start, 3)
+            if marks_data is None:
+                attempts.append({'tier': tier, 'seconds': seconds, 'skipped': True})
+                continue
+
+            quality = assess(marks_data)
+            accepted = quality['mean_confidence'] >= min_confidence and quality['coverage'] >= min_coverage
+            attempts.append({'tier': tier, 'seconds': seconds, 'accepted': accepted, **quality})
+            _emit(progress, 'tier_result', tier=tier, accepted=accepted, **quality)
+            logger.info(f"🪜 Tier '{tier}': confidence {quality['mean_confidence']:.3f}, "
+                        f"coverage {quality['coverage']:.2f}, {seconds}s{' ✅' if accepted else ''}")
+
+            score = (quality['coverage'], quality['mean_confidence'])
+            if best_score is None or score > best_score:
+                best, best_score = (tier, marks_data), score
+            if accepted:
+                break
+
+        tier, marks_data = best if best is not None else (None, MarksCardData())
+        marks_data.tier = tier
+        marks_data.cascade = attempts
+        marks_data.template_matched = template_matched
+        return marks_data
+
+    def _structure_or_none(self, text_elements, progress=None):
+        return self.structure(_elements(text_elements), progress=progress) if text_elements else None
+
+    def _structure_with_extractor(self, text_elements, progress=None) -> Optional[MarksCardData]:
+        """Structure text read through the 'extractor' profile, plus MarksCardOCRExtractor's field patterns."""
+        marks_data = self._structure_or_none(text_elements, progress)
+        if marks_data is None:
+            return None
+        if self._extractor is None:
+            try:
+                from .ocr_extractor import MarksCardOCRExtractor
+            except ImportError:
+                from ocr_extractor import MarksCardOCRExtractor
+            self._extractor = MarksCardOCRExtractor(confidence_threshold=self.confidence_threshold)
+
+        # Its regex field patterns sometimes catch what the line-based rules miss
+        fields = self._extractor.extract_marks_card_fields(text_elements)['student_info']
+        marks_data.student_info.name = marks_data.student_info.name or fields.get('name')
+        marks_data.student_info.roll_number = marks_data.student_info.roll_number or fields.get('roll_number')
+        return marks_data
     
     def save_results(self, marks_data: MarksCardData, output_dir: str = "results"):
         """Save results in multiple formats."""
@@ -357,6 +648,7 @@ class MarksCardOCRSystem:
 
 def main():
     """Main function with command-line interface."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     parser = argparse.ArgumentParser(description='Comprehensive Marks Card OCR System')
     parser.add_argument('image_path', help='Path to the marks card image')
     parser.add_argument('-o', '--output', default='results', help='Output directory')
@@ -368,6 +660,9 @@ def main():
     parser.add_argument('--otsu', action='store_true', help='Use Otsu threshold instead of adaptive')
     parser.add_argument('--no-contrast', action='store_true', help='Disable CLAHE contrast enhancement')
     parser.add_argument('--temp-dir', default=None, help='Directory to store preprocessed image')
+    parser.add_argument('--no-templates', action='store_true', help='Always run full-page OCR, ignoring layout templates')
+    parser.add_argument('--cascade', action='store_true', help='Start with light preprocessing and escalate only on low confidence or missing fields')
+    parser.add_argument('--profile', default=None, help='Tuned OCR profile (see ocr_tuning.py); overrides the preprocessing flags and --confidence')
     
     args = parser.parse_args()
     
@@ -377,7 +672,7 @@ def main():
     
     try:
         # Initialize OCR system
-        ocr_system = MarksCardOCRSystem(confidence_threshold=args.confidence)
+        ocr_system = MarksCardOCRSystem(confidence_threshold=args.confidence, profile=args.profile)
         
         # Process marks card
         marks_data = ocr_system.process_marks_card(
@@ -387,6 +682,8 @@ def main():
             do_denoise=not args.no_denoise,
             use_adaptive=not args.otsu,
             contrast=not args.no_contrast,
+            use_templates=not args.no_templates,
+            cascade=args.cascade,
             temp_dir=args.temp_dir
         )
         
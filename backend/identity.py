@@ -0,0 +1,160 @@
+"""
+Identity lookups for JWT-authenticated endpoints.
+
+current_identity() answers "who is calling and what may they do" without
+touching the users table on most requests: the role comes from the JWT's
+role claim, and the user's existence and status come from a small
+per-process TTL cache keyed by user id. current_user() loads the full User
+row for handlers that need profile fields. Both are memoized on flask.g,
+so each request pays at most one lookup.
+
+Cached entries are dropped when a commit changes a user's role, status,
+profile or password (see the SQLAlchemy listeners below), and they expire
+after USER_CACHE_TTL_SECONDS in any case.
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+from flask import current_app, g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models import User
+
+DEFAULT_TTL_SECONDS = 30
+MAX_ENTRIES = 10000
+
+# Columns whose change must be visible to the next request straight away
+WATCHED_COLUMNS = (
+    'role', 'is_active', 'is_approved', 'is_verified', 'password_hash',
+    'full_name', 'email', 'phone', 'updated_at',
+)
+
+
+@dataclass(frozen=True)
+class Identity:
+    id: str
+    role: str
+    is_active: bool
+    is_approved: bool
+
+
+class _TTLCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            if len(self._data) >= self.max_entries and key not in self._data:
+                # Drop the oldest entry (dicts keep insertion order)
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+user_status_cache = _TTLCache()
+
+
+def _ttl():
+    return current_app.config.get('USER_CACHE_TTL_SECONDS', DEFAULT_TTL_SECONDS)
+
+
+def _identity_of(user):
+    return Identity(id=user.id, role=user.role, is_active=bool(user.is_active), is_approved=bool(user.is_approved))
+
+
+def invalidate_user(user_id):
+    """Forget the cached status of a user (done automatically on commit)"""
+    user_status_cache.delete(user_id)
+
+
+def _load_identity(user_id):
+    cached = user_status_cache.get(user_id)
+    if cached is not None:
+        return cached
+    row = User.query.with_entities(User.id, User.role, User.is_active, User.is_approved).filter_by(id=user_id).first()
+    if row is None:
+        return None
+    identity = _identity_of(row)
+    user_status_cache.set(user_id, identity, _ttl())
+    return identity
+
+
+def current_identity():
+    """
+    Identity of the JWT's user, or None when there is no token or the user no
+    longer exists. The role claim in the token is trusted for authorization.
+    """
+    if '_identity' not in g:
+        user_id = get_jwt_identity()
+        identity = _load_identity(user_id) if user_id else None
+        role = get_jwt().get('role') if identity else None
+        if role and role != identity.role:
+            identity = Identity(id=identity.id, role=role, is_active=identity.is_active,
+                                is_approved=identity.is_approved)
+        g._identity = identity
+    return g._identity
+
+
+def current_user():
+    """Full User row of the JWT's user (or None), loaded once per request"""
+    if '_current_user' not in g:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id) if user_id else None
+        if user is not None:
+            user_status_cache.set(user.id, _identity_of(user), _ttl())
+        g._current_user = user
+    return g._current_user
+
+
+# Invalidation: remember users whose watched columns were flushed and drop
+# their cache entries once the transaction commits (dropping them at flush
+# time would let a concurrent request re-cache the old row before commit)
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[column].history.has_changes() for column in WATCHED_COLUMNS):
+        session = state.session
+        if session is not None:
+            session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session):
+    session.info.pop('changed_user_ids', None)
@@ -64,6 +64,42 @@ def migrate_database():
         if conn:
             conn.close()
 
+def migrate_documents():
+    """Add the OCR job status column to the documents table"""
+    
+    db_path = Path("instance/credential_kavach.db")
+    
+    if not db_path.exists():
+        return
+    
+    conn = None
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute("PRAGMA table_info(documents)")
+        columns = [column[1] for column in cursor.fetchall()]
+        
+        if 'ocr_status' in columns:
+            print("Document OCR status already exists in database.")
+            conn.close()
+            return
+        
+        cursor.execute("ALTER TABLE documents ADD COLUMN ocr_status VARCHAR(20)")
+        # Rows from before the column existed: OCR has finished one way or the other
+        cursor.execute("UPDATE documents SET ocr_status = 'failed' "
+                       "WHERE json_type(ocr_data, '$.error') IS NOT NULL")
+        cursor.execute("UPDATE documents SET ocr_status = 'done' "
+                       "WHERE json_type(ocr_data) != 'null' AND ocr_status IS NULL")
+        conn.commit()
+        print("Added documents.ocr_status.")
+        conn.close()
+        
+    except Exception as e:
+        print(f"Document migration failed: {e}")
+        if conn:
+            conn.close()
+
 def backup_database():
     """Create a backup of the current database"""
     db_path = Path("instance/credential_kavach.db")
@@ -88,5 +124,6 @@ if __name__ == "__main__":
     
     # Run migration
     migrate_database()
+    migrate_documents()
     
     print("\nMigration complete. You can now start the Flask app.")
\ No newline at end of file
@@ -81,6 +81,7 @@ class Document(db.Model):
     # OCR extracted data
     ocr_data = db.Column(db.JSON)
     extracted_text = db.Column(db.Text)
+    ocr_status = db.Column(db.String(20))  # queued, running, done, failed (None when no OCR job)
     
     # Verification status
     status = db.Column(db.String(50), default='pending')  # pending, verified, rejected
@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+OCR engine
+==========
+The single OCR pipeline behind both front ends, final_ocr_system.MarksCardOCRSystem
+and ocr_extractor.MarksCardOCRExtractor. It is a declarative graph of stages:
+
+    decode → normalize → denoise → enhance → detect → recognize → extract
+
+Each stage reads and sets named buffers on a PageState (GRAPH lists what
+every stage requires and provides, and OCREngine checks the graph once when
+it is built). Buffers are NumPy arrays handed from stage to stage as they
+are: the page is decoded once, turned grayscale once and only expanded to
+the three channels the Paddle models expect at the detect stage.
+
+Stages are pluggable: implementations register under (stage, variant) with
+@implements, and a run picks one variant per stage from its options (the
+option named after the stage; unset or True is 'default', False is
+'none'). PROFILES bundle the
+option sets the front ends use, e.g. 'full' is preprocessing.py's
+deskew/denoise/CLAHE/binarize chain and 'extractor' is the contrast and
+sharpen enhancement MarksCardOCRExtractor used to do through PIL.
+
+The detect and recognize stages run paddlex's OCR pipeline (OCR_PIPELINE,
+default 'OCR'), as the front ends always have: its document orientation
+preprocessing, text detection, text-line orientation classification and
+recognition all run inside detect, and recognize applies the confidence
+threshold to its lines. Template line fields, which are already single
+upright lines, go to a recognition model alone (recognize_crops;
+OCR_REC_MODEL, default PP-OCRv4_mobile_rec).
+
+Every stage is timed; the seconds per stage are on PageState.timings and are
+stored with each OCR result (see ocr_workers.compact_result).
+
+Preprocessing stages (decode through enhance) are memoized when the engine
+has a StageMemo (see stage_memo): each one's output is keyed by the input's
+content hash and the variant and params of every stage up to it, so a
+sweep over preprocessing settings recomputes only from the first stage
+whose settings changed. Stages never write into their input buffers, which
+is what makes sharing memoized buffers safe.
+
+Tuned profiles (see ocr_tuning) are JSON files in ocr_profiles/ (or
+OCR_PROFILE_DIR) and are loaded by name with load_profile.
+
+    python ocr_engine.py sample_marks_cards/1.png --profile full --stop enhance
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PIPELINE = 'OCR'
+DEFAULT_REC_MODEL = 'PP-OCRv4_mobile_rec'
+REC_BATCH_SIZE = 8
+
+DEFAULT_OPTIONS = {
+    'crop': True,
+    'deskew': True,
+    'scale': 1.0,
+    'enhance': 'binarize',
+    'denoise': True,
+    'denoise_h': 12,
+    'contrast': True,
+    'clip_limit': 3.0,
+    'adaptive': True,
+    'confidence_threshold': 0.5,
+    'textline_orientation': True,  # the pipeline turns upside-down / rotated text lines
+    'fields': None,  # callable(text_elements) -> result, run by the extract stage
+}
+
+PROFILES = {
+    # Upright page as scanned (cascade 'light' tier)
+    'light': {'denoise': False, 'enhance': 'none'},
+    # preprocessing.py's chain (MarksCardOCRSystem default, cascade 'full' tier)
+    'full': {'enhance': 'binarize'},
+    # MarksCardOCRExtractor: contrast + sharpen, local threshold, no page crop
+    'extractor': {'crop': False, 'denoise': False, 'enhance': 'extractor'},
+    # Image given as-is: a region of an upright page, or --no-preprocess
+    'raw': {'crop': False, 'deskew': False, 'denoise': False, 'enhance': 'none'},
+}
+BUILTIN_PROFILES = frozenset(PROFILES)
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ocr_profiles')
+
+
+def _profile_path(name):
+    if not re.fullmatch(r'[\w.-]+', name):
+        raise ValueError(f"Invalid profile name '{name}'")
+    return os.path.join(os.environ.get('OCR_PROFILE_DIR', PROFILE_DIR), f'{name}.json')
+
+
+def _check_options(options):
+    unknown = sorted(set(options) - set(DEFAULT_OPTIONS) - {stage.name for stage in GRAPH})
+    if unknown:
+        raise ValueError(f"Unknown engine options {unknown}")
+
+
+def load_profile(name):
+    """
+    Make a profile usable by name: built-in ones are already, tuned ones are
+    read from the profile directory and registered in PROFILES. Returns name.
+    """
+    if name in PROFILES:
+        return name
+    path = _profile_path(name)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            options = json.load(f)['options']
+    except FileNotFoundError:
+        raise ValueError(f"No OCR profile '{name}' (looked for {path})")
+    _check_options(options)
+    PROFILES[name] = options
+    logger.info(f"Loaded OCR profile '{name}' from {path}")
+    return name
+
+
+def save_profile(name, options, **metadata):
+    """Write a tuned profile (options plus any metadata) to the profile directory and register it"""
+    if name in BUILTIN_PROFILES:
+        raise ValueError(f"'{name}' is a built-in profile")
+    _check_options(options)
+    path = _profile_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'name': name, 'options': options, **metadata}, f, indent=2)
+    PROFILES[name] = dict(options)
+    return path
+
+
+def _preprocessing():
+    try:
+        from . import preprocessing
+    except ImportError:
+        import preprocessing
+    return preprocessing
+
+
+class Stage:
+    def __init__(self, name, requires=(), provides=(), params=(), event=None, memo=False):
+        self.name = name
+        self.requires = tuple(requires)
+        self.provides = tuple(provides)
+        self.params = tuple(params)  # options the stage's output depends on (besides its variant)
+        self.event = event  # progress event reported when the stage starts (once per run)
+        self.memo = memo  # outputs may be memoized (their key covers everything they depend on)
+
+
+GRAPH = (
+    Stage('decode', provides=('image',), memo=True),
+    Stage('normalize', requires=('image',), provides=('gray',), params=('crop', 'scale', 'deskew'), memo=True),
+    Stage('denoise', requires=('gray',), provides=('denoised',), params=('denoise_h',), event='preprocessing',
+          memo=True),
+    Stage('enhance', requires=('gray', 'denoised'), provides=('ocr_input',),
+          params=('contrast', 'clip_limit', 'adaptive'), event='preprocessing', memo=True),
+    Stage('detect', requires=('ocr_input',), provides=('model_input', 'lines'), event='detection'),
+    Stage('recognize', requires=('lines',), provides=('text_elements',)),
+    Stage('extract', requires=('text_elements',), provides=('result',)),
+)
+
+_implementations = {}
+
+
+def _variant(value):
+    if value is None or value is True:
+        return 'default'
+    return 'none' if value is False else value
+
+
+def input_key(source):
+    """Content hash of an image file or array, the root of the memo keys"""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    else:
+        digest.update(f'{source.shape}{source.dtype}'.encode())
+        digest.update(memoryview(source.tobytes() if not source.flags.c_contiguous else source).cast('B'))
+    return digest.hexdigest()
+
+
+def stage_key(previous, stage, variant, options):
+    """Memo key of a stage's output: its input's key plus its own variant and params"""
+    params = repr(tuple(options[name] for name in stage.params))
+    return hashlib.blake2b(f'{previous}|{stage.name}|{variant}|{params}'.encode(), digest_size=16).hexdigest()
+
+
+def implements(stage, variant='default'):
+    """Register a function of a PageState as one variant of a stage"""
+    def register(func):
+        _implementations[(stage, variant)] = func
+        return func
+    return register
+
+
+class PageState:
+    """Buffers, options and per-stage timings of one run over one page"""
+
+    def __init__(self, source, options, progress=None):
+        self.source = source
+        self.options = options
+        self.progress = progress
+        self.buffers = {}
+        self.timings = {}
+        self.costs = {}  # seconds each stage took to compute, now or when it was memoized
+        self.keys = {}  # stage -> memo key of its output
+        self.memo_hits = []
+        self.engine = None
+
+    @property
+    def result(self):
+        return self.buffers.get('result')
+
+    def fork(self, options=None, progress=None):
+        """
+        A new run continuing from this state's buffers (shared, not copied),
+        with options overridden; the fork's timings cover only its own stages
+        """
+        state = PageState(self.source, {**self.options, **(options or {})}, progress or self.progress)
+        state.buffers = dict(self.buffers)
+        state.keys = dict(self.keys)
+        return state
+
+    def emit(self, stage, **data):
+        if self.progress is not None:
+            try:
+                self.progress(stage, data)
+            except Exception as e:
+                logger.warning(f"⚠️ Progress callback failed: {e}")
+
+
+class Models:
+    """paddlex's OCR pipeline and a line recognition model, loaded on first use"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pipeline = None
+        self._recognizer = None
+
+    def load(self):
+        return self.pipeline
+
+    @property
+    def pipeline(self):
+        with self._lock:
+            if self._pipeline is None:
+                from paddlex import create_pipeline
+                self._pipeline = create_pipeline(pipeline=os.environ.get('OCR_PIPELINE', DEFAULT_PIPELINE))
+            return self._pipeline
+
+    @property
+    def recognizer(self):
+        with self._lock:
+            if self._recognizer is None:
+                from paddlex import create_model
+                self._recognizer = create_model(model_name=os.environ.get('OCR_REC_MODEL', DEFAULT_REC_MODEL))
+            return self._recognizer
+
+
+class OCREngine:
+    def __init__(self, graph=GRAPH, models=None, memo=None):
+        provided = set()
+        for stage in graph:
+            missing = [name for name in stage.requires if name not in provided]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' requires {missing}, which no earlier stage provides")
+            provided.update(stage.provides)
+        self.graph = tuple(graph)
+        self.models = models or Models()
+        self.memo = memo
+        # Paddle predictors are not safe to call from several threads at once,
+        # and get_engine() shares one engine (and its models) per process
+        self._inference_lock = threading.Lock()
+
+    def run(self, source, profile=None, *, start=None, stop=None, progress=None, **options):
+        """
+        Run the stages from start through stop (default: the whole graph).
+        source is an image path, a decoded array, or a PageState from an
+        earlier run to continue from (its buffers are reused, its options
+        overridden by profile and options). Returns the PageState; stages
+        served from the memo are listed in its memo_hits, and its costs give
+        what they took to compute in the first place.
+        """
+        overrides = {**PROFILES[profile], **options} if profile else options
+        if isinstance(source, PageState):
+            state = source.fork(overrides, progress)
+        else:
+            state = PageState(source, {**DEFAULT_OPTIONS, **overrides}, progress)
+        state.engine = self
+
+        names = [stage.name for stage in self.graph]
+        first = names.index(start) if start else 0
+        last = names.index(stop) if stop else len(names) - 1
+        key = None
+        if self.memo is not None:
+            key = input_key(state.source) if first == 0 else state.keys.get(names[first - 1])
+        emitted = set()
+        for stage in self.graph[first:last + 1]:
+            missing = [name for name in stage.requires if name not in state.buffers]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs {missing}; run the earlier stages first")
+            variant = _variant(state.options.get(stage.name))
+            func = _implementations.get((stage.name, variant))
+            if func is None:
+                raise ValueError(f"No '{variant}' implementation of stage '{stage.name}'")
+            if stage.event and variant != 'none' and stage.event not in emitted:
+                emitted.add(stage.event)
+                state.emit(stage.event)
+            began = time.perf_counter()
+            key = stage_key(key, stage, variant, state.options) if key is not None and stage.memo else None
+            cached = self.memo.get(key) if key is not None else None
+            if cached is not None:
+                cached = dict(cached)
+                state.costs[stage.name] = cached.pop('_seconds', 0.0)
+                state.buffers.update(cached)
+                state.memo_hits.append(stage.name)
+            else:
+                inputs = [state.source] + [state.buffers[name] for name in stage.requires]
+                func(state)
+                outputs = {name: state.buffers[name] for name in stage.provides}
+                # Buffers passed through unchanged (a caller's array, a 'none' variant) cost
+                # nothing to recompute and must not be pinned by the memo
+                state.costs[stage.name] = round(time.perf_counter() - began, 4)
+                if key is not None and not all(any(out is i for i in inputs) for out in outputs.values()):
+                    self.memo.put(key, {**outputs, '_seconds': state.costs[stage.name]})
+            if key is not None:
+                state.keys[stage.name] = key
+            state.timings[stage.name] = round(time.perf_counter() - began, 4)
+            logger.debug(f"⏱️ {stage.name}[{variant}]: {state.timings[stage.name]}s")
+        return state
+
+    def recognize_crops(self, crops, confidence_threshold=0.5):
+        """
+        Recognition only on single-line crops (3-channel). One {'text', 'confidence'}
+        per crop; text is None below the confidence threshold.
+        """
+        lines = []
+        if not crops:
+            return lines
+        recognizer = self.models.recognizer
+        with self._inference_lock:
+            results = list(recognizer.predict(crops, batch_size=REC_BATCH_SIZE))
+        for result in results:
+            text, confidence = str(result['rec_text']).strip(), float(result['rec_score'])
+            lines.append({'text': text if text and confidence >= confidence_threshold else None,
+                          'confidence': confidence})
+        return lines
+
+    def read_page(self, image, textline_orientation=True):
+        """[(polygon, text, score)] of every line the OCR pipeline reads in one 3-channel image"""
+        pipeline = self.models.pipeline
+        with self._inference_lock:
+            result = next(iter(pipeline.predict(image, use_textline_orientation=textline_orientation)), None)
+        if result is None:
+            return []
+        polys = result.get('rec_polys')
+        if polys is None:
+            polys = result.get('dt_polys', [])
+        return [(poly, str(text).strip(), float(score))
+                for poly, text, score in zip(polys, result['rec_texts'], result['rec_scores'])]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """This process's engine; every front end shares it and its models"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            try:
+                from .stage_memo import memo_from_env
+            except ImportError:
+                from stage_memo import memo_from_env
+            _engine = OCREngine(memo=memo_from_env())
+        return _engine
+
+
+# --- Stage implementations -------------------------------------------------
+
+@implements('decode')
+def decode(state):
+    source = state.source
+    state.buffers['image'] = _preprocessing().read_image(source) if isinstance(source, str) else source
+
+
+@implements('normalize')
+def normalize(state):
+    """Crop to the page, grayscale, rescale, deskew"""
+    import cv2
+
+    preprocessing = _preprocessing()
+    options = state.options
+    page = state.buffers['image']
+    if options['crop']:
+        page = preprocessing.crop_document(page)
+    gray = preprocessing.to_grayscale(page)
+    if options['scale'] != 1.0:
+        interpolation = cv2.INTER_CUBIC if options['scale'] > 1.0 else cv2.INTER_AREA
+        gray = cv2.resize(gray, None, fx=options['scale'], fy=options['scale'], interpolation=interpolation)
+    if options['deskew']:
+        gray = preprocessing.deskew(gray)
+    state.buffers['gray'] = gray
+
+
+@implements('denoise')
+def denoise(state):
+    state.buffers['denoised'] = _preprocessing().denoise(state.buffers['gray'], h=state.options['denoise_h'])
+
+
+@implements('denoise', 'none')
+def denoise_none(state):
+    state.buffers['denoised'] = state.buffers['gray']
+
+
+@implements('enhance', 'none')
+def enhance_none(state):
+    state.buffers['ocr_input'] = state.buffers['gray']
+
+
+@implements('enhance')
+@implements('enhance', 'binarize')
+def enhance_binarize(state):
+    """CLAHE and adaptive (or Otsu) threshold of the denoised page"""
+    preprocessing = _preprocessing()
+    options = state.options
+    gray = state.buffers['denoised']
+    if options['contrast']:
+        gray = preprocessing.enhance_contrast(gray, clip_limit=options['clip_limit'])
+    state.buffers['ocr_input'] = preprocessing.binarize(gray, method='adaptive' if options['adaptive'] else 'otsu')
+
+
+@implements('enhance', 'extractor')
+def enhance_extractor(state):
+    """
+    PIL ImageEnhance.Contrast(1.5) and Sharpness(1.2), then an 11px Gaussian
+    adaptive threshold, done on the grayscale buffer with OpenCV
+    """
+    import cv2
+    import numpy as np
+
+    gray = state.buffers['gray']
+    # Contrast: stretch around the mean grey level
+    stretched = cv2.addWeighted(gray, 1.5, gray, 0.0, -0.5 * float(gray.mean()))
+    # Sharpness: push away from PIL's SMOOTH kernel
+    smooth = cv2.filter2D(stretched, -1, np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], np.float32) / 13)
+    sharpened = cv2.addWeighted(stretched, 1.2, smooth, -0.2, 0.0)
+    state.buffers['ocr_input'] = cv2.adaptiveThreshold(sharpened, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                                       cv2.THRESH_BINARY, 11, 2)
+
+
+def three_channel(image):
+    """The Paddle models take 3-channel input; 1-channel buffers are expanded once"""
+    import cv2
+    return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if image.ndim == 2 else image
+
+
+@implements('detect')
+def detect(state):
+    """Detection, text-line orientation and recognition: one pass of the OCR pipeline"""
+    model_input = three_channel(state.buffers['ocr_input'])
+    state.buffers['model_input'] = model_input
+    state.buffers['lines'] = state.engine.read_page(model_input, state.options['textline_orientation'])
+
+
+@implements('recognize')
+def recognize(state):
+    import numpy as np
+
+    lines = state.buffers['lines']
+    threshold = state.options['confidence_threshold']
+    text_elements = [
+        {'text': text, 'confidence': score, 'index': i,
+         'bbox': np.asarray(poly, dtype=np.float32).reshape(-1, 2).round(1).tolist()}
+        for i, (poly, text, score) in enumerate(lines) if text and score >= threshold
+    ]
+    state.buffers['text_elements'] = text_elements
+    logger.info(f"✅ Recognized {len(text_elements)} of {len(lines)} text lines")
+    state.emit('recognition', text_elements=len(text_elements))
+
+
+@implements('extract')
+def extract(state):
+    fields = state.options['fields']
+    elements = state.buffers['text_elements']
+    state.buffers['result'] = fields(elements) if fields is not None else elements
+
+
+def main():
+    logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Run the OCR stage graph on an image and report stage timings')
+    parser.add_argument('image_path')
+    parser.add_argument('--profile', default='full', help=f"Built-in ({', '.join(sorted(PROFILES))}) or tuned profile")
+    parser.add_argument('--stop', choices=[stage.name for stage in GRAPH], default=None,
+                        help='Last stage to run (e.g. enhance to skip the models)')
+    parser.add_argument('--save', default=None, help='Write the enhanced page here')
+    args = parser.parse_args()
+
+    state = get_engine().run(args.image_path, load_profile(args.profile), stop=args.stop)
+    for name, seconds in state.timings.items():
+        print(f"{name:<10} {seconds * 1000:9.1f} ms")
+    if args.save and 'ocr_input' in state.buffers:
+        print(_preprocessing().save_image(state.buffers['ocr_input'], args.save))
+    for item in state.buffers.get('text_elements', []):
+        print(f"{item['confidence']:.3f}  {item['text']}")
+
+
+if __name__ == '__main__':
+    main()
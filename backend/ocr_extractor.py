@@ -8,77 +8,72 @@ from marks cards with high accuracy and error handling.
 
 import os
 import sys
-import cv2
 import json
 import numpy as np
-import pandas as pd
 from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
 import re
 from datetime import datetime
 import logging
-from PIL import Image, ImageEnhance, ImageFilter
-from paddleocr import PaddleOCR
 import warnings
 
-# Suppress warnings for cleaner output
-warnings.filterwarnings("ignore")
+# The OCR engine (and with it paddlex and OpenCV) and pandas are imported where
+# they are used, so importing this module stays cheap for processes that never run OCR
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('ocr_extractor.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
+def configure_logging():
+    """Log to ocr_extractor.log and stdout (command line use)"""
+    # Suppress warnings for cleaner output
+    warnings.filterwarnings("ignore")
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('ocr_extractor.log'),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+
+
 class MarksCardOCRExtractor:
     """
     A comprehensive OCR extractor specifically designed for marks cards.
     Provides image preprocessing, text extraction, and structured data output.
+    Preprocessing and OCR run on the shared engine (see ocr_engine) with its
+    'extractor' profile by default.
     """
     
     def __init__(self, 
                  lang: str = 'en',
                  use_angle_cls: bool = True,
                  use_gpu: bool = False,
-                 confidence_threshold: float = 0.5):
+                 confidence_threshold: float = 0.5,
+                 profile: str = 'extractor'):
         """
         Initialize the OCR extractor.
         
         Args:
-            lang: Language for OCR recognition ('en' for English)
-            use_angle_cls: Whether to use angle classification
-            use_gpu: Whether to use GPU acceleration (may not be supported in all versions)
+            lang: Language for OCR recognition ('en' for English); the pipeline
+                itself is chosen with OCR_PIPELINE
+            use_angle_cls: Whether to use text-line orientation classification
+            use_gpu: Kept for compatibility; the engine runs on paddlex's default device
             confidence_threshold: Minimum confidence score for text detection
+            profile: OCR engine profile; a tuned profile (see ocr_tuning.py)
+                also brings its own confidence threshold
         """
         self.confidence_threshold = confidence_threshold
         self.lang = lang
+        self.use_angle_cls = use_angle_cls
         
         try:
-            # Initialize PaddleOCR with minimal compatible parameters
-            # Start with basic parameters that are widely supported
-            ocr_params = {}
-            
-            # Add parameters one by one, handling compatibility issues
-            if lang:
-                ocr_params['lang'] = lang
-            
-            # Try angle classification if supported
-            try:
-                self.ocr = PaddleOCR(use_angle_cls=use_angle_cls, **ocr_params)
-            except (TypeError, ValueError):
-                # Fallback to basic initialization
-                try:
-                    self.ocr = PaddleOCR(**ocr_params)
-                except:
-                    # Ultimate fallback - basic PaddleOCR
-                    self.ocr = PaddleOCR()
+            from ocr_engine import PROFILES, get_engine, load_profile
             
+            self.profile = load_profile(profile)
+            self.confidence_threshold = PROFILES[profile].get('confidence_threshold', confidence_threshold)
+            self.engine = get_engine()
+            self.engine.models.load()
             logger.info(f"PaddleOCR initialized successfully with language: {lang}")
         except Exception as e:
             logger.error(f"Failed to initialize PaddleOCR: {str(e)}")
@@ -136,202 +131,44 @@ class MarksCardOCRExtractor:
         Preprocess the input image to improve OCR accuracy.
         
         Args:
-            image_path: Path to the input image
+            image_path: Path to the input image (or a decoded array)
             
         Returns:
             Preprocessed image as numpy array
         """
         try:
-            # Read image
-            if isinstance(image_path, str):
-                image = cv2.imread(image_path)
-            else:
-                image = image_path
-                
-            if image is None:
-                raise ValueError(f"Could not load image from {image_path}")
-            
-            # Convert to PIL Image for better preprocessing
-            pil_image = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
-            
-            # Enhance contrast
-            enhancer = ImageEnhance.Contrast(pil_image)
-            pil_image = enhancer.enhance(1.5)
-            
-            # Enhance sharpness
-            enhancer = ImageEnhance.Sharpness(pil_image)
-            pil_image = enhancer.enhance(1.2)
-            
-            # Convert back to OpenCV format
-            image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Apply Gaussian blur to reduce noise
-            blurred = cv2.GaussianBlur(gray, (1, 1), 0)
-            
-            # Apply adaptive thresholding
-            thresh = cv2.adaptiveThreshold(
-                blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                cv2.THRESH_BINARY, 11, 2
-            )
-            
-            # Morphological operations to clean up the image
-            kernel = np.ones((1, 1), np.uint8)
-            cleaned = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-            
-            # Deskew the image
-            cleaned = self._deskew_image(cleaned)
-            
+            state = self.engine.run(image_path, self.profile, stop='enhance')
             logger.info("Image preprocessing completed successfully")
-            return cleaned
+            return state.buffers['ocr_input']
             
         except Exception as e:
             logger.error(f"Error in image preprocessing: {str(e)}")
             raise
 
-    def _deskew_image(self, image: np.ndarray) -> np.ndarray:
-        """
-        Correct image skew by detecting text orientation.
-        
-        Args:
-            image: Input image as numpy array
-            
-        Returns:
-            Deskewed image
-        """
-        try:
-            # Find all contours
-            contours, _ = cv2.findContours(image, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            if not contours:
-                return image
-            
-            # Find the largest contour (assuming it's the document)
-            largest_contour = max(contours, key=cv2.contourArea)
-            
-            # Get the minimum area rectangle
-            rect = cv2.minAreaRect(largest_contour)
-            angle = rect[2]
-            
-            # Adjust angle for proper rotation
-            if angle < -45:
-                angle = -(90 + angle)
-            else:
-                angle = -angle
-            
-            # Only rotate if angle is significant
-            if abs(angle) > 0.5:
-                height, width = image.shape[:2]
-                center = (width // 2, height // 2)
-                rotation_matrix = cv2.getRotationMatrix2D(center, angle, 1.0)
-                rotated = cv2.warpAffine(image, rotation_matrix, (width, height), 
-                                       flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
-                return rotated
-            
-            return image
-            
-        except Exception as e:
-            logger.warning(f"Deskewing failed, using original image: {str(e)}")
-            return image
-
     def extract_text(self, image_path: str) -> List[Dict[str, Any]]:
         """
         Extract text from the image using PaddleOCR.
         
         Args:
-            image_path: Path to the input image
+            image_path: Path to the input image (or a decoded array)
             
         Returns:
             List of detected text with confidence scores and bounding boxes
         """
         try:
-            # Preprocess image
-            processed_image = self.preprocess_image(image_path)
-            
-            # Perform OCR using the recommended method
-            try:
-                # Try the newer predict method first
-                if hasattr(self.ocr, 'predict'):
-                    results = self.ocr.predict(processed_image)
-                else:
-                    results = self.ocr.ocr(processed_image)
-            except Exception as e:
-                logger.warning(f"OCR method failed: {e}, trying fallback")
-                try:
-                    results = self.ocr.ocr(processed_image)
-                except:
-                    results = self.ocr.predict(processed_image)
+            state = self.engine.run(image_path, self.profile, stop='recognize',
+                                    confidence_threshold=self.confidence_threshold,
+                                    textline_orientation=self.use_angle_cls)
             
-            # Debug: Log the structure of results
-            logger.info(f"OCR results structure - Type: {type(results)}, Length: {len(results) if results else 0}")
-            
-            if not results:
+            extracted_text = [
+                {'text': item['text'], 'confidence': item['confidence'], 'bbox': item['bbox']}
+                for item in state.buffers['text_elements']
+            ]
+            if not extracted_text:
                 logger.warning("No text detected in the image")
-                return []
             
-            # Process results - Handle new PaddleOCR structure
-            extracted_text = []
-            
-            # Get the first result (should be OCRResult object)
-            result = results[0]
-            
-            # Handle different result types
-            if hasattr(result, 'rec_texts') and hasattr(result, 'rec_scores'):
-                # New PaddleOCR structure with OCRResult object
-                texts = result.rec_texts
-                scores = result.rec_scores
-                bboxes = result.rec_polys if hasattr(result, 'rec_polys') else [[] for _ in texts]
-                
-                for i, (text, confidence) in enumerate(zip(texts, scores)):
-                    # Filter by confidence threshold
-                    if confidence >= self.confidence_threshold:
-                        bbox = bboxes[i] if i < len(bboxes) else []
-                        extracted_text.append({
-                            'text': str(text).strip(),
-                            'confidence': float(confidence),
-                            'bbox': bbox.tolist() if hasattr(bbox, 'tolist') else bbox
-                        })
-                        
-            else:
-                # Fallback for older structure (list of lists)
-                try:
-                    if isinstance(result, list):
-                        for line in result:
-                            if line is None:
-                                continue
-                            
-                            try:
-                                # Handle different line structures
-                                if len(line) == 2:
-                                    bbox, text_info = line
-                                    if isinstance(text_info, (list, tuple)) and len(text_info) == 2:
-                                        text, confidence = text_info
-                                    else:
-                                        text = str(text_info)
-                                        confidence = 1.0
-                                else:
-                                    bbox = line[0] if len(line) > 0 else []
-                                    text = line[1] if len(line) > 1 else ""
-                                    confidence = line[2] if len(line) > 2 else 1.0
-                                
-                                # Filter by confidence threshold
-                                if confidence >= self.confidence_threshold:
-                                    extracted_text.append({
-                                        'text': str(text).strip(),
-                                        'confidence': float(confidence),
-                                        'bbox': bbox
-                                    })
-                                    
-                            except Exception as e:
-                                logger.warning(f"Error processing OCR result line: {e}")
-                                continue
-                except Exception as e:
-                    logger.error(f"Error processing OCR results: {e}")
-                    return []
-            
-            logger.info(f"Successfully extracted {len(extracted_text)} text elements")
+            logger.info(f"Successfully extracted {len(extracted_text)} text elements "
+                        f"(stage seconds: {state.timings})")
             return extracted_text
             
         except Exception as e:
@@ -531,6 +368,8 @@ class MarksCardOCRExtractor:
                     
             elif format.lower() == 'csv':
                 # Flatten the data for CSV format
+                import pandas as pd
+                
                 flattened_data = self._flatten_data(data)
                 df = pd.DataFrame([flattened_data])
                 df.to_csv(output_path, index=False)
@@ -605,6 +444,8 @@ def main():
     """Main function for command line usage."""
     import argparse
     
+    configure_logging()
+    
     parser = argparse.ArgumentParser(description='OCR Text Extractor for Marks Cards')
     parser.add_argument('image_path', help='Path to the marks card image')
     parser.add_argument('-o', '--output', help='Output file path')
@@ -614,6 +455,8 @@ def main():
     parser.add_argument('-c', '--confidence', type=float, default=0.5,
                        help='Confidence threshold (default: 0.5)')
     parser.add_argument('--gpu', action='store_true', help='Use GPU acceleration')
+    parser.add_argument('-p', '--profile', default='extractor',
+                       help='OCR profile, e.g. one written by ocr_tuning.py (default: extractor)')
     
     args = parser.parse_args()
     
@@ -622,7 +465,8 @@ def main():
         extractor = MarksCardOCRExtractor(
             lang=args.lang,
             use_gpu=args.gpu,
-            confidence_threshold=args.confidence
+            confidence_threshold=args.confidence,
+            profile=args.profile
         )
         
         # Process marks card
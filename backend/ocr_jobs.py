@@ -0,0 +1,251 @@
+"""
+Background OCR jobs with server-sent progress events.
+
+An upload saves the document, starts an OCR job and returns straight away;
+the job runs on a small thread pool (OCR itself happens in the worker pool
+when OCR_WORKER_ADDRESS is set, see ocr_workers.py) and writes the result to
+Document.ocr_data when it finishes. Every stage transition and partial field
+result is kept on the job so /api/documents/<id>/ocr/events can replay and
+stream them as text/event-stream.
+
+Each job's state is also kept in Document.ocr_status (queued, running, done,
+failed), so it survives the process. Live events are tracked in the process
+that accepted the upload and forgotten JOB_TTL_SECONDS after the job finishes;
+a client connecting elsewhere or later gets the stored result as a single
+'done' event, or a 'pending' event and a retry hint while the job is still
+queued or running. A failed job stores {'error', 'failed_at'} as the
+document's ocr_data, replayed as 'error'. resume_pending() re-queues the jobs
+a restart interrupted.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import Response
+
+from fast_json import dumps_bytes
+
+logger = logging.getLogger(__name__)
+
+JOB_TTL_SECONDS = 600
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+FINAL_EVENTS = ('done', 'error')
+
+# Document.ocr_status values
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+PENDING_STATUSES = (QUEUED, RUNNING)
+
+# Options for the OCR of an uploaded document, also used when it is resumed
+UPLOAD_OCR_OPTIONS = {'cascade': True}
+
+
+class OCRJob:
+    def __init__(self, document_id, user_id):
+        self.document_id = document_id
+        self.user_id = user_id
+        self.events = []
+        self.finished_at = None
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.finished_at is not None
+
+    def publish(self, stage, data=None):
+        with self._changed:
+            self.events.append((stage, data or {}))
+            if stage in FINAL_EVENTS:
+                self.finished_at = time.monotonic()
+            self._changed.notify_all()
+
+    def wait(self, cursor, timeout):
+        """Events after index cursor, waiting up to timeout seconds for the first one"""
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.events) > cursor, timeout=timeout)
+            return self.events[cursor:]
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=int(os.environ.get('OCR_JOB_THREADS', 2)),
+                                           thread_name_prefix='ocr-job')
+        return _executor
+
+
+def _prune():
+    cutoff = time.monotonic() - JOB_TTL_SECONDS
+    for job_id in [k for k, job in _jobs.items() if job.finished and job.finished_at < cutoff]:
+        del _jobs[job_id]
+
+
+def get_job(document_id):
+    with _jobs_lock:
+        return _jobs.get(document_id)
+
+
+def start_job(app, document_id, user_id, file_path, ticket=None, **options):
+    """
+    Queue OCR of a saved upload whose ocr_status is already committed as
+    queued; the document's ocr_data is filled in when it finishes. ticket is
+    the upload's admission ticket (see admission.py): the job waits for it to
+    be admitted before decoding, and releases it after.
+    """
+    job = OCRJob(document_id, user_id)
+    with _jobs_lock:
+        _prune()
+        _jobs[document_id] = job
+    job.publish('queued')
+    _get_executor().submit(_run, app, job, file_path, ticket, options)
+    return job
+
+
+def _run(app, job, file_path, ticket, options):
+    import admission
+    from models import Document, db
+    from ocr_workers import run_ocr
+
+    try:
+        if ticket is not None and not admission.acquire(ticket):
+            raise admission.AdmissionRejected(admission.DEFAULT_RETRY_AFTER_SECONDS)
+        with app.app_context():
+            # Conditional update, so a job resumed by another process runs once
+            claimed = Document.query.filter_by(id=job.document_id, ocr_status=QUEUED).update(
+                {'ocr_status': RUNNING}, synchronize_session=False
+            )
+            db.session.commit()
+        if not claimed:
+            logger.info(f"OCR job for document {job.document_id} is already running or gone")
+            with _jobs_lock:
+                if _jobs.get(job.document_id) is job:
+                    del _jobs[job.document_id]
+            # Followers reconnect and get the document's state from the database
+            job.publish('pending', {'document_id': job.document_id})
+            return
+        job.publish('started')
+        result = run_ocr(file_path, progress=job.publish, **options)
+        with app.app_context():
+            document = Document.query.get(job.document_id)
+            if document is None:
+                raise LookupError('Document was deleted during OCR')
+            document.ocr_data = result['ocr_data']
+            document.extracted_text = result['extracted_text']
+            document.ocr_status = DONE
+            db.session.commit()
+        job.publish('done', {'document_id': job.document_id, 'ocr_data': result['ocr_data']})
+    except Exception as e:
+        logger.exception(f"OCR job for document {job.document_id} failed")
+        failure = {'error': str(e), 'failed_at': datetime.utcnow().isoformat()}
+        _store_failure(app, job.document_id, failure)
+        job.publish('error', failure_event(job.document_id, failure))
+    finally:
+        if ticket is not None:
+            admission.release(ticket)
+
+
+def _store_failure(app, document_id, failure):
+    """Keep the failure on the document, so it outlives this job and process"""
+    from models import Document, db
+
+    try:
+        with app.app_context():
+            db.session.rollback()
+            document = Document.query.get(document_id)
+            if document is not None:
+                document.ocr_data = failure
+                document.ocr_status = FAILED
+                db.session.commit()
+    except Exception:
+        logger.exception(f"Could not record the OCR failure of document {document_id}")
+
+
+def resume_pending(app):
+    """
+    Re-queue the OCR jobs of documents left queued or running by a previous
+    run of the app. Call once at startup, before requests are served: jobs
+    still marked running were interrupted, since no job outlives its process.
+    Returns the number of jobs queued.
+    """
+    from models import Document, db
+
+    with app.app_context():
+        Document.query.filter_by(ocr_status=RUNNING).update({'ocr_status': QUEUED}, synchronize_session=False)
+        db.session.commit()
+        pending = [
+            (document.id, document.uploaded_by, document.file_path)
+            for document in Document.query.filter_by(ocr_status=QUEUED).order_by(Document.created_at)
+        ]
+    for document_id, user_id, file_path in pending:
+        start_job(app, document_id, user_id, file_path, **UPLOAD_OCR_OPTIONS)
+    if pending:
+        logger.info(f"Resumed {len(pending)} pending OCR job(s)")
+    return len(pending)
+
+
+def failure_event(document_id, failure):
+    """The 'error' event data for a failure stored by a job"""
+    return {'document_id': document_id, 'message': failure['error'], 'failed_at': failure.get('failed_at')}
+
+
+def ocr_failed(ocr_data):
+    return isinstance(ocr_data, dict) and 'error' in ocr_data
+
+
+def _sse(event_id, stage, data):
+    return b'id: %d\nevent: %s\ndata: %s\n\n' % (event_id, stage.encode(), dumps_bytes(data))
+
+
+def event_stream(job, last_event_id=None):
+    """text/event-stream response replaying job events after Last-Event-ID, then following new ones"""
+    def generate():
+        cursor = last_event_id + 1 if last_event_id is not None else 0
+        yield b'retry: %d\n\n' % RETRY_MILLISECONDS
+        while True:
+            events = job.wait(cursor, HEARTBEAT_SECONDS)
+            if not events:
+                yield b': keep-alive\n\n'
+                continue
+            for stage, data in events:
+                if stage == 'pending':
+                    yield b'event: pending\ndata: %s\n\n' % dumps_bytes(data)
+                    return
+                yield _sse(cursor, stage, data)
+                cursor += 1
+                if stage in FINAL_EVENTS:
+                    return
+
+    return event_response(generate())
+
+
+def finished_stream(stage, data):
+    """Event stream of a single final event, for jobs this process no longer tracks"""
+    return event_response(iter([_sse(0, stage, data)]))
+
+
+def pending_stream(document_id, status):
+    """
+    Event stream for a job that is queued or running but not tracked here
+    (another process has it, or it waits to be resumed): one 'pending' event,
+    after which the client reconnects in RETRY_MILLISECONDS and asks again.
+    """
+    return event_response(iter([
+        b'retry: %d\n\n' % RETRY_MILLISECONDS,
+        b'event: pending\ndata: %s\n\n' % dumps_bytes({'document_id': document_id, 'status': status}),
+    ]))
+
+
+def event_response(chunks):
+    return Response(chunks, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Marksheet layout templates
+==========================
+Universities we see often have fixed marksheet layouts. Each one is described
+by a JSON file in marksheet_templates/ (or OCR_TEMPLATE_DIR):
+
+    {
+      "name": "example_university_v1",
+      "university": "Example University",
+      "certificate_type": "Statement of Marks",
+      "header": {"region": [0.0, 0.0, 1.0, 0.12], "fingerprint": "f0e1d2c3b4a59687", "max_distance": 16},
+      "required": ["name", "roll_number"],
+      "fields": {
+        "name":        {"region": [0.18, 0.20, 0.70, 0.24], "strip": "^NAME\\s*[:.\\-]*"},
+        "roll_number": {"region": [0.70, 0.20, 0.95, 0.24], "strip": "^ROLL\\s*NO\\.?\\s*[:.\\-]*"},
+        "subjects":    {"region": [0.05, 0.30, 0.95, 0.80], "mode": "block"}
+      }
+    }
+
+Regions are [x0, y0, x1, y1] fractions of the cropped page. The header
+fingerprint is a 64-bit difference hash of the header region (get one with
+`python ocr_templates.py fingerprint sample.jpg`); a page whose header hash is
+within max_distance bits matches the template. "line" fields (the default)
+are single text lines read with recognition only; "block" fields (subject
+table, summary) run detection + recognition on just that region.
+
+Per-template outcomes (hit, fallback to full-page OCR) and unmatched pages
+are counted in `stats` so the hit rate of each template can be watched.
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'marksheet_templates')
+DEFAULT_HEADER_REGION = [0.0, 0.0, 1.0, 0.12]
+DEFAULT_MAX_DISTANCE = 16
+DEFAULT_REQUIRED = ['name', 'roll_number']
+
+
+def header_fingerprint(page_gray, region=DEFAULT_HEADER_REGION, hash_size=8):
+    """
+    dHash of the header region of a grayscale page, or None when the region is
+    (nearly) blank and would fingerprint every blank header alike.
+    """
+    import cv2
+    import numpy as np
+
+    header = crop_region(page_gray, region)
+    if header.size == 0 or float(header.std()) < 4.0:
+        return None
+    # Blur over about half a hash cell so a few pixels of shift or scale between
+    # scans doesn't flip bits
+    header = cv2.GaussianBlur(header, (0, 0), max(1.0, header.shape[0] / (2 * hash_size)))
+    thumb = cv2.resize(header, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (thumb[:, :-1] > thumb[:, 1:]).ravel()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def upright_page(image, do_crop=True):
+    """
+    Grayscale, cropped and deskewed page that fingerprints and field regions are
+    measured on; image is a path or a decoded BGR array
+    """
+    try:
+        from . import preprocessing
+    except ImportError:
+        import preprocessing
+
+    page = preprocessing.read_image(image) if isinstance(image, str) else image
+    if do_crop:
+        page = preprocessing.crop_document(page)
+    return preprocessing.deskew(preprocessing.to_grayscale(page))
+
+
+def crop_region(image, region):
+    h, w = image.shape[:2]
+    x0, y0, x1, y1 = region
+    return image[int(y0 * h):max(int(y1 * h), int(y0 * h) + 1), int(x0 * w):max(int(x1 * w), int(x0 * w) + 1)]
+
+
+class Template:
+    def __init__(self, data, source=None):
+        header = data.get('header', {})
+        self.name = data['name']
+        self.university = data.get('university')
+        self.certificate_type = data.get('certificate_type')
+        self.header_region = header.get('region', DEFAULT_HEADER_REGION)
+        self.fingerprint = int(header['fingerprint'], 16)
+        self.max_distance = header.get('max_distance', DEFAULT_MAX_DISTANCE)
+        self.fields = data.get('fields', {})
+        self.required = data.get('required', DEFAULT_REQUIRED)
+        self.source = source
+
+    def distance(self, page_gray):
+        value = header_fingerprint(page_gray, self.header_region)
+        return None if value is None else bin(value ^ self.fingerprint).count('1')
+
+
+class TemplateStats:
+    """Per-template counts of matches, region-OCR hits and fallbacks, plus unmatched pages"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates = {}
+        self._unmatched = 0
+
+    def record(self, matched=None, used=None):
+        """matched: template whose header matched (if any); used: template that produced the result"""
+        with self._lock:
+            if matched is None:
+                self._unmatched += 1
+                return
+            counts = self._templates.setdefault(matched, {'matched': 0, 'hits': 0, 'fallbacks': 0})
+            counts['matched'] += 1
+            counts['hits' if used == matched else 'fallbacks'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            templates = {
+                name: {**counts, 'hit_rate': round(counts['hits'] / counts['matched'], 3)}
+                for name, counts in self._templates.items()
+            }
+            total = self._unmatched + sum(c['matched'] for c in self._templates.values())
+            hits = sum(c['hits'] for c in self._templates.values())
+            return {
+                'templates': templates,
+                'unmatched': self._unmatched,
+                'total': total,
+                'hit_rate': round(hits / total, 3) if total else None,
+            }
+
+
+stats = TemplateStats()
+
+
+class TemplateRegistry:
+    def __init__(self, templates):
+        self.templates = list(templates)
+
+    @classmethod
+    def load(cls, directory=None):
+        directory = directory or os.environ.get('OCR_TEMPLATE_DIR', TEMPLATE_DIR)
+        templates = []
+        for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    templates.append(Template(json.load(f), source=path))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping marksheet template {path}: {e}")
+        logger.info(f"Loaded {len(templates)} marksheet templates from {directory}")
+        return cls(templates)
+
+    def match(self, page_gray):
+        """Closest template whose header fingerprint is within its max_distance, or None"""
+        best, best_distance = None, None
+        for template in self.templates:
+            distance = template.distance(page_gray)
+            if distance is not None and distance <= template.max_distance:
+                if best_distance is None or distance < best_distance:
+                    best, best_distance = template, distance
+        return best
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TemplateRegistry.load()
+        return _registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Marksheet template tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    fp = sub.add_parser('fingerprint', help='Print the header fingerprint of a sample marksheet')
+    fp.add_argument('image_path')
+    fp.add_argument('--region', type=float, nargs=4, default=DEFAULT_HEADER_REGION, metavar=('X0', 'Y0', 'X1', 'Y1'))
+    fp.add_argument('--no-crop', action='store_true', help='Skip page detection (flatbed scans)')
+    sub.add_parser('list', help='List the loaded templates')
+    args = parser.parse_args()
+
+    if args.command == 'fingerprint':
+        page = upright_page(args.image_path, do_crop=not args.no_crop)
+        value = header_fingerprint(page, args.region)
+        print('blank header, no fingerprint' if value is None else f'{value:016x}')
+    else:
+        for template in get_registry().templates:
+            print(f"{template.name:<40} {template.university or '-':<32} {template.source}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+OCR parameter tuning
+====================
+Scores preprocessing and confidence settings against a labeled set of
+marksheets and saves the best as a named profile that the OCR entry points
+load (final_ocr_system.py --profile NAME, ocr_extractor.py --profile NAME,
+or OCR_PROFILE for the API).
+
+A labeled set is a directory of images, each with a JSON file of the same
+name holding its ground-truth fields:
+
+    sample_marks_cards/1.png
+    sample_marks_cards/1.json   {"name": "TAHIR AHMAD KHAN", "roll_number": "826",
+                                 "subjects": ["MBA401", "MBA402"]}
+
+Only the fields present are scored (see FIELDS). Text fields match when they
+are equal ignoring case, spaces and punctuation; "subjects" scores the share
+of the listed course codes that were found.
+
+Candidates come from SPACE as a full grid (settings that cannot matter, such
+as clip_limit with contrast off, are collapsed) or a random sample of it
+(--random N). They are grouped by preprocessing setting and the groups are
+spread over a process pool. Each group runs detection and recognition once
+per image and applies every confidence threshold to that result.
+
+For each candidate the report gives field-level accuracy and mean latency
+per image; candidates on the Pareto frontier (no other candidate is both
+faster and at least as accurate) are starred. The winner is the most
+accurate frontier candidate, within --max-latency if given.
+
+    python ocr_tuning.py sample_marks_cards --workers 2 --save tuned
+    python ocr_tuning.py sample_marks_cards --random 12 --max-latency 3 --save fast --report tuning.json
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import logging
+import multiprocessing as mp
+import os
+import random
+import re
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff')
+
+# Values tried per engine option, in pipeline order so neighbouring
+# candidates share their earlier stages (see the stage memo)
+SPACE = {
+    'deskew': [True, False],
+    'denoise': [True, False],
+    'denoise_h': [8, 12, 16],
+    'contrast': [True, False],
+    'clip_limit': [2.0, 3.0, 4.0],
+    'adaptive': [True, False],
+    'confidence_threshold': [0.3, 0.5, 0.7, 0.9],
+}
+# Options that only matter when another one is on
+DEPENDS_ON = {'denoise_h': 'denoise', 'clip_limit': 'contrast'}
+
+FIELDS = {
+    'university': lambda m: m.university,
+    'name': lambda m: m.student_info.name,
+    'roll_number': lambda m: m.student_info.roll_number,
+    'registration_number': lambda m: m.student_info.registration_number,
+    'total_marks': lambda m: m.total_marks,
+    'result': lambda m: m.result,
+    'division': lambda m: m.division,
+    'subjects': lambda m: [s.course_code for s in m.subjects],
+}
+
+
+def _normalize(value):
+    return re.sub(r'[^A-Z0-9]', '', str(value).upper()) if value is not None else ''
+
+
+def load_labeled_set(directory):
+    """[(image path, ground-truth fields)] for every image with a JSON label"""
+    samples = []
+    for path in sorted(glob.glob(os.path.join(directory, '*'))):
+        stem, ext = os.path.splitext(path)
+        if ext.lower() not in IMAGE_EXTENSIONS or not os.path.exists(stem + '.json'):
+            continue
+        with open(stem + '.json', 'r', encoding='utf-8') as f:
+            truth = json.load(f)
+        unknown = sorted(set(truth) - set(FIELDS))
+        if unknown:
+            raise ValueError(f"{stem}.json: unknown fields {unknown} (known: {sorted(FIELDS)})")
+        samples.append((path, truth))
+    if not samples:
+        raise ValueError(f"No labeled images in {directory} (each image needs a .json of the same name)")
+    return samples
+
+
+def score_fields(marks_data, truth):
+    """Per-field score in [0, 1] of a MarksCardData against ground truth"""
+    scores = {}
+    for field, expected in truth.items():
+        found = FIELDS[field](marks_data)
+        if field == 'subjects':
+            wanted = {_normalize(code) for code in expected}
+            got = {_normalize(code) for code in found}
+            scores[field] = len(wanted & got) / len(wanted) if wanted else 1.0
+        else:
+            scores[field] = 1.0 if _normalize(found) == _normalize(expected) and found is not None else 0.0
+    return scores
+
+
+def candidates(space=SPACE, sample=None, seed=0):
+    """Distinct option sets of the grid (or a random sample of them)"""
+    seen, grid = set(), []
+    for values in itertools.product(*space.values()):
+        options = dict(zip(space, values))
+        for option, switch in DEPENDS_ON.items():
+            if option in options and not options.get(switch, True):
+                options[option] = space[option][0]
+        key = tuple(sorted(options.items()))
+        if key not in seen:
+            seen.add(key)
+            grid.append(options)
+    if sample is not None and sample < len(grid):
+        picked = sorted(random.Random(seed).sample(range(len(grid)), sample))
+        grid = [grid[i] for i in picked]
+    return grid
+
+
+def group_by_preprocessing(options_list):
+    """[(preprocessing options, [confidence thresholds])], in grid order"""
+    groups = {}
+    for options in options_list:
+        preprocessing = {k: v for k, v in options.items() if k != 'confidence_threshold'}
+        key = tuple(sorted(preprocessing.items()))
+        groups.setdefault(key, (preprocessing, []))[1].append(options.get('confidence_threshold', 0.5))
+    return list(groups.values())
+
+
+def pareto_frontier(results):
+    """Results no other result beats on both latency and accuracy, fastest first"""
+    frontier, best = [], None
+    for result in sorted(results, key=lambda r: (r['latency_seconds'], -r['accuracy'])):
+        if best is None or result['accuracy'] > best:
+            frontier.append(result)
+            best = result['accuracy']
+    return frontier
+
+
+def choose_winner(results, max_latency=None):
+    frontier = [r for r in pareto_frontier(results)
+                if max_latency is None or r['latency_seconds'] <= max_latency]
+    return frontier[-1] if frontier else None
+
+
+# --- Evaluation (pool workers) ---------------------------------------------
+
+_system = None
+_init_error = None
+
+
+def _init_worker():
+    global _system, _init_error
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        from final_ocr_system import MarksCardOCRSystem
+        _system = MarksCardOCRSystem(confidence_threshold=0.0)
+    except Exception as e:
+        # Raised from evaluate_group instead: a failing pool initializer is respawned forever
+        _init_error = e
+
+
+def evaluate_group(group, samples):
+    """
+    Scores of one preprocessing setting at each of its confidence thresholds.
+    Text is recognized once per image at the lowest threshold; each
+    threshold then filters it and runs field extraction.
+    """
+    from final_ocr_system import MarksCardData
+
+    if _system is None and _init_error is None:
+        _init_worker()
+    if _init_error is not None:
+        raise RuntimeError(f"OCR models failed to load: {_init_error}")
+    preprocessing, thresholds = group
+    totals = {t: {'scores': [], 'seconds': 0.0, 'fields': {}} for t in thresholds}
+    for path, truth in samples:
+        state = _system.engine.run(path, 'full', stop='recognize',
+                                   confidence_threshold=min(thresholds), **preprocessing)
+        shared_seconds = sum(state.costs.values())
+        for threshold in thresholds:
+            began = time.perf_counter()
+            elements = [item for item in state.buffers['text_elements'] if item['confidence'] >= threshold]
+            marks_data = _system.structure(elements) if elements else MarksCardData()
+            total = totals[threshold]
+            total['seconds'] += shared_seconds + time.perf_counter() - began
+            for field, score in score_fields(marks_data, truth).items():
+                total['scores'].append(score)
+                total['fields'].setdefault(field, []).append(score)
+
+    return [{
+        'options': {**preprocessing, 'confidence_threshold': threshold},
+        'accuracy': round(sum(total['scores']) / len(total['scores']), 4) if total['scores'] else 0.0,
+        'fields': {field: round(sum(s) / len(s), 3) for field, s in total['fields'].items()},
+        'latency_seconds': round(total['seconds'] / len(samples), 3),
+    } for threshold, total in totals.items()]
+
+
+def tune(samples, options_list, workers=1):
+    """Evaluate every option set on the labeled samples; one result dict per option set"""
+    groups = group_by_preprocessing(options_list)
+    results = []
+    if workers <= 1:
+        for group in groups:
+            results.extend(evaluate_group(group, samples))
+        return results
+
+    ctx = mp.get_context('spawn')
+    with ctx.Pool(processes=workers, initializer=_init_worker) as pool:
+        jobs = [pool.apply_async(evaluate_group, (group, samples)) for group in groups]
+        for done, job in enumerate(jobs, 1):
+            results.extend(job.get())
+            logger.info(f"{done}/{len(groups)} preprocessing settings evaluated")
+    return results
+
+
+def _describe(options):
+    return ' '.join(f'{k}={v}' for k, v in options.items())
+
+
+def print_report(results, winner):
+    frontier = {id(r) for r in pareto_frontier(results)}
+    print(f"\n{'':2}{'accuracy':>8} {'latency':>8}  settings")
+    for result in sorted(results, key=lambda r: (r['latency_seconds'], -r['accuracy'])):
+        mark = '*' if id(result) in frontier else ' '
+        print(f"{mark:2}{result['accuracy']:>8.3f} {result['latency_seconds']:>7.2f}s  {_describe(result['options'])}")
+    print(f"\n* Pareto frontier ({len(frontier)} of {len(results)})")
+    if winner is not None:
+        print(f"Winner: accuracy {winner['accuracy']:.3f}, {winner['latency_seconds']:.2f}s/image, "
+              f"{_describe(winner['options'])}")
+        print(f"        per field: {winner['fields']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune OCR preprocessing and confidence settings on labeled marksheets')
+    parser.add_argument('labeled_dir', help='Directory of images with same-name .json ground truth')
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help='Evaluation processes (each loads the OCR models)')
+    parser.add_argument('--random', type=int, default=None, metavar='N',
+                        help='Evaluate N random settings instead of the whole grid')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--space', default=None, help='JSON file of {option: [values]} replacing the default grid')
+    parser.add_argument('--max-latency', type=float, default=None, help='Seconds per image the winner may take')
+    parser.add_argument('--save', default=None, metavar='NAME', help='Write the winner as OCR profile NAME')
+    parser.add_argument('--report', default=None, help='Write every result as JSON here')
+    parser.add_argument('--memo-mb', type=float, default=512,
+                        help='Stage memo per worker, so settings share their common stages (0 to disable)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    space = SPACE
+    if args.space:
+        with open(args.space, 'r', encoding='utf-8') as f:
+            space = json.load(f)
+    # Workers (and this process) build their engine's memo from the environment
+    os.environ.setdefault('OCR_STAGE_MEMO_MB', str(args.memo_mb / max(1, args.workers)))
+
+    samples = load_labeled_set(args.labeled_dir)
+    options_list = candidates(space, sample=args.random, seed=args.seed)
+    logger.info(f"Evaluating {len(options_list)} settings on {len(samples)} labeled images "
+                f"with {args.workers} worker(s)")
+
+    started = time.perf_counter()
+    try:
+        results = tune(samples, options_list, workers=args.workers)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+    logger.info(f"Tuning took {time.perf_counter() - started:.1f}s")
+
+    winner = choose_winner(results, args.max_latency)
+    print_report(results, winner)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'results': results, 'frontier': pareto_frontier(results), 'winner': winner}, f, indent=2)
+    if args.save:
+        if winner is None:
+            print(f"❌ No setting within {args.max_latency}s per image; profile not saved")
+            return
+        from ocr_engine import save_profile
+        path = save_profile(args.save, {'enhance': 'binarize', **winner['options']},
+                            accuracy=winner['accuracy'], fields=winner['fields'],
+                            latency_seconds=winner['latency_seconds'],
+                            tuned_on=os.path.abspath(args.labeled_dir), images=len(samples),
+                            created=datetime.now().isoformat(timespec='seconds'))
+        print(f"💾 Saved profile '{args.save}' to {path}")
+
+
+if __name__ == '__main__':
+    main()
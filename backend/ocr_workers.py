@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+OCR worker processes
+====================
+A pool of processes that each load the Paddle models once, served over a
+multiprocessing manager so any number of API workers can share it:
+
+    python ocr_workers.py --workers 2 --address 127.0.0.1:50055
+
+API workers decode the uploaded image and copy the pixels into a
+multiprocessing.shared_memory block; only the block's name, shape and dtype
+cross the process boundary, and the OCR worker maps the same memory instead
+of unpickling the array or reading a temp file. Results come back as the
+compact dict stored on Document.ocr_data. Stage transitions and partial
+fields are relayed back while a task runs (see OCRPool.poll) so API
+processes can stream progress to clients.
+
+API processes use the pool when OCR_WORKER_ADDRESS is set; otherwise run_ocr()
+falls back to OCR in-process. The pool and the API processes must share an
+OCR_WORKER_AUTHKEY (there is no default: the manager unpickles what it
+receives, so anyone who can connect could run code in the pool).
+"""
+
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+import uuid
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.managers import BaseManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = '127.0.0.1:50055'
+DEFAULT_TIMEOUT_SECONDS = 300
+
+
+class OCRWorkerError(RuntimeError):
+    pass
+
+
+def compact_result(marks_data):
+    """The serializable subset of a MarksCardData kept with a document"""
+    return {
+        'ocr_data': {
+            'university': marks_data.university,
+            'student_name': marks_data.student_info.name,
+            'roll_number': marks_data.student_info.roll_number,
+            'subjects': [
+                {
+                    'course_code': s.course_code,
+                    'course_title': s.course_title,
+                    'marks': s.total_marks
+                } for s in marks_data.subjects
+            ],
+            'result': marks_data.result,
+            'template': marks_data.template,
+            'tier': marks_data.tier,
+            'cascade': marks_data.cascade,
+            'timings': marks_data.timings,
+            'total_elements': len(marks_data.all_extracted_text)
+        },
+        'extracted_text': ' '.join(item['text'] for item in marks_data.all_extracted_text),
+        'template_matched': marks_data.template_matched,
+    }
+
+
+def _record_template_outcome(result):
+    import ocr_templates
+    ocr_templates.stats.record(result.get('template_matched'), result['ocr_data'].get('template'))
+
+
+# --- Worker side -----------------------------------------------------------
+
+def _attach(shm_name):
+    """
+    Map a shared memory block the API process created (and will unlink).
+    Attaching registers it with this process's resource tracker, which would
+    warn about it as leaked at exit and keep an entry per task; the creator
+    owns the block, so the worker doesn't track it.
+    """
+    try:
+        return shared_memory.SharedMemory(name=shm_name, track=False)
+    except TypeError:
+        # Python < 3.13: no track argument
+        shm = shared_memory.SharedMemory(name=shm_name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+def _default_system(confidence_threshold):
+    from final_ocr_system import MarksCardOCRSystem
+    return MarksCardOCRSystem(confidence_threshold=confidence_threshold)
+
+
+def _worker_main(tasks, results, confidence_threshold, system_factory=_default_system):
+    """OCR worker process: owns one OCR system and serves tasks until it gets None"""
+    import numpy as np
+
+    ocr_system = system_factory(confidence_threshold)
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, shm_name, shape, dtype, options = task
+        try:
+            shm = _attach(shm_name)
+        except FileNotFoundError:
+            # The caller gave up (timeout) and released the block
+            results.put((task_id, 'error', 'image buffer no longer available'))
+            continue
+
+        def progress(stage, data, task_id=task_id):
+            results.put((task_id, 'progress', (stage, data)))
+
+        try:
+            image = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            marks_data = ocr_system.process_marks_card(image, progress=progress, **options)
+            results.put((task_id, 'done', compact_result(marks_data)))
+        except Exception as e:
+            logger.exception("OCR task failed")
+            results.put((task_id, 'error', str(e)))
+        finally:
+            image = None
+            try:
+                shm.close()
+            except BufferError:
+                # Something still holds a view; the mapping goes away with the process
+                pass
+
+
+class OCRPool:
+    """Runs in the pool server process: fans tasks out to workers and routes results back"""
+
+    def __init__(self, workers, confidence_threshold=0.5, system_factory=_default_system):
+        """
+        system_factory(confidence_threshold) builds each worker's OCR system; it
+        must be importable by name, since workers are spawned
+        """
+        ctx = mp.get_context('spawn')
+        self._tasks = ctx.Queue()
+        self._results = ctx.Queue()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._processes = [
+            ctx.Process(target=_worker_main, args=(self._tasks, self._results, confidence_threshold, system_factory),
+                        name=f'ocr-worker-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for process in self._processes:
+            process.start()
+        threading.Thread(target=self._collect, name='ocr-results', daemon=True).start()
+
+    def _collect(self):
+        while True:
+            task_id, kind, payload = self._results.get()
+            if kind == 'done':
+                _record_template_outcome(payload)
+            with self._lock:
+                task = self._pending.get(task_id)
+                if task is None:
+                    continue
+                if kind == 'progress':
+                    task['events'].append(payload)
+                else:
+                    task['result' if kind == 'done' else 'error'] = payload
+                    task['done'] = True
+                self._changed.notify_all()
+
+    def submit(self, shm_name, shape, dtype, options, timeout=DEFAULT_TIMEOUT_SECONDS):
+        """Queue OCR of the image in shared memory block shm_name; returns a task id for poll()"""
+        task_id = uuid.uuid4().hex
+        with self._lock:
+            self._pending[task_id] = {'events': [], 'done': False, 'result': None, 'error': None,
+                                      'deadline': time.monotonic() + timeout, 'timeout': timeout}
+        self._tasks.put((task_id, shm_name, tuple(shape), dtype, options))
+        return task_id
+
+    def poll(self, task_id, cursor=0, wait=1.0):
+        """
+        Progress events after index cursor (waiting up to wait seconds for one),
+        plus the result once the task is done: {'events', 'cursor', 'done', 'result'}.
+        Raises OCRWorkerError for failed, timed-out or unknown tasks.
+        """
+        with self._lock:
+            task = self._pending.get(task_id)
+            if task is None:
+                raise OCRWorkerError('Unknown OCR task')
+            if len(task['events']) <= cursor and not task['done']:
+                self._changed.wait_for(lambda: len(task['events']) > cursor or task['done'], timeout=wait)
+            events = task['events'][cursor:]
+            done = task['done']
+            if done or time.monotonic() > task['deadline'] or not any(p.is_alive() for p in self._processes):
+                self._pending.pop(task_id, None)
+
+        if task['error']:
+            raise OCRWorkerError(task['error'])
+        if not done and time.monotonic() > task['deadline']:
+            raise OCRWorkerError(f"OCR timed out after {task['timeout']}s")
+        if not done and task_id not in self._pending:
+            raise OCRWorkerError('No OCR workers are running')
+        return {'events': events, 'cursor': cursor + len(events), 'done': done, 'result': task['result']}
+
+    def run(self, shm_name, shape, dtype, options, timeout=DEFAULT_TIMEOUT_SECONDS):
+        """OCR the image in shared memory block shm_name; blocks until a worker answers"""
+        task_id = self.submit(shm_name, shape, dtype, options, timeout)
+        cursor = 0
+        while True:
+            status = self.poll(task_id, cursor)
+            if status['done']:
+                return status['result']
+            cursor = status['cursor']
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {'workers': sum(p.is_alive() for p in self._processes), 'pending': pending}
+
+    def template_stats(self):
+        import ocr_templates
+        return ocr_templates.stats.snapshot()
+
+    def shutdown(self):
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=10)
+
+
+class OCRManager(BaseManager):
+    pass
+
+
+def _parse_address(address):
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def _authkey():
+    authkey = os.environ.get('OCR_WORKER_AUTHKEY')
+    if not authkey:
+        raise OCRWorkerError('OCR_WORKER_AUTHKEY must be set for the OCR worker pool')
+    return authkey.encode()
+
+
+def serve(address, workers, confidence_threshold=0.5, system_factory=_default_system):
+    from admission import budget_from_env
+
+    pool = OCRPool(workers, confidence_threshold, system_factory)
+    # One pixel budget for every API process using this pool (see admission.py)
+    budget = budget_from_env()
+    OCRManager.register('ocr_pool', callable=lambda: pool)
+    OCRManager.register('pixel_budget', callable=lambda: budget)
+    manager = OCRManager(address=_parse_address(address), authkey=_authkey())
+    server = manager.get_server()
+    logger.info(f"OCR pool with {workers} workers listening on {address}")
+    try:
+        server.serve_forever()
+    finally:
+        pool.shutdown()
+
+
+# --- API side --------------------------------------------------------------
+
+OCRManager.register('ocr_pool')
+OCRManager.register('pixel_budget')
+
+_manager = None
+_client = None
+_budget_client = None
+_client_lock = threading.Lock()
+_local_system = None
+
+
+def _connect():
+    """Manager connected to the pool server, or None when OCR_WORKER_ADDRESS is not set (call with _client_lock)"""
+    global _manager
+    address = os.environ.get('OCR_WORKER_ADDRESS')
+    if not address:
+        return None
+    if _manager is None:
+        manager = OCRManager(address=_parse_address(address), authkey=_authkey())
+        manager.connect()
+        _manager = manager
+    return _manager
+
+
+def _pool_client():
+    """Proxy to the pool server, or None when OCR_WORKER_ADDRESS is not set"""
+    global _client
+    with _client_lock:
+        if _client is None and _connect() is not None:
+            _client = _manager.ocr_pool()
+        return _client
+
+
+def pixel_budget_client():
+    """Proxy to the pool server's shared PixelBudget, or None when OCR_WORKER_ADDRESS is not set"""
+    global _budget_client
+    with _client_lock:
+        if _budget_client is None and _connect() is not None:
+            _budget_client = _manager.pixel_budget()
+        return _budget_client
+
+
+def _decode_pages(image_path):
+    """Every page of an image file (multi-page TIFFs have several) as BGR arrays"""
+    import cv2
+    import numpy as np
+
+    buffer = np.fromfile(image_path, dtype=np.uint8)
+    ok, pages = cv2.imdecodemulti(buffer, cv2.IMREAD_COLOR)
+    if not ok or not pages:
+        image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        pages = [] if image is None else [image]
+    if not pages:
+        raise OCRWorkerError(f'Unable to decode image: {image_path}')
+    return list(pages)
+
+
+def run_array(client, image, options, timeout=DEFAULT_TIMEOUT_SECONDS, progress=None):
+    """Hand a decoded image to the pool through shared memory, relaying its progress events"""
+    import numpy as np
+
+    shm = shared_memory.SharedMemory(create=True, size=image.nbytes)
+    try:
+        np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[...] = image
+        if progress is None:
+            return client.run(shm.name, image.shape, image.dtype.str, options, timeout)
+
+        task_id = client.submit(shm.name, image.shape, image.dtype.str, options, timeout)
+        cursor = 0
+        while True:
+            status = client.poll(task_id, cursor)
+            for stage, data in status['events']:
+                progress(stage, data)
+            if status['done']:
+                return status['result']
+            cursor = status['cursor']
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _merge_pages(results):
+    """One compact result for a multi-page document: page 1's fields plus every page's"""
+    if len(results) == 1:
+        return results[0]
+    ocr_data = dict(results[0]['ocr_data'])
+    ocr_data['pages'] = [r['ocr_data'] for r in results]
+    return {
+        'ocr_data': ocr_data,
+        'extracted_text': '\n'.join(r['extracted_text'] for r in results),
+    }
+
+
+def run_ocr(image_path, progress=None, **options):
+    """
+    Compact OCR result ({'ocr_data', 'extracted_text'}) for an image file,
+    from the worker pool when one is configured, in-process otherwise.
+    Pages of multi-page files are OCR'd one after another; progress, if given,
+    is called as progress(stage, data) with data['page'] set (1-based).
+    """
+    global _local_system
+    options.pop('temp_dir', None)
+    pages = _decode_pages(image_path)
+    client = _pool_client()
+    if client is None:
+        from final_ocr_system import MarksCardOCRSystem
+
+        # Shared by the job threads; the engine serializes model inference
+        with _client_lock:
+            if _local_system is None:
+                _local_system = MarksCardOCRSystem(confidence_threshold=0.5)
+
+    results = []
+    for number, page in enumerate(pages, start=1):
+        page_progress = None
+        if progress is not None:
+            def page_progress(stage, data, number=number):
+                progress(stage, {**data, 'page': number, 'pages': len(pages)})
+
+        if client is not None:
+            result = run_array(client, page, options, progress=page_progress)
+        else:
+            result = compact_result(_local_system.process_marks_card(page, progress=page_progress, **options))
+            _record_template_outcome(result)
+        results.append(result)
+        if page_progress is not None:
+            page_progress('page_done', result['ocr_data'])
+    return _merge_pages(results)
+
+
+def template_stats():
+    """Per-template hit rates, from the worker pool when one is configured"""
+    client = _pool_client()
+    if client is not None:
+        return client.template_stats()
+
+    import ocr_templates
+    return ocr_templates.stats.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the OCR worker pool')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('OCR_WORKERS', 2)))
+    parser.add_argument('--address', default=os.environ.get('OCR_WORKER_ADDRESS', DEFAULT_ADDRESS),
+                        help='host:port to listen on')
+    parser.add_argument('--confidence', type=float, default=0.5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # Inherited by the workers so each sizes its preprocessing thread pool to its share of the cores
+    os.environ['OCR_WORKERS'] = str(args.workers)
+    serve(args.address, args.workers, args.confidence)
+
+
+if __name__ == '__main__':
+    # Run from the importable module so classes pickled to API processes
+    # (e.g. OCRWorkerError) resolve to ocr_workers.*, not __main__.*
+    from ocr_workers import main as _main
+    _main()
@@ -1,7 +1,76 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
+
+# Tiled execution of the per-pixel filters (denoise, adaptive threshold).
+# Tiles overlap by more than each filter's neighbourhood, so the stitched
+# result is identical to filtering the whole image.
+TILE_SIZE = 1024
+NLM_TEMPLATE_WINDOW = 7
+NLM_SEARCH_WINDOW = 21
+ADAPTIVE_BLOCK_SIZE = 31
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def preprocess_threads() -> int:
+    """
+    Threads one process may use for preprocessing: OCR_PREPROCESS_THREADS if
+    set, otherwise the cores divided by the OCR worker processes sharing them
+    (OCR_WORKERS), so side-by-side workers don't oversubscribe the machine.
+    """
+    configured = os.environ.get('OCR_PREPROCESS_THREADS')
+    if configured:
+        return max(1, int(configured))
+    workers = max(1, int(os.environ.get('OCR_WORKERS', 1)))
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def _tile_executor() -> Optional[ThreadPoolExecutor]:
+    global _executor
+    threads = preprocess_threads()
+    if threads <= 1:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # Our tiles are the parallelism; OpenCV's own thread pool on top of
+            # them would only oversubscribe the cores
+            cv2.setNumThreads(1)
+            _executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='preprocess')
+        return _executor
+
+
+def run_tiled(img: np.ndarray, func: Callable[[np.ndarray], np.ndarray], overlap: int,
+              tile_size: int = TILE_SIZE) -> np.ndarray:
+    """
+    Apply a neighbourhood filter tile by tile on a thread pool (OpenCV releases
+    the GIL). Each tile is filtered with `overlap` extra pixels of context on
+    every side and cropped back, so there are no seams as long as overlap
+    covers the filter's radius. Small images are filtered in one call.
+    """
+    h, w = img.shape[:2]
+    executor = _tile_executor()
+    if executor is None or (h <= tile_size and w <= tile_size):
+        return func(img)
+
+    out = np.empty_like(img)
+
+    def filter_tile(origin):
+        y0, x0 = origin
+        y1, x1 = min(y0 + tile_size, h), min(x0 + tile_size, w)
+        py0, px0 = max(0, y0 - overlap), max(0, x0 - overlap)
+        py1, px1 = min(h, y1 + overlap), min(w, x1 + overlap)
+        filtered = func(np.ascontiguousarray(img[py0:py1, px0:px1]))
+        out[y0:y1, x0:x1] = filtered[y0 - py0:y1 - py0, x0 - px0:x1 - px0]
+
+    origins = [(y, x) for y in range(0, h, tile_size) for x in range(0, w, tile_size)]
+    list(executor.map(filter_tile, origins))
+    return out
 
 
 def read_image(image_path: str) -> np.ndarray:
@@ -30,8 +99,14 @@ def to_grayscale(img: np.ndarray) -> np.ndarray:
 
 
 def denoise(img_gray: np.ndarray, h: int = 10) -> np.ndarray:
-    # Fast Non-Local Means denoising for grayscale
-    return cv2.fastNlMeansDenoising(img_gray, h=h)
+    # Fast Non-Local Means denoising for grayscale, tiled across threads
+    radius = NLM_SEARCH_WINDOW // 2 + NLM_TEMPLATE_WINDOW // 2
+    return run_tiled(
+        img_gray,
+        lambda tile: cv2.fastNlMeansDenoising(tile, h=h, templateWindowSize=NLM_TEMPLATE_WINDOW,
+                                              searchWindowSize=NLM_SEARCH_WINDOW),
+        overlap=radius + 8,
+    )
 
 
 def enhance_contrast(img_gray: np.ndarray, clip_limit: float = 3.0, tile_grid_size: Tuple[int, int] = (8, 8)) -> np.ndarray:
@@ -41,8 +116,12 @@ def enhance_contrast(img_gray: np.ndarray, clip_limit: float = 3.0, tile_grid_si
 
 def binarize(img_gray: np.ndarray, method: str = 'adaptive') -> np.ndarray:
     if method == 'adaptive':
-        return cv2.adaptiveThreshold(img_gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                     cv2.THRESH_BINARY, 31, 10)
+        return run_tiled(
+            img_gray,
+            lambda tile: cv2.adaptiveThreshold(tile, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                               cv2.THRESH_BINARY, ADAPTIVE_BLOCK_SIZE, 10),
+            overlap=ADAPTIVE_BLOCK_SIZE // 2 + 8,
+        )
     elif method == 'otsu':
         _, th = cv2.threshold(img_gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
         return th
@@ -52,52 +131,213 @@ def binarize(img_gray: np.ndarray, method: str = 'adaptive') -> np.ndarray:
         return th
 
 
-def deskew(img_gray: np.ndarray, max_angle: float = 15.0) -> np.ndarray:
-    # Invert for text as white
-    th = binarize(img_gray, method='otsu')
-    th = cv2.bitwise_not(th)
+def order_corners(pts: np.ndarray) -> np.ndarray:
+    """Order four points as top-left, top-right, bottom-right, bottom-left"""
+    pts = pts.reshape(4, 2).astype(np.float32)
+    sums = pts.sum(axis=1)
+    diffs = np.diff(pts, axis=1).ravel()
+    return np.array([pts[np.argmin(sums)], pts[np.argmin(diffs)],
+                     pts[np.argmax(sums)], pts[np.argmax(diffs)]], dtype=np.float32)
 
-    coords = np.column_stack(np.where(th > 0))
-    if coords.size == 0:
-        return img_gray
 
-    rect = cv2.minAreaRect(coords)
-    angle = rect[-1]
-    # Adjust angle as per OpenCV's convention
-    if angle < -45:
-        angle = 90 + angle
-    # Constrain
-    angle = np.clip(angle, -max_angle, max_angle)
+def find_document_quad(img: np.ndarray, max_dim: int = 640,
+                       min_area_ratio: float = 0.5) -> Optional[np.ndarray]:
+    """
+    Corners (full-resolution, ordered) of the page in a photo, or None when no
+    page-like quadrilateral is found. Edges and contours are computed on a copy
+    downscaled to max_dim, so this costs a few milliseconds at any resolution.
+    Quads under min_area_ratio of the frame are ignored, and a quad only counts
+    as the page when it reaches the frame edges or lies on a plain background
+    (is_page_on_background): on a flatbed scan the bordered marks table is a
+    large quad too, with the header and result text around it.
+    """
+    h, w = img.shape[:2]
+    scale = min(1.0, max_dim / max(h, w))
+    small = cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))),
+                       interpolation=cv2.INTER_AREA) if scale < 1.0 else img
+    gray = cv2.GaussianBlur(to_grayscale(small), (5, 5), 0)
+
+    median = float(np.median(gray))
+    edges = cv2.Canny(gray, int(max(0, 0.66 * median)), int(min(255, 1.33 * median)))
+    dilated = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+
+    contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    min_area = min_area_ratio * gray.shape[0] * gray.shape[1]
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        if cv2.contourArea(contour) < min_area:
+            break
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4 and cv2.isContourConvex(approx):
+            quad = order_corners(approx)
+            if not is_page_on_background(gray, edges, quad):
+                return None
+            return order_corners(approx / scale)
+    return None
+
+
+def is_page_on_background(gray: np.ndarray, edges: np.ndarray, quad: np.ndarray,
+                          border_ratio: float = 0.03, margin_ratio: float = 0.02,
+                          max_edge_density: float = 0.01, max_background_std: float = 20.0) -> bool:
+    """
+    Whether quad (ordered, in gray's coordinates) is a sheet against a
+    background rather than a box drawn on the page: each of its sides lies
+    within border_ratio of the frame edge, or what is outside it (beyond a
+    margin_ratio band around the quad) is plain, with few edges and a
+    low-variance intensity. Text around the quad, as with a scan's header
+    and results around the marks table, fails both tests.
+    """
+    h, w = gray.shape[:2]
+    tl, tr, br, bl = quad
+    near_x, near_y = border_ratio * w, border_ratio * h
+    if (min(tl[1], tr[1]) <= near_y and max(bl[1], br[1]) >= h - 1 - near_y
+            and min(tl[0], bl[0]) <= near_x and max(tr[0], br[0]) >= w - 1 - near_x):
+        return True
+
+    inside = np.zeros((h, w), np.uint8)
+    cv2.fillConvexPoly(inside, quad.astype(np.int32), 255)
+    margin = max(1, int(margin_ratio * max(h, w)))
+    inside = cv2.dilate(inside, np.ones((2 * margin + 1, 2 * margin + 1), np.uint8))
+    outside = inside == 0
+    if not outside.any():
+        return True
+    return (float(np.count_nonzero(edges[outside])) / np.count_nonzero(outside) <= max_edge_density
+            and float(gray[outside].std()) <= max_background_std)
+
+
+def crop_document(img: np.ndarray, quad: Optional[np.ndarray] = None,
+                  full_frame_ratio: float = 0.95) -> np.ndarray:
+    """
+    Perspective-correct and crop the page at full resolution so later stages
+    only see the document. Returns img unchanged when no page is found or the
+    page already fills (almost) the whole frame, as with flatbed scans.
+    """
+    if quad is None:
+        quad = find_document_quad(img)
+    if quad is None:
+        return img
+
+    h, w = img.shape[:2]
+    if cv2.contourArea(quad) >= full_frame_ratio * h * w:
+        return img
+
+    warped = warp_quad(img, quad)
+    return img if warped is None else warped
+
+
+def warp_quad(img: np.ndarray, quad: np.ndarray, interpolation: int = cv2.INTER_LINEAR) -> Optional[np.ndarray]:
+    """
+    The quadrilateral (ordered tl, tr, br, bl) of img warped to an upright
+    rectangle of its own size, or None when it is degenerate
+    """
+    tl, tr, br, bl = quad
+    out_w = int(round(max(np.linalg.norm(tr - tl), np.linalg.norm(br - bl))))
+    out_h = int(round(max(np.linalg.norm(bl - tl), np.linalg.norm(br - tr))))
+    if out_w < 2 or out_h < 2:
+        return None
+    target = np.array([[0, 0], [out_w - 1, 0], [out_w - 1, out_h - 1], [0, out_h - 1]], dtype=np.float32)
+    M = cv2.getPerspectiveTransform(quad, target)
+    return cv2.warpPerspective(img, M, (out_w, out_h), flags=interpolation, borderMode=cv2.BORDER_REPLICATE)
+
+
+def estimate_skew_angle(img_gray: np.ndarray, max_angle: float = 15.0, max_dim: int = 1000,
+                        max_points: int = 50000) -> float:
+    """
+    Skew angle in degrees (as passed to cv2.getRotationMatrix2D) that makes
+    text lines horizontal, found by a projection-profile search.
+
+    The image is downsampled so its longest side is at most max_dim and
+    Otsu-thresholded; the foreground pixels (subsampled to max_points) are then
+    projected onto the rotated y axis for each candidate angle, and the angle
+    whose row histogram is sharpest wins. A 1 degree sweep is refined to 0.1.
+    """
+    h, w = img_gray.shape[:2]
+    scale = min(1.0, max_dim / max(h, w))
+    small = cv2.resize(img_gray, (max(1, int(w * scale)), max(1, int(h * scale))),
+                       interpolation=cv2.INTER_AREA) if scale < 1.0 else img_gray
+    _, th = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+    ys, xs = np.nonzero(th)
+    if ys.size == 0:
+        return 0.0
+    if ys.size > max_points:
+        step = ys.size // max_points + 1
+        ys, xs = ys[::step], xs[::step]
+    xs = xs.astype(np.float32) - small.shape[1] / 2
+    ys = ys.astype(np.float32) - small.shape[0] / 2
+    offset = np.hypot(small.shape[0], small.shape[1]) / 2
+    bins = int(2 * offset) + 2
+
+    def sharpness(angle):
+        # Row of each point after cv2's rotation by angle: y' = -sin(a) x + cos(a) y
+        a = np.deg2rad(angle)
+        rows = (-np.sin(a) * xs + np.cos(a) * ys + offset).astype(np.int32)
+        counts = np.bincount(rows, minlength=bins).astype(np.float64)
+        return float(np.dot(counts, counts))
+
+    coarse = np.arange(-max_angle, max_angle + 0.5, 1.0)
+    best = max(coarse, key=sharpness)
+    fine = np.arange(best - 1.0, best + 1.05, 0.1)
+    best = max(fine, key=sharpness)
+    return float(np.clip(best, -max_angle, max_angle))
+
+
+def deskew(img_gray: np.ndarray, max_angle: float = 15.0, tolerance: float = 0.3) -> np.ndarray:
+    """
+    Rotate text lines level. The angle is estimated on a downsampled copy
+    (estimate_skew_angle); skews below tolerance degrees are left alone, so
+    already straight scans skip the full-size warp entirely.
+    """
+    angle = estimate_skew_angle(img_gray, max_angle=max_angle)
+    if abs(angle) < tolerance:
+        return img_gray
 
     (h, w) = img_gray.shape[:2]
-    center = (w // 2, h // 2)
+    center = (w / 2, h / 2)
     M = cv2.getRotationMatrix2D(center, angle, 1.0)
-    rotated = cv2.warpAffine(img_gray, M, (w, h), flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
-    return rotated
+    return cv2.warpAffine(img_gray, M, (w, h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
 
 
-def preprocess_image(image_path: str,
+def _engine():
+    try:
+        from . import ocr_engine
+    except ImportError:
+        import ocr_engine
+    return ocr_engine.get_engine()
+
+
+def preprocess_array(img: np.ndarray,
+                     do_crop: bool = True,
                      do_deskew: bool = True,
                      do_denoise: bool = True,
                      use_adaptive: bool = True,
                      contrast: bool = True,
-                     output_dir: Optional[str] = None) -> str:
+                     clip_limit: float = 3.0,
+                     denoise_h: int = 12) -> np.ndarray:
     """
-    Full preprocessing pipeline. Returns path to processed image file.
+    Full preprocessing pipeline on a decoded image (or an image path): the OCR
+    engine's 'full' profile through its enhance stage. Returns the binarized
+    image. With a stage memo (OCR_STAGE_MEMO_MB), calls that only change later
+    settings reuse the earlier stages' output instead of recomputing it.
     """
-    img = read_image(image_path)
-    gray = to_grayscale(img)
-
-    if do_deskew:
-        gray = deskew(gray)
+    state = _engine().run(img, 'full', stop='enhance', crop=do_crop, deskew=do_deskew, denoise=do_denoise,
+                          adaptive=use_adaptive, contrast=contrast, clip_limit=clip_limit, denoise_h=denoise_h)
+    return state.buffers['ocr_input']
 
-    if do_denoise:
-        gray = denoise(gray, h=12)
 
-    if contrast:
-        gray = enhance_contrast(gray)
-
-    th = binarize(gray, method='adaptive' if use_adaptive else 'otsu')
+def preprocess_image(image_path: str,
+                     do_crop: bool = True,
+                     do_deskew: bool = True,
+                     do_denoise: bool = True,
+                     use_adaptive: bool = True,
+                     contrast: bool = True,
+                     output_dir: Optional[str] = None,
+                     clip_limit: float = 3.0,
+                     denoise_h: int = 12) -> str:
+    """
+    Full preprocessing pipeline. Returns path to processed image file.
+    """
+    th = preprocess_array(image_path, do_crop=do_crop, do_deskew=do_deskew, do_denoise=do_denoise,
+                          use_adaptive=use_adaptive, contrast=contrast, clip_limit=clip_limit, denoise_h=denoise_h)
 
     # Save to temp/output path
     base = os.path.splitext(os.path.basename(image_path))[0]
@@ -1,19 +1,38 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from models import User, Document, AuditLog, db
+from identity import Identity, current_identity
+from fast_json import STREAM_CHUNK_SIZE, stream_json_array
+from exports import CHUNK_SIZE as EXPORT_CHUNK_SIZE, ExportError, export_format, export_range, stream_export
 from datetime import datetime
 
+
 admin_bp = Blueprint('admin', __name__)
 
+
+USER_EXPORT_COLUMNS = [
+    'id', 'email', 'full_name', 'phone', 'role', 'is_verified', 'is_approved', 'is_active',
+    'college_name', 'college_code', 'university', 'department_name', 'created_at'
+]
+DOCUMENT_EXPORT_COLUMNS = [
+    'id', 'title', 'document_type', 'status', 'file_size', 'mime_type', 'uploaded_by',
+    'uploader_email', 'verified_by', 'verification_date', 'created_at'
+]
+AUDIT_LOG_EXPORT_COLUMNS = [
+    'id', 'user_id', 'user_email', 'action', 'resource_type', 'resource_id', 'details',
+    'ip_address', 'created_at'
+]
+
+
 def require_government_role():
-    """Decorator to require government role"""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    """Identity of the calling government user, or a 403 response"""
+    identity = current_identity()
     
-    if not user or user.role != 'government':
+    if not identity or identity.role != 'government':
         return jsonify({'message': 'Access denied. Government role required.'}), 403
     
-    return user
+    return identity
+
 
 @admin_bp.route('/users', methods=['GET'])
 @jwt_required()
@@ -21,7 +40,7 @@ def get_all_users():
     """Get all users (government only)"""
     try:
         user = require_government_role()
-        if not isinstance(user, User):
+        if not isinstance(user, Identity):
             return user  # Return error response
         
         role_filter = request.args.get('role')
@@ -37,55 +56,54 @@ def get_all_users():
         elif status_filter == 'approved':
             query = query.filter_by(is_approved=True)
         
-        users = query.all()
-        
-        users_data = []
-        for u in users:
-            user_data = {
-                'id': u.id,
-                'email': u.email,
-                'full_name': u.full_name,
-                'phone': u.phone,
-                'role': u.role,
-                'is_verified': u.is_verified,
-                'is_approved': u.is_approved,
-                'is_active': u.is_active,
-                'created_at': u.created_at.isoformat()
-            }
-            
-            # Add role-specific data
-            if u.role == 'student':
-                user_data.update({
-                    'roll_number': u.roll_number,
-                    'college_name': u.college_name,
-                    'course': u.course
-                })
-            elif u.role == 'college':
-                user_data.update({
-                    'college_name': u.college_name,
-                    'college_code': u.college_code,
-                    'university': u.university
-                })
-            elif u.role == 'government':
-                user_data.update({
-                    'department_name': u.department_name,
-                    'designation': u.designation
-                })
-            
-            users_data.append(user_data)
-        
-        return jsonify({'users': users_data}), 200
+        def users_data():
+            for u in query.order_by(User.created_at.desc()).yield_per(STREAM_CHUNK_SIZE):
+                user_data = {
+                    'id': u.id,
+                    'email': u.email,
+                    'full_name': u.full_name,
+                    'phone': u.phone,
+                    'role': u.role,
+                    'is_verified': u.is_verified,
+                    'is_approved': u.is_approved,
+                    'is_active': u.is_active,
+                    'created_at': u.created_at.isoformat()
+                }
+                
+                # Add role-specific data
+                if u.role == 'student':
+                    user_data.update({
+                        'roll_number': u.roll_number,
+                        'college_name': u.college_name,
+                        'course': u.course
+                    })
+                elif u.role == 'college':
+                    user_data.update({
+                        'college_name': u.college_name,
+                        'college_code': u.college_code,
+                        'university': u.university
+                    })
+                elif u.role == 'government':
+                    user_data.update({
+                        'department_name': u.department_name,
+                        'designation': u.designation
+                    })
+                
+                yield user_data
+        
+        return stream_json_array(users_data(), key='users')
         
     except Exception as e:
         return jsonify({'message': 'Failed to get users', 'error': str(e)}), 500
 
+
 @admin_bp.route('/users/<user_id>/approve', methods=['POST'])
 @jwt_required()
 def approve_user(user_id):
     """Approve a user account (government only)"""
     try:
         admin_user = require_government_role()
-        if not isinstance(admin_user, User):
+        if not isinstance(admin_user, Identity):
             return admin_user  # Return error response
         
         user = User.query.get(user_id)
@@ -113,13 +131,14 @@ def approve_user(user_id):
         db.session.rollback()
         return jsonify({'message': 'Approval failed', 'error': str(e)}), 500
 
+
 @admin_bp.route('/users/<user_id>/activate', methods=['POST'])
 @jwt_required()
 def toggle_user_activation(user_id):
     """Activate/Deactivate a user account (government only)"""
     try:
         admin_user = require_government_role()
-        if not isinstance(admin_user, User):
+        if not isinstance(admin_user, Identity):
             return admin_user  # Return error response
         
         user = User.query.get(user_id)
@@ -146,13 +165,14 @@ def toggle_user_activation(user_id):
         db.session.rollback()
         return jsonify({'message': 'Activation failed', 'error': str(e)}), 500
 
+
 @admin_bp.route('/audit-logs', methods=['GET'])
 @jwt_required()
 def get_audit_logs():
     """Get audit logs (government only)"""
     try:
         admin_user = require_government_role()
-        if not isinstance(admin_user, User):
+        if not isinstance(admin_user, Identity):
             return admin_user  # Return error response
         
         page = request.args.get('page', 1, type=int)
@@ -208,13 +228,14 @@ def get_audit_logs():
     except Exception as e:
         return jsonify({'message': 'Failed to get audit logs', 'error': str(e)}), 500
 
+
 @admin_bp.route('/stats/system', methods=['GET'])
 @jwt_required()
 def get_system_stats():
     """Get system-wide statistics (government only)"""
     try:
         admin_user = require_government_role()
-        if not isinstance(admin_user, User):
+        if not isinstance(admin_user, Identity):
             return admin_user  # Return error response
         
         # User statistics
@@ -267,4 +288,125 @@ def get_system_stats():
         return jsonify({'stats': stats}), 200
         
     except Exception as e:
-        return jsonify({'message': 'Failed to get system stats', 'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'message': 'Failed to get system stats', 'error': str(e)}), 500
+
+
+@admin_bp.route('/stats/ocr-templates', methods=['GET'])
+@jwt_required()
+def get_ocr_template_stats():
+    """Hit rate of each marksheet layout template (government only)"""
+    try:
+        admin_user = require_government_role()
+        if not isinstance(admin_user, Identity):
+            return admin_user  # Return error response
+
+        from ocr_workers import template_stats
+        return jsonify({'stats': template_stats()}), 200
+
+    except Exception as e:
+        return jsonify({'message': 'Failed to get OCR template stats', 'error': str(e)}), 500
+
+
+@admin_bp.route('/stats/ocr-budget', methods=['GET'])
+@jwt_required()
+def get_ocr_budget_stats():
+    """Current use of the OCR pixel budget and admission counters (government only)"""
+    try:
+        admin_user = require_government_role()
+        if not isinstance(admin_user, Identity):
+            return admin_user  # Return error response
+
+        from admission import budget_stats
+        return jsonify({'stats': budget_stats()}), 200
+
+    except Exception as e:
+        return jsonify({'message': 'Failed to get OCR budget stats', 'error': str(e)}), 500
+
+
+@admin_bp.route('/export/users', methods=['GET'])
+@jwt_required()
+def export_users():
+    """Stream all users as CSV or JSONL (government only)"""
+    try:
+        admin_user = require_government_role()
+        if not isinstance(admin_user, Identity):
+            return admin_user  # Return error response
+        
+        fmt = export_format()
+        query = User.query
+        if request.args.get('role'):
+            query = query.filter_by(role=request.args.get('role'))
+        query = export_range(query, User)
+        
+        rows = (
+            {column: getattr(u, column) for column in USER_EXPORT_COLUMNS}
+            for u in query.yield_per(EXPORT_CHUNK_SIZE)
+        )
+        return stream_export(rows, USER_EXPORT_COLUMNS, fmt, 'users')
+        
+    except ExportError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Failed to export users', 'error': str(e)}), 500
+
+
+@admin_bp.route('/export/documents', methods=['GET'])
+@jwt_required()
+def export_documents():
+    """Stream all documents with their uploader as CSV or JSONL (government only)"""
+    try:
+        admin_user = require_government_role()
+        if not isinstance(admin_user, Identity):
+            return admin_user  # Return error response
+        
+        fmt = export_format()
+        query = Document.query
+        if request.args.get('status'):
+            query = query.filter_by(status=request.args.get('status'))
+        query = export_range(query, Document).outerjoin(User, User.id == Document.uploaded_by).add_columns(
+            User.email.label('uploader_email')
+        )
+        
+        rows = (
+            {**{column: getattr(doc, column) for column in DOCUMENT_EXPORT_COLUMNS if column != 'uploader_email'},
+             'uploader_email': uploader_email}
+            for doc, uploader_email in query.yield_per(EXPORT_CHUNK_SIZE)
+        )
+        return stream_export(rows, DOCUMENT_EXPORT_COLUMNS, fmt, 'documents')
+        
+    except ExportError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Failed to export documents', 'error': str(e)}), 500
+
+
+@admin_bp.route('/export/audit-logs', methods=['GET'])
+@jwt_required()
+def export_audit_logs():
+    """Stream audit logs as CSV or JSONL (government only)"""
+    try:
+        admin_user = require_government_role()
+        if not isinstance(admin_user, Identity):
+            return admin_user  # Return error response
+        
+        fmt = export_format()
+        query = AuditLog.query
+        if request.args.get('user_id'):
+            query = query.filter_by(user_id=request.args.get('user_id'))
+        if request.args.get('action'):
+            query = query.filter(AuditLog.action.contains(request.args.get('action')))
+        query = export_range(query, AuditLog).outerjoin(User, User.id == AuditLog.user_id).add_columns(
+            User.email.label('user_email')
+        )
+        
+        rows = (
+            {**{column: getattr(log, column) for column in AUDIT_LOG_EXPORT_COLUMNS if column != 'user_email'},
+             'user_email': user_email}
+            for log, user_email in query.yield_per(EXPORT_CHUNK_SIZE)
+        )
+        return stream_export(rows, AUDIT_LOG_EXPORT_COLUMNS, fmt, 'audit_logs')
+        
+    except ExportError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': 'Failed to export audit logs', 'error': str(e)}), 500
@@ -2,7 +2,13 @@ from flask import Blueprint, request, jsonify, send_from_directory, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from werkzeug.utils import secure_filename
 from models import User, Document, db, AuditLog
-from final_ocr_system import MarksCardOCRSystem
+from fast_json import STREAM_CHUNK_SIZE, stream_json_array
+from identity import current_identity, current_user
+from ocr_jobs import (
+    PENDING_STATUSES, QUEUED, UPLOAD_OCR_OPTIONS, event_stream, failure_event, finished_stream, get_job,
+    ocr_failed, pending_stream, start_job
+)
+import admission
 import os
 import uuid
 from datetime import datetime, timedelta
@@ -54,45 +60,52 @@ def get_documents():
                 })
             return jsonify(docs), 200
             
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
         if not user:
             return jsonify({'message': 'User not found'}), 404
         
         # Get documents based on user role
         if user.role == 'student':
-            documents = Document.query.filter_by(uploaded_by=current_user_id).all()
+            query = Document.query.filter_by(uploaded_by=current_user_id)
         elif user.role in ['college', 'government', 'employer']:
             # Colleges, government and employers can see all documents
-            documents = Document.query.all()
+            query = Document.query
         else:
-            documents = []
-        
-        documents_data = []
-        for doc in documents:
-            doc_data = {
-                'id': doc.id,
-                'title': doc.title,
-                'document_type': doc.document_type,
-                'status': doc.status,
-                'description': doc.description,
-                'created_at': doc.created_at.isoformat(),
-                'file_size': doc.file_size,
-                'mime_type': doc.mime_type
-            }
-            
-            # Add uploader info if viewing others' documents
-            if user.role in ['college', 'government', 'employer']:
-                uploader = User.query.get(doc.uploaded_by)
-                doc_data['uploader'] = {
-                    'name': uploader.full_name,
-                    'email': uploader.email,
-                    'role': uploader.role
-                } if uploader else None
-            
-            documents_data.append(doc_data)
+            return jsonify({'documents': []}), 200
+        
+        include_uploader = user.role in ['college', 'government', 'employer']
+        if include_uploader:
+            # Uploader columns come from one join instead of a query per document
+            query = query.outerjoin(User, User.id == Document.uploaded_by).add_columns(
+                User.full_name, User.email, User.role
+            )
+        
+        def documents_data():
+            for row in query.order_by(Document.created_at.desc()).yield_per(STREAM_CHUNK_SIZE):
+                doc = row[0] if include_uploader else row
+                doc_data = {
+                    'id': doc.id,
+                    'title': doc.title,
+                    'document_type': doc.document_type,
+                    'status': doc.status,
+                    'description': doc.description,
+                    'created_at': doc.created_at.isoformat(),
+                    'file_size': doc.file_size,
+                    'mime_type': doc.mime_type
+                }
+                
+                # Add uploader info if viewing others' documents
+                if include_uploader:
+                    doc_data['uploader'] = {
+                        'name': row.full_name,
+                        'email': row.email,
+                        'role': row.role
+                    } if row.email else None
+                
+                yield doc_data
         
-        return jsonify({'documents': documents_data}), 200
+        return stream_json_array(documents_data(), key='documents')
         
     except Exception as e:
         return jsonify({'message': 'Failed to get documents', 'error': str(e)}), 500
@@ -101,9 +114,10 @@ def get_documents():
 @jwt_required()
 def upload_document():
     """Upload a new document"""
+    ticket = None
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
         if not user:
             return jsonify({'message': 'User not found'}), 404
@@ -123,6 +137,19 @@ def upload_document():
         if not allowed_file(file.filename):
             return jsonify({'message': 'File type not allowed'}), 400
         
+        # Images are OCR'd in the background once the document is saved, if the
+        # OCR pixel budget can take them (sizes come from headers, nothing is decoded)
+        needs_ocr = bool(file.mimetype and file.mimetype.startswith('image/'))
+        if needs_ocr:
+            try:
+                ticket, _ = admission.admit(file.stream)
+            except admission.ImageRejected as e:
+                return jsonify({'message': 'Image rejected', 'error': str(e)}), 413
+            except admission.AdmissionRejected as e:
+                response = jsonify({'message': 'OCR is busy, please retry shortly', 'retry_after': e.retry_after})
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response, 429
+        
         # Generate unique filename
         filename = secure_filename(file.filename)
         unique_filename = f"{str(uuid.uuid4())}_{filename}"
@@ -136,37 +163,6 @@ def upload_document():
         # Save file
         file.save(file_path)
         
-        # Process with OCR if it's an image
-        ocr_data = None
-        extracted_text = ""
-        
-        if file.mimetype and file.mimetype.startswith('image/'):
-            try:
-                ocr_system = MarksCardOCRSystem(confidence_threshold=0.5)
-                marks_data = ocr_system.process_marks_card(file_path, preprocess=True)
-                
-                # Convert to serializable format
-                ocr_data = {
-                    'university': marks_data.university,
-                    'student_name': marks_data.student_info.name,
-                    'roll_number': marks_data.student_info.roll_number,
-                    'subjects': [
-                        {
-                            'course_code': s.course_code,
-                            'course_title': s.course_title,
-                            'marks': s.total_marks
-                        } for s in marks_data.subjects
-                    ],
-                    'result': marks_data.result,
-                    'total_elements': len(marks_data.all_extracted_text)
-                }
-                
-                extracted_text = ' '.join([item['text'] for item in marks_data.all_extracted_text])
-                
-            except Exception as ocr_error:
-                print(f"OCR processing failed: {ocr_error}")
-                # Continue without OCR data
-        
         # Create document record
         document = Document(
             id=str(uuid.uuid4()),
@@ -177,13 +173,19 @@ def upload_document():
             mime_type=file.mimetype,
             description=description,
             uploaded_by=current_user_id,
-            ocr_data=ocr_data,
-            extracted_text=extracted_text
+            extracted_text="",
+            ocr_status=QUEUED if needs_ocr else None
         )
         
         db.session.add(document)
         db.session.commit()
         
+        if needs_ocr:
+            # Progress streams from /documents/<id>/ocr/events (see ocr_jobs.py)
+            start_job(current_app._get_current_object(), document.id, current_user_id, file_path,
+                      ticket=ticket, **UPLOAD_OCR_OPTIONS)
+            ticket = None  # released by the job
+        
         # Log upload action
         log_user_action(current_user_id, 'document_upload', 
                        {'document_id': document.id, 'document_type': document_type}, 
@@ -197,12 +199,16 @@ def upload_document():
                 'document_type': document.document_type,
                 'status': document.status,
                 'created_at': document.created_at.isoformat(),
-                'ocr_processed': ocr_data is not None
-            }
-        }), 201
+                'ocr_processed': False,
+                'ocr_pending': needs_ocr
+            },
+            'ocr_events_url': f'/api/documents/{document.id}/ocr/events' if needs_ocr else None
+        }), 202 if needs_ocr else 201
         
     except Exception as e:
         db.session.rollback()
+        if ticket is not None:
+            admission.release(ticket)
         return jsonify({'message': 'Upload failed', 'error': str(e)}), 500
 
 @api_bp.route('/documents/<document_id>', methods=['GET'])
@@ -211,7 +217,7 @@ def get_document(document_id):
     """Get specific document details"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
         if not user:
             return jsonify({'message': 'User not found'}), 404
@@ -260,7 +266,7 @@ def verify_document(document_id):
     """Verify a document (college/government only)"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
         if not user or user.role not in ['college', 'government']:
             return jsonify({'message': 'Access denied'}), 403
@@ -302,7 +308,7 @@ def download_document(document_id):
     """Download document file"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
         if not user:
             return jsonify({'message': 'User not found'}), 404
@@ -340,7 +346,7 @@ def get_document_ocr(document_id):
     """Get OCR extracted data for a specific document"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
         if not user:
             return jsonify({'message': 'User not found'}), 404
@@ -361,7 +367,9 @@ def get_document_ocr(document_id):
             'document_type': document.document_type,
             'ocr_data': document.ocr_data,
             'extracted_text': document.extracted_text,
-            'has_ocr_data': document.ocr_data is not None
+            'has_ocr_data': document.ocr_data is not None and not ocr_failed(document.ocr_data),
+            'ocr_failed': ocr_failed(document.ocr_data),
+            'ocr_status': document.ocr_status
         }
         
         # Log OCR view action
@@ -374,13 +382,50 @@ def get_document_ocr(document_id):
     except Exception as e:
         return jsonify({'message': 'Failed to get OCR data', 'error': str(e)}), 500
 
+@api_bp.route('/documents/<document_id>/ocr/events', methods=['GET'])
+@jwt_required()
+def stream_document_ocr(document_id):
+    """Server-sent events for a document's OCR job: stage transitions, partial fields, then done or error"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = current_identity()
+        
+        if not user:
+            return jsonify({'message': 'User not found'}), 404
+        
+        document = Document.query.get(document_id)
+        
+        if not document:
+            return jsonify({'message': 'Document not found'}), 404
+        
+        # Check permissions
+        if user.role == 'student' and document.uploaded_by != current_user_id:
+            return jsonify({'message': 'Access denied'}), 403
+        
+        job = get_job(document_id)
+        if job is None:
+            # Finished long ago, running in another server process, or waiting to be resumed
+            if ocr_failed(document.ocr_data):
+                return finished_stream('error', failure_event(document_id, document.ocr_data))
+            if document.ocr_data is not None:
+                return finished_stream('done', {'document_id': document_id, 'ocr_data': document.ocr_data})
+            if document.ocr_status in PENDING_STATUSES:
+                return pending_stream(document_id, document.ocr_status)
+            return jsonify({'message': 'No OCR job for this document'}), 404
+        
+        last_event_id = request.headers.get('Last-Event-ID', '')
+        return event_stream(job, int(last_event_id) if last_event_id.isdigit() else None)
+        
+    except Exception as e:
+        return jsonify({'message': 'Failed to stream OCR progress', 'error': str(e)}), 500
+
 @api_bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_stats():
     """Get dashboard statistics"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
         if not user:
             return jsonify({'message': 'User not found'}), 404
@@ -425,7 +470,7 @@ def employer_verify_document():
     """Verify document authenticity for employers"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_user()
         
         if not user or user.role != 'employer':
             return jsonify({'message': 'Access denied. Employer role required.'}), 403
@@ -541,7 +586,7 @@ def update_employer_profile():
     """Update employer profile information"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_user()
         
         if not user or user.role != 'employer':
             return jsonify({'message': 'Access denied. Employer role required.'}), 403
@@ -600,7 +645,7 @@ def employer_submit_verification():
     """Submit employer verification result for a document"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_user()
         
         if not user or user.role != 'employer':
             return jsonify({'message': 'Access denied. Employer role required.'}), 403
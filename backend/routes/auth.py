@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
 from models import User, db, AuditLog
+from identity import current_identity, current_user
 from datetime import datetime, timedelta
 import uuid
 import re
@@ -284,7 +285,7 @@ def refresh():
     """Refresh access token"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
         if not user or not user.is_active:
             return jsonify({'message': 'Invalid user'}), 401
@@ -304,8 +305,7 @@ def refresh():
 def get_profile():
     """Get current user profile"""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_user()
         
         if not user:
             return jsonify({'message': 'User not found'}), 404
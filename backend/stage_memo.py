@@ -0,0 +1,160 @@
+"""
+Memo of intermediate OCR stage buffers.
+
+Sweeping preprocessing settings over the same page (see ocr_engine) would
+otherwise decode, grayscale, deskew and denoise it again for every
+combination. The engine keys each memoized stage's output by the input's
+content hash chained with the settings of every stage up to and including
+it, so a run only recomputes from the first stage whose settings differ.
+
+Entries live in an in-memory LRU holding at most max_bytes of buffers. With
+a spill directory, entries evicted from memory (or too large for it) are
+pickled there and loaded back on a later miss; the directory is trimmed,
+oldest first, to spill_max_bytes. The spill directory may be shared by
+several processes (e.g. a tuning pool): files are written atomically.
+
+The memo is off unless OCR_STAGE_MEMO_MB is set (OCR_STAGE_MEMO_SPILL_DIR
+adds the disk spill), or an engine is given one explicitly.
+"""
+import collections
+import logging
+import os
+import pickle
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+MEGABYTE = 2 ** 20
+DEFAULT_SPILL_BYTES = 2048 * MEGABYTE
+
+
+def _nbytes(buffers):
+    """Size of a stage's buffers (arrays, or lists of arrays)"""
+    total = 0
+    for value in buffers.values():
+        if isinstance(value, (list, tuple)):
+            total += sum(getattr(item, 'nbytes', 0) for item in value)
+        else:
+            total += getattr(value, 'nbytes', 0)
+    return total
+
+
+class StageMemo:
+    def __init__(self, max_bytes, spill_dir=None, spill_max_bytes=DEFAULT_SPILL_BYTES):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()  # key -> (buffers, nbytes)
+        self._bytes = 0
+        self._hits = 0
+        self._spill_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    def get(self, key):
+        """The buffers stored under key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+
+        buffers = self._load(key)
+        with self._lock:
+            if buffers is None:
+                self._misses += 1
+                return None
+            self._spill_hits += 1
+            self._insert(key, buffers, spill=False)
+        return buffers
+
+    def put(self, key, buffers):
+        with self._lock:
+            self._insert(key, buffers, spill=True)
+
+    def _insert(self, key, buffers, spill):
+        nbytes = _nbytes(buffers)
+        if nbytes > self.max_bytes:
+            if spill:
+                self._spill(key, buffers)
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        self._entries[key] = (buffers, nbytes)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes:
+            evicted, (evicted_buffers, evicted_bytes) = self._entries.popitem(last=False)
+            self._bytes -= evicted_bytes
+            self._evictions += 1
+            self._spill(evicted, evicted_buffers)
+
+    def _path(self, key):
+        return os.path.join(self.spill_dir, f'{key}.pkl')
+
+    def _spill(self, key, buffers):
+        if not self.spill_dir or os.path.exists(self._path(key)):
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.spill_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(buffers, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+            self._trim_spill()
+        except OSError as e:
+            logger.warning(f"⚠️ Could not spill stage memo entry: {e}")
+
+    def _trim_spill(self):
+        files = []
+        for entry in os.scandir(self.spill_dir):
+            if entry.name.endswith('.pkl'):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.spill_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def _load(self, key):
+        if not self.spill_dir:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"⚠️ Discarding unreadable stage memo entry {key}: {e}")
+            return None
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._spill_hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'megabytes': round(self._bytes / MEGABYTE, 1),
+                'max_megabytes': round(self.max_bytes / MEGABYTE, 1),
+                'hits': self._hits,
+                'spill_hits': self._spill_hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'hit_rate': round((self._hits + self._spill_hits) / lookups, 3) if lookups else None,
+            }
+
+
+def memo_from_env():
+    """StageMemo configured by OCR_STAGE_MEMO_MB / OCR_STAGE_MEMO_SPILL_DIR, or None"""
+    megabytes = float(os.environ.get('OCR_STAGE_MEMO_MB', 0))
+    if megabytes <= 0:
+        return None
+    return StageMemo(int(megabytes * MEGABYTE), spill_dir=os.environ.get('OCR_STAGE_MEMO_SPILL_DIR') or None)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+OCR admission control check
+===========================
+Exercises admission.PixelBudget and admission.measure without running OCR:
+header-only measurement, FIFO admission within the budget, queue limits with
+a Retry-After estimate, and rejection of images larger than the budget.
+"""
+
+import io
+import sys
+import threading
+import time
+
+from PIL import Image
+
+from admission import MEGAPIXEL, ImageRejected, PixelBudget, measure
+
+
+def _png(width, height):
+    buffer = io.BytesIO()
+    Image.new('L', (width, height), 255).save(buffer, format='PNG')
+    buffer.seek(0)
+    return buffer
+
+
+def check_measure():
+    stream = _png(3000, 2000)
+    stream.seek(5)
+    return measure(stream) == 6 * MEGAPIXEL and stream.tell() == 5
+
+
+def check_fifo_admission():
+    budget = PixelBudget(capacity=10 * MEGAPIXEL, queue_capacity=30 * MEGAPIXEL)
+    first, _ = budget.enqueue(8 * MEGAPIXEL)
+    second, _ = budget.enqueue(4 * MEGAPIXEL)
+    if not budget.acquire(first, timeout=1):
+        return False
+    # 8 + 4 MP does not fit: the second job waits until the first releases
+    if budget.acquire(second, timeout=0.2):
+        return False
+    second, _ = budget.enqueue(4 * MEGAPIXEL)
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(budget.acquire(second, timeout=5)))
+    waiter.start()
+    time.sleep(0.2)
+    budget.release(first)
+    waiter.join()
+    stats = budget.stats()
+    return admitted == [True] and stats['in_use_megapixels'] == 4 and stats['active_jobs'] == 1
+
+
+def check_queue_limit():
+    budget = PixelBudget(capacity=10 * MEGAPIXEL, queue_capacity=12 * MEGAPIXEL)
+    budget.enqueue(8 * MEGAPIXEL)
+    ticket, retry_after = budget.enqueue(8 * MEGAPIXEL)
+    return ticket is None and retry_after >= 1 and budget.stats()['rejected_total'] == 1
+
+
+def check_oversized():
+    budget = PixelBudget(capacity=10 * MEGAPIXEL, queue_capacity=30 * MEGAPIXEL)
+    try:
+        budget.enqueue(11 * MEGAPIXEL)
+    except ImageRejected:
+        return True
+    return False
+
+
+CHECKS = [
+    ('measure reads dimensions from headers', check_measure),
+    ('jobs are admitted in order within the budget', check_fifo_admission),
+    ('full queue rejects with a retry estimate', check_queue_limit),
+    ('images larger than the budget are rejected', check_oversized),
+]
+
+
+def main():
+    print("Testing OCR admission control...")
+    passed = 0
+    for name, check in CHECKS:
+        try:
+            ok = check()
+        except Exception as e:
+            print(f"  ❌ {name}: {e}")
+            continue
+        print(f"  {'✅' if ok else '❌'} {name}")
+        passed += ok
+
+    print(f"\nAdmission Test Result: {passed}/{len(CHECKS)} checks passed")
+    return passed == len(CHECKS)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
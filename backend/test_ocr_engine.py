@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+OCR engine check
+================
+Exercises ocr_engine without the Paddle models: graph validation, the
+preprocessing stages on a sample marks card with per-stage timings, the
+'extractor' enhancement against the PIL chain it replaced, the
+detect/recognize/extract plumbing with a stand-in OCR pipeline, the stage
+memo (reuse across a settings sweep, LRU eviction and disk spill), and
+that threads sharing an engine don't run the models concurrently.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+from PIL import Image, ImageEnhance
+
+import ocr_engine
+from stage_memo import StageMemo
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_marks_cards', '2.png')
+
+
+class StandInModels:
+    """An OCR pipeline reading three lines (one weak) and noting its options"""
+
+    class Pipeline:
+        calls = []
+
+        def predict(self, image, **options):
+            self.calls.append(options)
+            yield {
+                'rec_texts': ['PASS', 'TAHIR AHMAD KHAN', ''],
+                'rec_scores': [0.9, 0.4, 0.95],
+                'rec_polys': np.array([[[10, 12], [200, 12], [200, 42], [10, 42]],
+                                       [[300, 10], [400, 10], [400, 40], [300, 40]],
+                                       [[10, 100], [50, 100], [50, 300], [10, 300]]]),
+            }
+
+    pipeline = Pipeline()
+
+
+def check_graph_validation():
+    try:
+        ocr_engine.OCREngine(graph=ocr_engine.GRAPH[1:])
+    except ValueError:
+        return True
+    return False
+
+
+def check_preprocessing_stages():
+    state = ocr_engine.OCREngine().run(SAMPLE, 'full', stop='enhance')
+    binarized = state.buffers['ocr_input']
+    return (list(state.timings) == ['decode', 'normalize', 'denoise', 'enhance']
+            and binarized.ndim == 2 and set(np.unique(binarized)) <= {0, 255})
+
+
+def check_extractor_enhancement():
+    image = cv2.imread(SAMPLE)
+    pil = Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+    pil = ImageEnhance.Sharpness(ImageEnhance.Contrast(pil).enhance(1.5)).enhance(1.2)
+    expected = cv2.adaptiveThreshold(cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2GRAY), 255,
+                                     cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    state = ocr_engine.OCREngine().run(image, 'extractor', stop='enhance', deskew=False)
+    agreement = float((state.buffers['ocr_input'] == expected).mean())
+    return agreement > 0.97
+
+
+def check_detect_recognize_extract():
+    engine = ocr_engine.OCREngine(models=StandInModels())
+    events = []
+    state = engine.run(np.full((400, 500), 255, np.uint8), 'raw', confidence_threshold=0.5,
+                       progress=lambda stage, data: events.append(stage),
+                       fields=lambda elements: [item['text'] for item in elements])
+    # The 0.4 line is below the threshold, the empty one is dropped; line orientation is on by default
+    return (state.result == ['PASS'] and events == ['detection', 'recognition']
+            and StandInModels.Pipeline.calls[-1] == {'use_textline_orientation': True}
+            and state.buffers['text_elements'][0]['bbox'][2] == [200.0, 42.0]
+            and list(state.timings) == [stage.name for stage in ocr_engine.GRAPH])
+
+
+def check_memo_sweep():
+    engine = ocr_engine.OCREngine(memo=StageMemo(256 * 2 ** 20))
+    engine.run(SAMPLE, 'full', stop='enhance')
+    otsu = engine.run(SAMPLE, 'full', stop='enhance', adaptive=False)
+    fresh = ocr_engine.OCREngine().run(SAMPLE, 'full', stop='enhance', adaptive=False)
+    # Only the threshold changed: decode, deskew and denoise come from the memo
+    return (otsu.memo_hits == ['decode', 'normalize', 'denoise']
+            and np.array_equal(otsu.buffers['ocr_input'], fresh.buffers['ocr_input']))
+
+
+def check_memo_eviction_and_spill():
+    with tempfile.TemporaryDirectory() as spill_dir:
+        memo = StageMemo(max_bytes=2000, spill_dir=spill_dir)
+        for key in ('a', 'b', 'c'):
+            memo.put(key, {'gray': np.full((30, 30), ord(key), np.uint8)})
+        # 'a' was evicted by 'c'; loading it back from disk evicts 'b'
+        spilled = memo.get('a')
+        stats = memo.stats()
+        return (stats['evictions'] == 2 and stats['spill_hits'] == 1 and spilled is not None
+                and int(spilled['gray'][0, 0]) == ord('a') and memo.get('missing') is None)
+
+
+def check_inference_serialized():
+    class Counting:
+        active = peak = 0
+        lock = threading.Lock()
+
+        def predict(self, crops, batch_size=1):
+            with self.lock:
+                self.active += 1
+                Counting.peak = max(Counting.peak, self.active)
+            time.sleep(0.05)
+            with self.lock:
+                self.active -= 1
+            for _ in crops:
+                yield {'rec_text': 'x', 'rec_score': 1.0}
+
+    class CountingModels:
+        recognizer = Counting()
+
+    engine = ocr_engine.OCREngine(models=CountingModels())
+    crop = np.zeros((32, 100, 3), np.uint8)
+    threads = [threading.Thread(target=engine.recognize_crops, args=([crop],)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return Counting.peak == 1
+
+
+CHECKS = [
+    ('stage graph rejects missing inputs', check_graph_validation),
+    ('preprocessing stages run and are timed', check_preprocessing_stages),
+    ('extractor profile matches the PIL enhancement', check_extractor_enhancement),
+    ('detect, recognize and extract hand buffers along', check_detect_recognize_extract),
+    ('a settings sweep reuses unchanged stages', check_memo_sweep),
+    ('memo evicts least recently used entries to disk', check_memo_eviction_and_spill),
+    ('threads sharing an engine take turns on the models', check_inference_serialized),
+]
+
+
+def main():
+    print("Testing OCR engine...")
+    passed = 0
+    for name, check in CHECKS:
+        try:
+            ok = check()
+        except Exception as e:
+            print(f"  ❌ {name}: {e}")
+            continue
+        print(f"  {'✅' if ok else '❌'} {name}")
+        passed += ok
+
+    print(f"\nOCR Engine Test Result: {passed}/{len(CHECKS)} checks passed")
+    return passed == len(CHECKS)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Background OCR job check
+========================
+Runs ocr_jobs against a throwaway SQLite database with a stand-in for
+ocr_workers.run_ocr (no models are loaded): the status persisted on the
+document through a job, failures, the claim that keeps a job from running
+twice, resuming interrupted jobs, and the /ocr/events route for jobs this
+process does and does not track.
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+_db_dir = tempfile.TemporaryDirectory()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir.name, 'jobs.db')}"
+
+from flask_jwt_extended import create_access_token
+
+import ocr_jobs
+import ocr_workers
+from credential_app import create_app
+from models import Document, User, db
+
+app = create_app()
+ran = []
+
+
+def _fake_run_ocr(file_path, progress=None, **options):
+    """Stand-in for run_ocr: records the status it ran under, fails on request"""
+    with app.app_context():
+        document = Document.query.filter_by(file_path=file_path).first()
+        ran.append((file_path, document.ocr_status))
+    if 'fail' in file_path:
+        raise RuntimeError('stand-in OCR failure')
+    progress('field', {'name': 'student_name', 'value': 'A. Student'})
+    return {'ocr_data': {'student_name': 'A. Student'}, 'extracted_text': 'A. Student'}
+
+
+ocr_workers.run_ocr = _fake_run_ocr
+# The failure check fails a job on purpose
+logging.getLogger('ocr_jobs').setLevel(logging.CRITICAL)
+
+
+def _admin():
+    return User.query.filter_by(role='government').first()
+
+
+def _document(status=None, ocr_data=None, name='page.png'):
+    with app.app_context():
+        document = Document(
+            id=str(uuid.uuid4()), title=name, document_type='marksheet',
+            file_path=f'/uploads/{uuid.uuid4()}_{name}', uploaded_by=_admin().id,
+            ocr_status=status, ocr_data=ocr_data,
+        )
+        db.session.add(document)
+        db.session.commit()
+        return document.id, document.file_path
+
+
+def _state(document_id):
+    with app.app_context():
+        document = Document.query.get(document_id)
+        return document.ocr_status, document.ocr_data
+
+
+def _wait(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if job.events and job.events[-1][0] in ocr_jobs.FINAL_EVENTS + ('pending',):
+            return [stage for stage, _ in job.events]
+        time.sleep(0.02)
+    return None
+
+
+def _events(document_id):
+    with app.app_context():
+        admin = _admin()
+        token = create_access_token(identity=admin.id, additional_claims={'role': admin.role})
+    response = app.test_client().get(
+        f'/api/documents/{document_id}/ocr/events', headers={'Authorization': f'Bearer {token}'}
+    )
+    return response.status_code, response.get_data()
+
+
+def check_job_lifecycle():
+    document_id, file_path = _document(ocr_jobs.QUEUED)
+    job = ocr_jobs.start_job(app, document_id, None, file_path)
+    stages = _wait(job)
+    status, ocr_data = _state(document_id)
+    return (stages == ['queued', 'started', 'field', 'done'] and (file_path, 'running') in ran
+            and status == 'done' and ocr_data == {'student_name': 'A. Student'})
+
+
+def check_failure_is_stored():
+    document_id, file_path = _document(ocr_jobs.QUEUED, name='fail.png')
+    stages = _wait(ocr_jobs.start_job(app, document_id, None, file_path))
+    status, ocr_data = _state(document_id)
+    return stages[-1] == 'error' and status == 'failed' and ocr_data['error'] == 'stand-in OCR failure'
+
+
+def check_claimed_job_runs_once():
+    document_id, file_path = _document(ocr_jobs.RUNNING)
+    stages = _wait(ocr_jobs.start_job(app, document_id, None, file_path))
+    return (stages == ['queued', 'pending'] and all(path != file_path for path, _ in ran)
+            and ocr_jobs.get_job(document_id) is None and _state(document_id)[0] == 'running')
+
+
+def check_resume_pending():
+    queued_id, _ = _document(ocr_jobs.QUEUED)
+    interrupted_id, _ = _document(ocr_jobs.RUNNING)
+    # The previous check left a document marked running, which resuming also picks up
+    resumed = ocr_jobs.resume_pending(app)
+    jobs = [ocr_jobs.get_job(document_id) for document_id in (queued_id, interrupted_id)]
+    finished = all(job is not None and _wait(job)[-1] == 'done' for job in jobs)
+    return resumed >= 2 and finished and {_state(queued_id)[0], _state(interrupted_id)[0]} == {'done'}
+
+
+def check_untracked_job_streams_pending():
+    document_id, _ = _document(ocr_jobs.QUEUED)
+    status, body = _events(document_id)
+    return status == 200 and b'retry: 3000' in body and b'event: pending' in body and b'"queued"' in body
+
+
+def check_finished_and_missing_jobs():
+    done_id, _ = _document(ocr_jobs.DONE, {'student_name': 'B. Student'})
+    failed_id, _ = _document(ocr_jobs.FAILED, {'error': 'unreadable', 'failed_at': '2026-01-01T00:00:00'})
+    none_id, _ = _document()
+    done, failed, missing = _events(done_id), _events(failed_id), _events(none_id)
+    return (done[0] == 200 and b'event: done' in done[1] and b'B. Student' in done[1]
+            and failed[0] == 200 and b'event: error' in failed[1] and b'unreadable' in failed[1]
+            and missing[0] == 404)
+
+
+def check_tracked_job_replays_events():
+    document_id, file_path = _document(ocr_jobs.QUEUED)
+    _wait(ocr_jobs.start_job(app, document_id, None, file_path))
+    status, body = _events(document_id)
+    return (status == 200 and body.index(b'event: queued') < body.index(b'event: started')
+            < body.index(b'event: field') < body.index(b'event: done'))
+
+
+CHECKS = [
+    ('a job moves its document from queued to running to done', check_job_lifecycle),
+    ('a failed job stores the error and status', check_failure_is_stored),
+    ('a job already claimed elsewhere is not run again', check_claimed_job_runs_once),
+    ('resume_pending re-queues queued and interrupted jobs', check_resume_pending),
+    ('events for an untracked pending job ask the client to retry', check_untracked_job_streams_pending),
+    ('events for finished and missing jobs come from the database', check_finished_and_missing_jobs),
+    ('events for a tracked job replay every stage', check_tracked_job_replays_events),
+]
+
+
+def main():
+    print("Testing background OCR jobs...")
+    passed = 0
+    for name, check in CHECKS:
+        try:
+            ok = check()
+        except Exception as e:
+            print(f"  ❌ {name}: {e}")
+            continue
+        print(f"  {'✅' if ok else '❌'} {name}")
+        passed += ok
+
+    print(f"\nOCR Jobs Test Result: {passed}/{len(CHECKS)} checks passed")
+    return passed == len(CHECKS)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Marksheet template check
+========================
+Exercises ocr_templates and the template path of MarksCardOCRSystem with a
+stand-in recognizer (no Paddle models): header fingerprints, registry
+matching and its distance threshold on the sample marks cards, region
+cropping, the templates' strip patterns, the fallback when a required field
+is missing, and TemplateStats hit rates.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+import ocr_templates
+from final_ocr_system import MarksCardOCRSystem
+from ocr_templates import Template, TemplateRegistry, TemplateStats, crop_region, header_fingerprint, upright_page
+
+SAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_marks_cards')
+KASHMIR = 'kashmir_university_marks_certificate'
+BANGALORE = 'bangalore_university_statement_of_marks'
+
+_pages = {}
+
+
+def _page(number):
+    if number not in _pages:
+        _pages[number] = upright_page(os.path.join(SAMPLES, f'{number}.png'))
+    return _pages[number]
+
+
+def _template(name):
+    return next(template for template in TemplateRegistry.load().templates if template.name == name)
+
+
+class StandInSystem(MarksCardOCRSystem):
+    """Answers recognition from fixed text per field, recording the crops it is given"""
+
+    def __init__(self, template, lines, blocks=None):
+        self.confidence_threshold = 0.5
+        self.profile = None
+        self.engine = None
+        self.crops = []
+        line_fields = [name for name, spec in template.fields.items() if spec.get('mode', 'line') == 'line']
+        self._lines = [lines.get(name) for name in line_fields]
+        self._blocks = list((blocks or {}).values())
+
+    def recognize_lines(self, crops):
+        self.crops.extend(crop.shape for crop in crops)
+        return [{'text': text, 'confidence': 0.9 if text else 0.0} for text in self._lines]
+
+    def extract_raw_text(self, image_path, progress=None):
+        texts = self._blocks.pop(0) if self._blocks else []
+        return [{'text': text, 'confidence': 0.9, 'index': i} for i, text in enumerate(texts)]
+
+
+KASHMIR_LINES = {
+    'semester': 'SEMESTER.... 4TH',
+    'name': 'NAME·······TAHIR AHMAD KHAN',
+    'parentage': 'PARENTAGE: AB KHAN',
+    'roll_number': 'ROLL NO. 826',
+    'registration_number': 'REG.NO.: 1234-KU-2019',
+}
+KASHMIR_BLOCKS = {
+    'subjects': ['MBA401', 'Strategic Management', '20', '60', '80'],
+    'summary': ['TOTAL 406', 'PASS'],
+}
+
+
+def check_fingerprint():
+    page = _page(1)
+    blank = np.full_like(page, 255)
+    # A couple of pixels of shift must not move the hash far
+    shifted = np.roll(page, 3, axis=1)
+    template = _template(KASHMIR)
+    value = header_fingerprint(page, template.header_region)
+    return (header_fingerprint(blank) is None and value == template.fingerprint
+            and bin(header_fingerprint(shifted, template.header_region) ^ value).count('1') <= 4)
+
+
+def check_registry_match():
+    registry = TemplateRegistry.load()
+    distances = {
+        number: {template.name: template.distance(_page(number)) for template in registry.templates}
+        for number in (1, 2)
+    }
+    return (distances == {1: {KASHMIR: 0, BANGALORE: 24}, 2: {KASHMIR: 38, BANGALORE: 0}}
+            and registry.match(_page(1)).name == KASHMIR and registry.match(_page(2)).name == BANGALORE)
+
+
+def check_match_threshold():
+    bangalore = _template(BANGALORE)
+    strict = TemplateRegistry([bangalore])
+    bangalore_24 = Template({'name': 'loose', 'header': {'region': bangalore.header_region,
+                                                         'fingerprint': f'{bangalore.fingerprint:016x}',
+                                                         'max_distance': 24}})
+    return (strict.match(_page(1)) is None and TemplateRegistry([bangalore_24]).match(_page(1)).name == 'loose'
+            and TemplateRegistry([]).match(_page(1)) is None)
+
+
+def check_region_cropping():
+    image = np.arange(200 * 100).reshape(200, 100)
+    crop = crop_region(image, [0.1, 0.25, 0.5, 0.5])
+    # Degenerate regions still give at least one pixel
+    thin = crop_region(image, [0.5, 0.5, 0.5, 0.5])
+    template = _template(KASHMIR)
+    system = StandInSystem(template, KASHMIR_LINES, dict(KASHMIR_BLOCKS))
+    system.extract_with_template(_page(1), template)
+    h, w = _page(1).shape
+    name_region = template.fields['name']['region']
+    return (crop.shape == (50, 40) and crop[0, 0] == 50 * 100 + 10 and thin.shape == (1, 1)
+            and (int(name_region[3] * h) - int(name_region[1] * h),
+                 int(name_region[2] * w) - int(name_region[0] * w), 3) in system.crops)
+
+
+def check_strip_patterns():
+    template = _template(KASHMIR)
+    marks_data = StandInSystem(template, KASHMIR_LINES, dict(KASHMIR_BLOCKS)).extract_with_template(_page(1), template)
+    info = marks_data.student_info
+    bangalore = _template(BANGALORE)
+    other = StandInSystem(bangalore, {'name': 'Name : JABIR N K', 'registration_number': 'REGISTER NUMBER 12YUCMA056',
+                                      'program': 'DEGREE: B.COM'}).extract_with_template(_page(2), bangalore)
+    return ((info.name, info.roll_number, info.registration_number, info.parentage, info.semester)
+            == ('TAHIR AHMAD KHAN', '826', '1234-KU-2019', 'AB KHAN', '4TH')
+            and [s.course_code for s in marks_data.subjects] == ['MBA401'] and marks_data.subjects[0].total_marks == '80'
+            and (marks_data.total_marks, marks_data.result) == ('406', 'PASS')
+            and (other.student_info.name, other.student_info.registration_number, other.student_info.program)
+            == ('JABIR N K', '12YUCMA056', 'B.COM'))
+
+
+def check_required_fallback():
+    template = _template(KASHMIR)
+    shared, ocr_templates._registry = ocr_templates._registry, TemplateRegistry([template])
+    try:
+        complete = StandInSystem(template, KASHMIR_LINES, dict(KASHMIR_BLOCKS))._process_with_template(_page(1))
+        no_roll = StandInSystem(template, {**KASHMIR_LINES, 'roll_number': None},
+                                dict(KASHMIR_BLOCKS))._process_with_template(_page(1))
+        unmatched = StandInSystem(template, KASHMIR_LINES)._process_with_template(_page(2))
+    finally:
+        ocr_templates._registry = shared
+    marks_data, matched = complete
+    return (matched == KASHMIR and marks_data.template == marks_data.template_matched == KASHMIR
+            and no_roll == (None, KASHMIR) and unmatched == (None, None))
+
+
+def check_stats():
+    stats = TemplateStats()
+    stats.record(KASHMIR, KASHMIR)
+    stats.record(KASHMIR, KASHMIR)
+    stats.record(KASHMIR, None)
+    stats.record(BANGALORE, None)
+    stats.record(None)
+    snapshot = stats.snapshot()
+    return (snapshot['templates'][KASHMIR] == {'matched': 3, 'hits': 2, 'fallbacks': 1, 'hit_rate': 0.667}
+            and snapshot['templates'][BANGALORE]['hit_rate'] == 0.0
+            and (snapshot['unmatched'], snapshot['total'], snapshot['hit_rate']) == (1, 5, 0.4)
+            and TemplateStats().snapshot()['hit_rate'] is None)
+
+
+CHECKS = [
+    ('header fingerprints are stable and skip blank headers', check_fingerprint),
+    ('sample pages match their own template', check_registry_match),
+    ('matching respects max_distance', check_match_threshold),
+    ('field regions are cropped from the page', check_region_cropping),
+    ("templates' strip patterns clean field values", check_strip_patterns),
+    ('a missing required field falls back to full-page OCR', check_required_fallback),
+    ('template hit rates are counted', check_stats),
+]
+
+
+def main():
+    print("Testing marksheet templates...")
+    passed = 0
+    for name, check in CHECKS:
+        try:
+            ok = check()
+        except Exception as e:
+            print(f"  ❌ {name}: {e}")
+            continue
+        print(f"  {'✅' if ok else '❌'} {name}")
+        passed += ok
+
+    print(f"\nOCR Templates Test Result: {passed}/{len(CHECKS)} checks passed")
+    return passed == len(CHECKS)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
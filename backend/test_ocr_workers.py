@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+OCR worker pool check
+=====================
+Runs ocr_workers with a stand-in OCR system (no Paddle models): a pool
+server started in its own interpreter, as in production, reads the image
+from shared memory and sends back the compact result and progress; the API
+side unlinks the block afterwards whether the task succeeds, fails or cannot
+even be submitted; and run_ocr falls back to in-process OCR (page by page)
+when no pool is configured.
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+import ocr_workers
+from final_ocr_system import MarksCardData, StudentInfo
+
+
+class StandInSystem:
+    """Reads nothing: names the student after the pixels it was given"""
+
+    def __init__(self, confidence_threshold=0.5):
+        self.confidence_threshold = confidence_threshold
+
+    def process_marks_card(self, image, progress=None, fail=False, **options):
+        if fail:
+            raise RuntimeError('stand-in OCR failure')
+        if progress is not None:
+            progress('detection', {'shape': list(image.shape)})
+        return MarksCardData(
+            university='STAND-IN UNIVERSITY',
+            student_info=StudentInfo(name=f'PIXELS {int(image.sum())}', roll_number=str(image.shape[0])),
+            all_extracted_text=[{'text': 'STAND-IN', 'confidence': 1.0, 'index': 0}],
+        )
+
+
+def stand_in_system(confidence_threshold):
+    return StandInSystem(confidence_threshold)
+
+
+class RecordingClient:
+    """Pool client wrapper that remembers the shared memory blocks it was handed"""
+
+    def __init__(self, pool=None, fail_submit=False):
+        self.pool = pool
+        self.fail_submit = fail_submit
+        self.blocks = []
+
+    def run(self, shm_name, *args):
+        self.blocks.append(shm_name)
+        return self.pool.run(shm_name, *args)
+
+    def submit(self, shm_name, *args):
+        self.blocks.append(shm_name)
+        if self.fail_submit:
+            raise ocr_workers.OCRWorkerError('No OCR workers are running')
+        return self.pool.submit(shm_name, *args)
+
+    def poll(self, *args):
+        return self.pool.poll(*args)
+
+
+def _unlinked(name):
+    try:
+        shared_memory.SharedMemory(name=name).close()
+    except FileNotFoundError:
+        return True
+    return False
+
+
+def _image(height=40, width=30, value=3):
+    return np.full((height, width, 3), value, np.uint8)
+
+
+def start_pool():
+    """Pool server process with one stand-in worker, and a client connected to it"""
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        address = f'127.0.0.1:{probe.getsockname()[1]}'
+    os.environ['OCR_WORKER_ADDRESS'] = address
+    os.environ.setdefault('OCR_WORKER_AUTHKEY', 'test-ocr-workers')
+    server = subprocess.Popen(
+        [sys.executable, '-c', 'import ocr_workers, test_ocr_workers; '
+         f'ocr_workers.serve({address!r}, 1, 0.5, test_ocr_workers.stand_in_system)'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            return server, ocr_workers._pool_client()
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline or server.poll() is not None:
+                server.kill()
+                raise
+            time.sleep(0.2)
+
+
+def check_pool_result(pool):
+    client = RecordingClient(pool)
+    events = []
+    result = ocr_workers.run_array(client, _image(), {}, timeout=60,
+                                   progress=lambda stage, data: events.append((stage, data)))
+    plain = ocr_workers.run_array(client, _image(value=1), {}, timeout=60)
+    return (result['ocr_data']['student_name'] == f'PIXELS {40 * 30 * 3 * 3}'
+            and result['ocr_data']['roll_number'] == '40' and result['extracted_text'] == 'STAND-IN'
+            and events == [('detection', {'shape': [40, 30, 3]})]
+            and plain['ocr_data']['student_name'] == f'PIXELS {40 * 30 * 3}'
+            and len(client.blocks) == 2 and all(_unlinked(name) for name in client.blocks))
+
+
+def check_pool_failure(pool):
+    client = RecordingClient(pool)
+    try:
+        ocr_workers.run_array(client, _image(), {'fail': True}, timeout=60)
+        return False
+    except ocr_workers.OCRWorkerError as e:
+        failed = 'stand-in OCR failure' in str(e)
+    return failed and _unlinked(client.blocks[0]) and pool.stats()['pending'] == 0
+
+
+def check_failed_submit():
+    client = RecordingClient(fail_submit=True)
+    try:
+        ocr_workers.run_array(client, _image(), {}, progress=lambda stage, data: None)
+        return False
+    except ocr_workers.OCRWorkerError:
+        pass
+    return len(client.blocks) == 1 and _unlinked(client.blocks[0])
+
+
+def check_in_process_fallback():
+    address = os.environ.pop('OCR_WORKER_ADDRESS', None)
+    client, ocr_workers._client = ocr_workers._client, None
+    shared, ocr_workers._local_system = ocr_workers._local_system, StandInSystem()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'two_pages.tiff')
+            cv2.imwritemulti(path, [_image(value=1), _image(height=20, value=2)])
+            events = []
+            result = ocr_workers.run_ocr(path, progress=lambda stage, data: events.append((stage, data['page'])),
+                                         temp_dir=tmp)
+    finally:
+        ocr_workers._local_system = shared
+        ocr_workers._client = client
+        if address is not None:
+            os.environ['OCR_WORKER_ADDRESS'] = address
+    pages = result['ocr_data']['pages']
+    return ([page['roll_number'] for page in pages] == ['40', '20']
+            and result['ocr_data']['roll_number'] == '40'
+            and result['extracted_text'] == 'STAND-IN\nSTAND-IN'
+            and events == [('detection', 1), ('page_done', 1), ('detection', 2), ('page_done', 2)])
+
+
+def main():
+    print("Testing OCR worker pool...")
+    server, pool = start_pool()
+    checks = [
+        ('the pool reads shared memory and returns the compact result', lambda: check_pool_result(pool)),
+        ('a failed task is reported and its block unlinked', lambda: check_pool_failure(pool)),
+        ('a failed submit still unlinks the block', check_failed_submit),
+        ('run_ocr falls back to in-process OCR page by page', check_in_process_fallback),
+    ]
+    passed = 0
+    try:
+        for name, check in checks:
+            try:
+                ok = check()
+            except Exception as e:
+                print(f"  ❌ {name}: {e}")
+                continue
+            print(f"  {'✅' if ok else '❌'} {name}")
+            passed += ok
+    finally:
+        # Interrupted, serve() shuts the pool's workers down before exiting
+        server.send_signal(signal.SIGINT)
+        server.wait(timeout=30)
+
+    print(f"\nOCR Workers Test Result: {passed}/{len(checks)} checks passed")
+    return passed == len(checks)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Page crop check
+===============
+preprocessing.crop_document on synthetic pages: a flatbed scan whose only
+large quadrilateral is the bordered marks table must be left whole (the
+header, name and result sit outside the table), while a photographed page
+on a desk is found and cropped.
+"""
+
+import sys
+
+import cv2
+import numpy as np
+
+import preprocessing
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def bordered_table_scan():
+    """A4 at 200 dpi: header text, a full-width ruled marks table, result line"""
+    page = np.full((2339, 1654, 3), 255, np.uint8)
+    for i, text in enumerate(['UNIVERSITY OF KASHMIR', 'MARKS CERTIFICATE', 'Name: TAHIR AHMAD KHAN', 'Roll No 826']):
+        cv2.putText(page, text, (150, 150 + i * 90), FONT, 2, (0, 0, 0), 4)
+    x0, y0, side = 96, 500, 1462
+    cv2.rectangle(page, (x0, y0), (x0 + side, y0 + side), (0, 0, 0), 4)
+    for row in range(10):
+        if row:
+            cv2.line(page, (x0, y0 + row * 146), (x0 + side, y0 + row * 146), (0, 0, 0), 2)
+        cv2.putText(page, f'MBA40{row}  Business Legislation  70  22', (x0 + 30, y0 + row * 146 + 90),
+                    FONT, 1.5, (0, 0, 0), 3)
+    cv2.putText(page, 'Result: PASS   Division: IST', (150, 2150), FONT, 2, (0, 0, 0), 4)
+    return page
+
+
+def photographed_page():
+    """The scan in perspective on a plain, slightly noisy desk; returns (photo, true corners)"""
+    page = bordered_table_scan()
+    photo = np.full((3000, 4000, 3), (60, 90, 120), np.float32)
+    photo = np.clip(photo + np.random.default_rng(0).normal(0, 3, photo.shape), 0, 255).astype(np.uint8)
+    h, w = page.shape[:2]
+    corners = np.float32([[700, 100], [3300, 200], [3200, 2900], [600, 2850]])
+    M = cv2.getPerspectiveTransform(np.float32([[0, 0], [w - 1, 0], [w - 1, h - 1], [0, h - 1]]), corners)
+    warped = cv2.warpPerspective(page, M, (4000, 3000))
+    mask = cv2.warpPerspective(np.full((h, w), 255, np.uint8), M, (4000, 3000)) > 0
+    photo[mask] = warped[mask]
+    return photo, corners
+
+
+def check_scan_table_not_cropped():
+    scan = bordered_table_scan()
+    return preprocessing.find_document_quad(scan) is None and preprocessing.crop_document(scan) is scan
+
+
+def check_photo_cropped():
+    photo, corners = photographed_page()
+    quad = preprocessing.find_document_quad(photo)
+    cropped = preprocessing.crop_document(photo)
+    return (quad is not None and float(np.abs(quad - corners).max()) < 15
+            and cropped.shape[0] < photo.shape[0] and cropped.shape[1] < photo.shape[1])
+
+
+CHECKS = [
+    ('bordered table on a scan is not taken for the page', check_scan_table_not_cropped),
+    ('page photographed on a desk is found and cropped', check_photo_cropped),
+]
+
+
+def main():
+    print("Testing page crop...")
+    passed = 0
+    for name, check in CHECKS:
+        try:
+            ok = check()
+        except Exception as e:
+            print(f"  ❌ {name}: {e}")
+            continue
+        print(f"  {'✅' if ok else '❌'} {name}")
+        passed += ok
+
+    print(f"\nPage Crop Test Result: {passed}/{len(CHECKS)} checks passed")
+    return passed == len(CHECKS)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Startup regression check
+========================
+API-only processes must start without importing the OCR stack. Fails when a
+heavy dependency is imported at startup or startup exceeds the time budget
+(STARTUP_BUDGET_SECONDS, default 3).
+"""
+
+import os
+import sys
+
+from benchmarks.bench_startup import TARGETS, measure
+
+BUDGET_SECONDS = float(os.environ.get('STARTUP_BUDGET_SECONDS', 3))
+
+
+def main():
+    print("Testing backend startup...")
+    failures = 0
+    for target in TARGETS:
+        try:
+            result = measure(target)
+        except Exception as e:
+            print(f"  ❌ {target}: could not start ({e})")
+            failures += 1
+            continue
+
+        problems = []
+        if result['heavy_modules']:
+            problems.append(f"imported {', '.join(result['heavy_modules'])}")
+        if result['seconds'] > BUDGET_SECONDS:
+            problems.append(f"took {result['seconds']:.2f}s (budget {BUDGET_SECONDS:.1f}s)")
+
+        if problems:
+            print(f"  ❌ {target}: {'; '.join(problems)}")
+            failures += 1
+        else:
+            print(f"  ✅ {target}: {result['seconds']:.3f}s, {result['peak_rss_mb']:.0f} MB peak")
+
+    print(f"\nStartup Test Result: {len(TARGETS) - failures}/{len(TARGETS)} targets within budget")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -28,15 +28,26 @@ import {
   Hash
 } from 'lucide-react';
 import { useAuth } from '../context/AuthContext';
+import { apiService } from '../services/api';
 import toast from 'react-hot-toast';
 import './StudentDashboard.css';
 
+// Upload progress bar position and label for each OCR job event
+const OCR_STAGE_PROGRESS = {
+  queued: 60, started: 65, preprocessing: 70, detection: 75, recognition: 85, extraction: 90,
+};
+const OCR_STAGE_LABELS = {
+  queued: 'Queued for text extraction', started: 'Reading document', preprocessing: 'Cleaning up image',
+  detection: 'Finding text', recognition: 'Reading text', extraction: 'Extracting fields',
+};
+
 const StudentDashboard = () => {
   const navigate = useNavigate();
   const { user, logout, updateUser } = useAuth();
   const [documents, setDocuments] = useState([]);
   const [loading, setLoading] = useState(true);
   const [uploadProgress, setUploadProgress] = useState(0);
+  const [ocrStage, setOcrStage] = useState('');
   const [selectedFile, setSelectedFile] = useState(null);
   const [dragActive, setDragActive] = useState(false);
   const [activeTab, setActiveTab] = useState('overview');
@@ -212,21 +223,42 @@ const StudentDashboard = () => {
         body: formData
       });
 
-      setUploadProgress(80);
+      setUploadProgress(60);
 
       if (response.ok) {
         const data = await response.json();
         console.log('Upload successful:', data);
+
+        let ocrFailed = false;
+        if (data.document.ocr_pending) {
+          // OCR runs in the background; follow its progress instead of waiting on the upload
+          const final = await apiService.streamOcrEvents(data.document.id, ({ event, data: details }) => {
+            if (OCR_STAGE_PROGRESS[event]) {
+              setUploadProgress(OCR_STAGE_PROGRESS[event]);
+              setOcrStage(OCR_STAGE_LABELS[event]);
+              toast.loading(`${OCR_STAGE_LABELS[event]}...`, { id: 'upload' });
+            } else if (event === 'fields' && details.name) {
+              setOcrStage(`Found ${details.name}`);
+            }
+          }).catch((error) => ({ event: 'error', data: error }));
+          if (final.event === 'error') {
+            ocrFailed = true;
+            toast.error(`Document saved, but text extraction failed: ${final.data.message}`, { id: 'upload' });
+          }
+        }
         
         // Reload documents to get the updated list
         await loadDocuments();
         
         setUploadProgress(100);
-        toast.success('Document uploaded successfully!', { id: 'upload' });
+        if (!ocrFailed) {
+          toast.success('Document uploaded successfully!', { id: 'upload' });
+        }
         
         setTimeout(() => {
           setSelectedFile(null);
           setUploadProgress(0);
+          setOcrStage('');
           setDuplicateFound(null);
           setActiveTab('documents');
           setShowMyDocuments(true);
@@ -813,7 +845,7 @@ const StudentDashboard = () => {
                           Uploading
                         </div>
                         <div className={`stage ${uploadProgress >= 80 ? 'completed' : ''}`}>
-                          Processing
+                          {ocrStage || 'Processing'}
                         </div>
                         <div className={`stage ${uploadProgress >= 100 ? 'completed' : ''}`}>
                           Complete
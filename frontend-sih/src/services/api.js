@@ -89,6 +89,52 @@ export const apiService = {
     }
   },
 
+  // Follow a document's OCR job (server-sent events). fetch() is used instead of
+  // EventSource so the JWT can go in the Authorization header. Resolves with the
+  // final event ({ event: 'done' | 'error', data }).
+  async streamOcrEvents(documentId, onEvent) {
+    const token = localStorage.getItem('token');
+    const response = await fetch(`${api.defaults.baseURL}/api/documents/${documentId}/ocr/events`, {
+      headers: {
+        Authorization: `Bearer ${token}`,
+        Accept: 'text/event-stream',
+      },
+    });
+    if (!response.ok) {
+      const data = await response.json().catch(() => ({}));
+      throw { message: data.message || `Server error (${response.status})`, status: response.status, details: null };
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) {
+        throw { message: 'OCR progress stream ended unexpectedly', status: 0, details: null };
+      }
+      buffer += decoder.decode(value, { stream: true });
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const block = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        let event = 'message';
+        let data = '';
+        block.split('\n').forEach((line) => {
+          if (line.startsWith('event:')) event = line.slice(6).trim();
+          else if (line.startsWith('data:')) data += line.slice(5).trim();
+        });
+        if (!data) continue;
+        const message = { event, data: JSON.parse(data) };
+        onEvent(message);
+        if (event === 'done' || event === 'error') {
+          reader.cancel();
+          return message;
+        }
+      }
+    }
+  },
+
   async getDocument(documentId) {
     try {
       const response = await api.get(`/api/documents/${documentId}`);